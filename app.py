@@ -8,19 +8,43 @@
 
 import streamlit as st
 import streamlit.components.v1 as components
-from datetime import date, timedelta
+from datetime import date
 import json
-import re
-import random
-import hashlib
-import base64
+import uuid
 from pathlib import Path
 
+from fortune_assets import ASSET_MODE, asset_b64, asset_url
+from fortune_cache import cached_fortune
+from fortune_images import STAGE_WIDTH, image_variants
+from fortune_metrics import (
+    ASSET_READ,
+    EMIT,
+    PAYLOAD,
+    RERUNS,
+    SECTION,
+    add_payload,
+    inc,
+    start_exporter,
+    timed,
+)
+from fortune_db import db_watch_status, dedup_stats, load_all_dbs, start_db_watcher
+from fortune_events import EVENTS_BACKEND, emit, event_stats, start_event_sink
+from fortune_mem import current_session, live_sessions, mark, memory_report, session_internals_ok
+from fortune_pack import load_pools
+from fortune_engine import (
+    TarotCard,
+    lny_table,
+    zodiac_by_birth,
+)
+from fortune_schema import MBTI_TYPES
+from fortune_text import ZODIAC_LABEL_KO
+
 # =========================================================
 # 0) 고정값/버전
 # =========================================================
 APP_VERSION = "v2026.0002"
 APP_URL = "https://my-fortune.streamlit.app"
+SHARE_URL = f"{APP_URL}/?ref=share"  # 공유 링크로 들어온 방문 → share_open 이벤트
 DANANEUM_LANDING_URL = "https://capable-kataifi-46f1ad.netlify.app/"
 DEBUG_MODE = False  # DB 연결 확인용 UI 숨김
 
@@ -35,192 +59,85 @@ st.set_page_config(
 # =========================================================
 DATA_DIR = Path("data")
 
-def _load_json_by_candidates(candidates):
-    for p in candidates:
-        fp = Path(p)
-        if fp.exists():
-            with open(fp, "r", encoding="utf-8") as f:
-                return json.load(f), str(fp)
-    raise FileNotFoundError(
-        "필수 DB 파일을 찾지 못했습니다.\n"
-        + "\n".join([f"- {c}" for c in candidates])
-        + "\n\nGitHub에 업로드한 data 폴더 파일명을 다시 확인해주세요."
-    )
-
-def load_all_dbs():
-    fortunes_year, path_year = _load_json_by_candidates([
-        "data/fortunes_ko_2026.json",
-        "data/fortunes_ko_2026 (1).json",
-    ])
-    fortunes_today, path_today = _load_json_by_candidates([
-        "data/fortunes_ko_today.json",
-        "data/fortunes_ko_today (1).json",
-        "data/fortunes_ko_today (2).json",
-        "data/fortunes_ko_today (3).json",
-    ])
-    fortunes_tomorrow, path_tomorrow = _load_json_by_candidates([
-        "data/fortunes_ko_tomorrow.json",
-        "data/fortunes_ko_tomorrow (1).json",
-        "data/fortunes_ko_tomorrow (2).json",
-    ])
-    lunar_lny, path_lny = _load_json_by_candidates([
-        "data/lunar_new_year_1920_2026.json",
-    ])
-    zodiac_db, path_zodiac = _load_json_by_candidates([
-        "data/zodiac_fortunes_ko_2026.json",
-        "data/zodiac_fortunes_ko_2026_FIXED.json",
-        "data/zodiac_fortunes_ko_2026_FIXED (1).json",
-    ])
-    mbti_db, path_mbti = _load_json_by_candidates([
-        "data/mbti_traits_ko.json",
-    ])
-    saju_db, path_saju = _load_json_by_candidates([
-        "data/saju_ko.json",
-    ])
-    tarot_db, path_tarot = _load_json_by_candidates([
-        "data/tarot_db_ko.json",
-        "data/tarot_db_ko (1).json",
-        "tarot_db_ko (1).json",
-        "tarot_db_ko.json",
-    ])
-
-    return {
-        "fortunes_year": fortunes_year,
-        "fortunes_today": fortunes_today,
-        "fortunes_tomorrow": fortunes_tomorrow,
-        "lunar_lny": lunar_lny,
-        "zodiac_db": zodiac_db,
-        "mbti_db": mbti_db,
-        "saju_db": saju_db,
-        "tarot_db": tarot_db,
-        "paths": {
-            "year": path_year,
-            "today": path_today,
-            "tomorrow": path_tomorrow,
-            "lny": path_lny,
-            "zodiac": path_zodiac,
-            "mbti": path_mbti,
-            "saju": path_saju,
-            "tarot": path_tarot,
-        }
-    }
+# load_all_dbs: 프로세스 전역 캐시(fortune_db.py) — rerun 마다 JSON 재파싱하지 않음
 
 # =========================================================
 # 2) 유틸
 # =========================================================
-def stable_seed(*parts: str) -> int:
-    s = "|".join([str(p) for p in parts])
-    h = hashlib.sha256(s.encode("utf-8")).hexdigest()
-    return int(h[:12], 16)
-
-def pick_one(pool, seed_int: int):
-    if not isinstance(pool, list) or len(pool) == 0:
-        return None
-    r = random.Random(seed_int)
-    return r.choice(pool)
-
-def safe_str(x):
-    if x is None:
-        return ""
-    if isinstance(x, (dict, list)):
-        return json.dumps(x, ensure_ascii=False)
-    return str(x)
-
-def strip_html_like(text: str) -> str:
-    if not text:
-        return ""
-    text = re.sub(r"<[^>]*>", "", text)
-    return text.strip()
-
 def read_file_b64(path: Path) -> str | None:
-    """바이너리 파일을 base64로 읽기(이미지/오디오 공용)."""
-    try:
-        if not path.exists():
-            return None
-        b = path.read_bytes()
-        if not b:
-            return None
-        return base64.b64encode(b).decode("ascii")
-    except Exception:
-        return None
+    """바이너리 파일을 base64로 읽기(이미지/오디오 공용). 프로세스 전역 캐시(fortune_assets.py)."""
+    with timed(ASSET_READ, "file"):
+        return asset_b64(path)
 
 def read_image_b64(path: Path) -> str | None:
-    """이미지 파일만 base64로 읽기(비이미지는 None)."""
-    try:
-        if not path.exists():
-            return None
-        b = path.read_bytes()
-        if len(b) < 12:
-            return None
-        sig = b[:12]
-        # PNG, JPG, WEBP(RIFF)
-        if not (sig.startswith(b"\x89PNG") or sig.startswith(b"\xFF\xD8") or sig[0:4] == b"RIFF"):
-            return None
-        return base64.b64encode(b).decode("ascii")
-    except Exception:
-        return None
+    """이미지 파일만 base64로 읽기(비이미지는 None). 시그니처는 앞 12바이트만 확인."""
+    with timed(ASSET_READ, "image"):
+        return asset_b64(path, image=True)
+
+def _md(element: str, body: str, **kwargs):
+    """st.markdown + 요소별 소요시간/출력 바이트 기록(fortune_metrics)."""
+    add_payload(st.session_state.get("stage", "input"), element, body)
+    with timed(EMIT, element):
+        st.markdown(body, **kwargs)
+
+def _html(element: str, body: str, height: int):
+    """components.html + 요소별 소요시간/출력 바이트 기록."""
+    add_payload(st.session_state.get("stage", "input"), element, body)
+    with timed(EMIT, element):
+        components.html(body, height=height)
+
+def payload_debug_panel():
+    """DEBUG_MODE: 실행 당 출력 바이트 상위 요소 (페이로드 예산/회귀 확인용).
+
+    실행 수 = stage 의 스크립트 rerun + 그 stage 의 fragment 단독 rerun ("<stage>/fragment")
+    """
+    reruns = RERUNS.snapshot()
+    runs = {}
+    for label, v in reruns.items():
+        stage = label.split("/", 1)[0]
+        runs[stage] = runs.get(stage, 0) + v
+    rows = []
+    for r in PAYLOAD.top(n=15):
+        n = runs.get(r["stage"], 0) or 1
+        rows.append({
+            "stage": r["stage"],
+            "요소": r["element"],
+            "실행 당 평균(B)": r["bytes"] // n,
+            "1회 최대(B)": r["max"],
+            "호출 수": r["calls"],
+            "누적(B)": r["bytes"],
+        })
+    st.caption(f"rerun 수: {reruns}")
+    st.table(rows)
+
+def memory_debug_panel(dbs):
+    """DEBUG_MODE: DB/캐시/에셋/세션별 메모리 + 할당 위치 증가 (fortune_mem.py, 버튼 눌렀을 때만 측정)."""
+    c1, c2 = st.columns(2)
+    if c1.button("메모리 측정", key="dbg_mem_report"):
+        # 서버 세션 목록을 못 얻으면(AppTest 등) 현재 세션만
+        rep = memory_report(dbs, live_sessions() or current_session(st.session_state.sid))
+        st.caption(f"RSS {rep['rss'] / 2**20:.1f}MB · tracemalloc {rep['tracemalloc']}")
+        for title in ("dbs", "caches"):
+            st.table([{"이름": k, "크기(B)": v["bytes"], "공유 제외(B)": v["new"]} for k, v in rep[title].items()])
+        st.table(rep["assets"]["entries"])
+        if session_internals_ok():
+            st.table([{"세션": k, "크기(B)": v["bytes"], **v["keys"]} for k, v in rep["sessions"].items()])
+        else:
+            st.caption(f"세션별 크기 생략: Streamlit {st.__version__} 은 내부 구조가 확인된 버전(1.37.x)이 아님")
+    if c2.button("할당 추적 비교", key="dbg_mem_mark", help="첫 클릭: tracemalloc 시작 + 기준, 이후: 직전 클릭 대비 증가"):
+        sites = mark()
+        if sites:
+            st.table(sites)
+        else:
+            st.caption("기준 스냅샷 저장됨 — 다시 누르면 그 사이 증가한 할당 위치를 보여줍니다.")
 
 # =========================================================
-# 3) 음력 설 기준 띠 계산
+# 3) 음력 설 기준 띠 계산 / seed·pick / 타로 선택 → fortune_engine.py
 # =========================================================
-ZODIAC_ORDER = ["rat","ox","tiger","rabbit","dragon","snake","horse","goat","monkey","rooster","dog","pig"]
-ZODIAC_LABEL_KO = {
-    "rat":"쥐띠","ox":"소띠","tiger":"호랑이띠","rabbit":"토끼띠","dragon":"용띠","snake":"뱀띠",
-    "horse":"말띠","goat":"양띠","monkey":"원숭이띠","rooster":"닭띠","dog":"개띠","pig":"돼지띠",
-}
-ZODIAC_EN_TO_KO_INLINE = dict(ZODIAC_LABEL_KO)
-
-def parse_lny_map(lny_json):
-    out = {}
-    if isinstance(lny_json, dict):
-        for y, dstr in lny_json.items():
-            try:
-                yy = int(str(y))
-                a, b, c = str(dstr).split("-")
-                out[yy] = date(int(a), int(b), int(c))
-            except Exception:
-                continue
-    return out
-
-def zodiac_key_from_year(gregorian_year: int) -> str:
-    idx = (gregorian_year - 4) % 12
-    return ZODIAC_ORDER[idx]
-
-def zodiac_by_birth(birth: date, lny_map: dict) -> tuple[str, int]:
-    y = birth.year
-    lny = lny_map.get(y)
-    zodiac_year = y
-    if lny and birth < lny:
-        zodiac_year = y - 1
-    zk = zodiac_key_from_year(zodiac_year)
-    return zk, zodiac_year
-
-def normalize_zodiac_text(text: str) -> str:
-    """띠 운세 문장에 영어키(예: rooster띠)가 섞여 있으면 한국어로 치환."""
-    if not text:
-        return text
-    t = str(text)
-    for en, ko in ZODIAC_EN_TO_KO_INLINE.items():
-        t = re.sub(rf"\b{re.escape(en)}\s*띠\b", ko, t, flags=re.IGNORECASE)
-        t = re.sub(rf"\b{re.escape(en)}\b", ko.replace("띠",""), t, flags=re.IGNORECASE)
-    return t
-
-def strip_trailing_index(text: str) -> str:
-    """문장 끝에 붙은 (숫자) 같은 인덱스 표기 제거."""
-    if not text:
-        return text
-    return re.sub(r"\s*\(\d+\)\s*$", "", str(text)).strip()
 
 # =========================================================
 # 4) MBTI
 # =========================================================
-MBTI_TYPES = [
-    "INTJ","INTP","ENTJ","ENTP",
-    "INFJ","INFP","ENFJ","ENFP",
-    "ISTJ","ISFJ","ESTJ","ESFJ",
-    "ISTP","ISFP","ESTP","ESFP",
-]
-
 MBTI_Q16 = [
     ("EI","사람들과 함께 있을 때 에너지가 올라간다","혼자 있는 시간이 에너지를 채운다"),
     ("EI","처음 보는 사람과도 금방 친해지는 편이다","낯선 사람은 적응 시간이 필요하다"),
@@ -257,31 +174,6 @@ def compute_mbti_from_answers(answers):
     mbti = decide("EI","E","I")+decide("SN","S","N")+decide("TF","T","F")+decide("JP","J","P")
     return mbti if mbti in MBTI_TYPES else "ENFP"
 
-def get_mbti_trait_text(mbti_db: dict, mbti: str) -> str:
-    """
-    mbti_traits_ko.json 구조 대응:
-    - {"traits": {"ENFP": {...}} , ...}
-    - {"ENFP": "..."} 형태도 대응
-    """
-    if not isinstance(mbti_db, dict):
-        return ""
-    if "traits" in mbti_db and isinstance(mbti_db["traits"], dict):
-        t = mbti_db["traits"].get(mbti)
-        if isinstance(t, str):
-            return t
-        if isinstance(t, dict):
-            kw = t.get("keywords") or t.get("키워드") or []
-            tips = t.get("tips") or t.get("action_tips") or []
-            parts = []
-            if isinstance(kw, list) and kw:
-                parts.append("키워드: " + " · ".join([strip_html_like(str(x)) for x in kw][:6]))
-            if isinstance(tips, list) and tips:
-                parts.append(json.dumps([strip_html_like(str(x)) for x in tips][:6], ensure_ascii=False))
-            return " ".join(parts).strip()
-        return ""
-    v = mbti_db.get(mbti, "")
-    return strip_html_like(safe_str(v))
-
 # =========================================================
 # 5) 친구 공유 (URL 복사 포함)
 # =========================================================
@@ -325,7 +217,7 @@ def share_block():
 
 <script>
 (function() {{
-  const url = {json.dumps(APP_URL, ensure_ascii=False)};
+  const url = {json.dumps(SHARE_URL, ensure_ascii=False)};
   const btnShare = document.getElementById("btnShare");
   const btnCopy = document.getElementById("btnCopy");
   const toast = document.getElementById("copy_toast");
@@ -363,62 +255,11 @@ def share_block():
 }})();
 </script>
 """
-    components.html(share_html, height=170)
+    _html("share", share_html, height=170)
 
 # =========================================================
 # 6) 타로 (하루 동안 고정 + back→shake→reveal + 효과음)
 # =========================================================
-def get_tarot_of_day(tarot_db: dict, user_seed: int, today_: date):
-    """타로카드 1장 (하루 고정).
-    - DB가 78장(메이저+마이너) 전부 들어있으면 전체 풀에서 랜덤 선택
-    - 기존 구조(majors/cards/list)도 그대로 호환
-    """
-    cards_raw = []
-
-    # 1) 가장 흔한 구조: {"cards":[...]} 또는 list
-    if isinstance(tarot_db, dict) and isinstance(tarot_db.get("cards"), list):
-        cards_raw = tarot_db["cards"]
-    elif isinstance(tarot_db, list):
-        cards_raw = tarot_db
-    else:
-        # 2) 기존 majors 호환
-        if isinstance(tarot_db, dict) and isinstance(tarot_db.get("majors"), list):
-            cards_raw.extend(tarot_db.get("majors", []))
-
-        # 3) 마이너 아르카나/기타 키들까지 전부 흡수 (list of dict)
-        if isinstance(tarot_db, dict):
-            for k, v in tarot_db.items():
-                if k in ("cards", "majors"):
-                    continue
-                if isinstance(v, list) and v and all(isinstance(x, dict) for x in v):
-                    cards_raw.extend(v)
-
-    cleaned = []
-    for c in cards_raw:
-        if not isinstance(c, dict):
-            continue
-        name = c.get("name_ko") or c.get("name") or c.get("title") or c.get("card")
-        img = c.get("image") or c.get("img") or ""
-        meaning = ""
-        if isinstance(c.get("upright"), dict) and c["upright"].get("summary"):
-            meaning = c["upright"]["summary"]
-        else:
-            meaning = c.get("meaning") or c.get("desc") or c.get("text") or ""
-        if name and meaning:
-            cleaned.append({
-                "name": strip_html_like(str(name)),
-                "meaning": strip_html_like(str(meaning)),
-                "image": str(img).strip()
-            })
-
-    if not cleaned:
-        return None
-
-    # ✅ 하루 고정: (날짜 + 사용자 seed)로 선택
-    seed_int = stable_seed(str(today_), str(user_seed), "tarot")
-    r = random.Random(seed_int)
-    return r.choice(cleaned)
-
 def _pick_existing_path(candidates: list[str]) -> Path | None:
     for c in candidates:
         p = Path(c)
@@ -426,10 +267,66 @@ def _pick_existing_path(candidates: list[str]) -> Path | None:
             return p
     return None
 
-def tarot_ui(tarot_db: dict, birth: date, name: str, mbti: str):
-    st.markdown("<div class='card tarot-card'>", unsafe_allow_html=True)
-    st.markdown("### 🃏 오늘의 타로카드 (하루 1회 가능)", unsafe_allow_html=True)
-    st.markdown("<div class='soft-box'>뒷면 카드를 보고 <b>뽑기</b>를 누르면 카드가 공개됩니다. 오늘 하루 동안은 <b>같은 카드(같은 의미/이미지)</b>로 고정됩니다.</div>", unsafe_allow_html=True)
+def _asset_src(path: Path | None, mime: str, image: bool = False) -> str | None:
+    """타로 HTML 에 넣을 src.
+    - FORTUNE_ASSET_MODE=url: 내용 해시 URL (Streamlit 정적 제공 또는 FORTUNE_ASSET_BASE_URL, HTML 에 바이트 X)
+    - inline(기본) 또는 assets/ 밖 파일: data: URI
+    """
+    if not path:
+        return None
+    if ASSET_MODE == "url":
+        url = asset_url(path, image=image)
+        if url:
+            return url
+    b64 = read_image_b64(path) if image else read_file_b64(path)
+    return f"data:{mime};base64,{b64}" if b64 else None
+
+# 무대 최대 폭 360px → 브라우저가 화면 밀도에 맞는 변형을 고름
+_TAROT_SIZES = f"(max-width: {STAGE_WIDTH}px) 100vw, {STAGE_WIDTH}px"
+
+def _tarot_img(path: Path | None, cls: str, alt: str) -> str | None:
+    """타로 무대 <img> 태그. 최적화 변형(assets/optimized/manifest.json)이 있으면
+    - url 모드: <picture> + AVIF/WebP srcset (원본 PNG 는 fallback)
+    - inline 모드: 2x WebP 1장만 data: URI 로
+    """
+    if not path:
+        return None
+    variants = image_variants(path)
+    if ASSET_MODE == "url" and variants:
+        src = asset_url(path, image=True)
+        if src:
+            sources = ""
+            for fmt in ("avif", "webp"):
+                urls = [(w, asset_url(p)) for w, p in variants.get(fmt, [])]
+                if urls and all(u for _, u in urls):
+                    srcset = ", ".join(f"{u} {w}w" for w, u in urls)
+                    sources += f'<source type="image/{fmt}" srcset="{srcset}" sizes="{_TAROT_SIZES}">'
+            return f'<picture>{sources}<img class="{cls}" src="{src}" alt="{alt}" /></picture>'
+    if ASSET_MODE != "url" and variants.get("webp"):
+        _, p = next(((w, p) for w, p in variants["webp"] if w >= 2 * STAGE_WIDTH), variants["webp"][-1])
+        src = _asset_src(Path(p), "image/webp", image=True)
+    else:
+        src = _asset_src(path, "image/png", image=True)
+    return f'<img class="{cls}" src="{src}" alt="{alt}" />' if src else None
+
+def _reveal_tarot(card: TarotCard | None):
+    if not st.session_state.get("tarot_revealed"):
+        emit("tarot_reveal", st.session_state.sid, mbti=st.session_state.mbti, tarot=card.name if card else "")
+    st.session_state.tarot_revealed = True
+
+@st.fragment
+@timed(SECTION, "tarot")
+def tarot_ui(card: TarotCard | None):
+    """card: compute_fortune() 의 오늘 카드(사용자+날짜로 고정).
+
+    fragment: 뽑기 클릭 시 이 함수만 다시 실행 → DB 로드/결과 카드/공유·광고 블록/전역 CSS 재전송 X
+    """
+    # 스크립트 rerun 이 남긴 표시가 없으면 fragment 단독 rerun → 출력 바이트의 분모에 포함
+    if not st.session_state.pop("script_run", False):
+        inc(RERUNS, f"{st.session_state.stage}/fragment")
+    _md("tarot_card", "<div class='card tarot-card'>", unsafe_allow_html=True)
+    _md("tarot_card", "### 🃏 오늘의 타로카드 (하루 1회 가능)", unsafe_allow_html=True)
+    _md("tarot_card", "<div class='soft-box'>뒷면 카드를 보고 <b>뽑기</b>를 누르면 카드가 공개됩니다. 오늘 하루 동안은 <b>같은 카드(같은 의미/이미지)</b>로 고정됩니다.</div>", unsafe_allow_html=True)
 
     # back.png
     back_path = _pick_existing_path([
@@ -437,44 +334,39 @@ def tarot_ui(tarot_db: dict, birth: date, name: str, mbti: str):
         "assets/back.png",
         "back.png",
     ])
-    back_b64 = read_image_b64(back_path) if back_path else None
-
-    # 오늘 카드(사용자+날짜로 고정)
-    user_seed = stable_seed(str(birth), (name or ""), (mbti or ""))
-    card = get_tarot_of_day(tarot_db, user_seed, date.today())
+    back_img = _tarot_img(back_path, "tarot-back", "tarot back")
 
     # 상태
     if "tarot_revealed" not in st.session_state:
         st.session_state.tarot_revealed = False
 
     # 버튼 클릭 직전 스크롤 저장(JS에서 처리) → rerun 시 복원
-    if st.button("타로카드 뽑기", use_container_width=True, key="btn_tarot_draw"):
-        st.session_state.tarot_revealed = True
-        st.rerun()
+    # on_click 으로 상태 변경 → 같은 fragment 실행에서 바로 공개 (추가 st.rerun 없음)
+    st.button("타로카드 뽑기", use_container_width=True, key="btn_tarot_draw", on_click=_reveal_tarot, args=(card,))
 
     # 이미지 준비
-    front_b64 = None
+    front_img = None
     front_label = ""
     front_meaning = ""
     if card:
-        front_label = card["name"]
-        front_meaning = card["meaning"]
-        img_path = Path(card.get("image", ""))
-        if img_path.exists():
-            front_b64 = read_image_b64(img_path)
+        front_label = card.name
+        front_meaning = card.meaning
+        img_path = Path(card.image)
+        if card.image_exists:
+            front_img = _tarot_img(img_path, "tarot-front", "tarot front")
 
     # back 없으면 앱 죽지 않게 안내
-    if not back_b64:
+    if not back_img:
         st.info("tarot back.png 를 찾지 못했습니다. (assets/tarot/back.png 확인)")
-        st.markdown("</div>", unsafe_allow_html=True)
+        _md("tarot_card", "</div>", unsafe_allow_html=True)
         return
 
     revealed = bool(st.session_state.tarot_revealed)
 
     # revealed인데 front가 없으면 안내
-    if revealed and (not card or not front_b64):
+    if revealed and (not card or not front_img):
         st.info("타로 DB 또는 이미지 경로를 읽지 못했습니다. (data/tarot_db_ko.json 및 assets/tarot 폴더 확인)")
-        st.markdown("</div>", unsafe_allow_html=True)
+        _md("tarot_card", "</div>", unsafe_allow_html=True)
         return
 
     # 효과음 파일 후보(사용자 폴더 구성 다양성 대응)
@@ -492,29 +384,23 @@ def tarot_ui(tarot_db: dict, birth: date, name: str, mbti: str):
         "assets/sfx_reveal.mp3",
         "reveal.mp3",
     ])
-    sfx_mystery_b64 = read_file_b64(sfx_mystery_path) if sfx_mystery_path else None
-    sfx_reveal_b64 = read_file_b64(sfx_reveal_path) if sfx_reveal_path else None
-
-    def _data_uri(b64: str, mime: str) -> str:
-        return f"data:{mime};base64,{b64}"
-
-    back_src = _data_uri(back_b64, "image/png")
-    front_src = _data_uri(front_b64, "image/png") if front_b64 else ""
 
     audio_html = ""
     if revealed:
-        if sfx_mystery_b64:
-            audio_html += f"<audio id='mystery' src='{_data_uri(sfx_mystery_b64,'audio/mpeg')}'></audio>"
-        if sfx_reveal_b64:
-            audio_html += f"<audio id='reveal' src='{_data_uri(sfx_reveal_b64,'audio/mpeg')}'></audio>"
+        sfx_mystery_src = _asset_src(sfx_mystery_path, "audio/mpeg")
+        sfx_reveal_src = _asset_src(sfx_reveal_path, "audio/mpeg")
+        if sfx_mystery_src:
+            audio_html += f"<audio id='mystery' src='{sfx_mystery_src}'></audio>"
+        if sfx_reveal_src:
+            audio_html += f"<audio id='reveal' src='{sfx_reveal_src}'></audio>"
 
     # ✅ 5초 흔들림 + 5초 뒤 공개
     tarot_html = f"""
 <div class="tarot-wrap">
   {audio_html}
   <div class="tarot-stage {'revealed' if revealed else ''}">
-    <img class="tarot-back" src="{back_src}" alt="tarot back" />
-    {"<img class='tarot-front' src='"+front_src+"' alt='tarot front' />" if revealed else ""}
+    {back_img}
+    {front_img if revealed else ""}
   </div>
 </div>
 
@@ -603,10 +489,10 @@ def tarot_ui(tarot_db: dict, birth: date, name: str, mbti: str):
 }})();
 </script>
 """
-    components.html(tarot_html, height=430 if revealed else 420)
+    _html("tarot_html", tarot_html, height=430 if revealed else 420)
 
     if revealed and front_label:
-        st.markdown(
+        _md("tarot_reveal",
             f"""
             <div class="reveal">
               <div class="reveal-title">✨ {front_label}</div>
@@ -616,13 +502,13 @@ def tarot_ui(tarot_db: dict, birth: date, name: str, mbti: str):
             unsafe_allow_html=True
         )
 
-    st.markdown("</div>", unsafe_allow_html=True)
+    _md("tarot_card", "</div>", unsafe_allow_html=True)
 
 # =========================================================
 # 7) 다나눔렌탈 광고(고정)
 # =========================================================
 def dananeum_ad_block():
-    st.markdown(
+    _md("ad",
         f"""
         <div class="adbox">
           <div class="ad-badge">광고</div>
@@ -642,7 +528,7 @@ def dananeum_ad_block():
 # =========================================================
 # 8) 스타일 (그라데이션 + 카드형 고정)
 # =========================================================
-st.markdown("""
+_md("css", """
 <style>
 .block-container { padding-top: 1.0rem; padding-bottom: 2.2rem; max-width: 720px; }
 
@@ -773,7 +659,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ✅ 전역 스크롤 저장(버튼 클릭 직전 위치 저장)
-components.html("""
+_html("scroll_iframe", """
 <script>
 (function(){
   document.addEventListener("click", function(){
@@ -796,12 +682,16 @@ if "mbti_mode" not in st.session_state:
     st.session_state.mbti_mode = "direct"  # direct / q16
 if "mbti" not in st.session_state:
     st.session_state.mbti = "ENFP"
+if "sid" not in st.session_state:
+    # 이벤트 로깅용 임의 세션 id (이름/생일은 기록하지 않음)
+    st.session_state.sid = uuid.uuid4().hex[:12]
+    st.session_state.log_share_open = st.query_params.get("ref") == "share"
 
 # =========================================================
 # 10) 메인 렌더
 # =========================================================
 def render_input(dbs):
-    st.markdown(f"""
+    _md("hero", f"""
     <div class="header-hero">
       <p class="hero-title">🔮 2026 운세 | 띠 + MBTI + 사주 + 오늘/내일 + 타로</p>
       <p class="hero-sub">이름 + 생년월일 + MBTI로 결과가 고정 출력됩니다</p>
@@ -818,15 +708,14 @@ def render_input(dbs):
         max_value=date(2026, 12, 31),
     )
 
-    lny_map = parse_lny_map(dbs["lunar_lny"])
-    zk, zy = zodiac_by_birth(st.session_state.birth, lny_map)
-    st.markdown(
+    zk, zy = zodiac_by_birth(st.session_state.birth, lny_table(dbs["lunar_lny"]))
+    _md("zodiac_card",
         f"<div class='card'><b>자동 띠 결정(한국 설 기준)</b><br>"
         f"<div class='soft-box'>당신의 띠: <b>{ZODIAC_LABEL_KO.get(zk, zk)}</b> (기준년도: {zy}년)</div></div>",
         unsafe_allow_html=True
     )
 
-    st.markdown("<div class='card'><b>MBTI</b></div>", unsafe_allow_html=True)
+    _md("mbti", "<div class='card'><b>MBTI</b></div>", unsafe_allow_html=True)
 
     mode = st.radio(
         "MBTI를 어떻게 할까요?",
@@ -838,166 +727,69 @@ def render_input(dbs):
 
     if st.session_state.mbti_mode == "direct":
         st.session_state.mbti = st.selectbox("MBTI 직접 선택", MBTI_TYPES, index=MBTI_TYPES.index(st.session_state.mbti))
-        trait_text = get_mbti_trait_text(dbs["mbti_db"], st.session_state.mbti)
+        trait_text = load_pools(dbs).mbti_trait(st.session_state.mbti)
         if trait_text:
-            st.markdown(f"<div class='soft-box'><b>{st.session_state.mbti}</b> · {strip_html_like(trait_text)}</div>", unsafe_allow_html=True)
+            _md("mbti", f"<div class='soft-box'><b>{st.session_state.mbti}</b> · {trait_text}</div>", unsafe_allow_html=True)
 
     else:
-        st.markdown("<div class='soft-box'>각 문항에서 더 가까운 쪽을 선택하세요. 제출하면 MBTI가 확정됩니다.</div>", unsafe_allow_html=True)
-        answers = []
-        for i, (axis, left, right) in enumerate(MBTI_Q16, start=1):
-            choice = st.radio(
-                f"{i}.",
-                [left, right],
-                key=f"mbti16_{i}"
-            )
-            answers.append((axis, choice == left))
-
-        if st.button("제출하고 MBTI 확정", use_container_width=True):
+        _md("mbti", "<div class='soft-box'>각 문항에서 더 가까운 쪽을 선택하세요. 제출하면 MBTI가 확정됩니다.</div>", unsafe_allow_html=True)
+        # form: 문항 선택은 브라우저에만 두고 제출 시 1회만 서버 실행 (문항마다 rerun X)
+        with st.form("mbti16_form", border=False):
+            answers = []
+            for i, (axis, left, right) in enumerate(MBTI_Q16, start=1):
+                choice = st.radio(
+                    f"{i}.",
+                    [left, right],
+                    key=f"mbti16_{i}"
+                )
+                answers.append((axis, choice == left))
+            submitted = st.form_submit_button("제출하고 MBTI 확정", use_container_width=True)
+
+        if submitted:
             st.session_state.mbti = compute_mbti_from_answers(answers)
             st.success(f"확정된 MBTI: {st.session_state.mbti}")
 
-    st.markdown('<div class="bigbtn">', unsafe_allow_html=True)
+    _md("bigbtn", '<div class="bigbtn">', unsafe_allow_html=True)
     if st.button("운세 보기", use_container_width=True):
         st.session_state.stage = "result"
+        st.session_state.log_view = True  # result_view 는 결과를 계산한 뒤 1회
         st.rerun()
-    st.markdown('</div>', unsafe_allow_html=True)
+    _md("bigbtn", '</div>', unsafe_allow_html=True)
 
 def render_result(dbs):
-    name = (st.session_state.name or "").strip()
-    birth = st.session_state.birth
-    mbti = st.session_state.mbti or "ENFP"
-
-    lny_map = parse_lny_map(dbs["lunar_lny"])
-    zodiac_key, zodiac_year = zodiac_by_birth(birth, lny_map)
-    zodiac_label = ZODIAC_LABEL_KO.get(zodiac_key, zodiac_key)
-
-    base_seed = stable_seed(str(birth), name, mbti)
-
-    # 1) 띠별 운세
-    zodiac_pool = []
-    zdb = dbs["zodiac_db"]
-    if isinstance(zdb, dict):
-        val = zdb.get(zodiac_key)
-        if val is None and isinstance(zdb.get("zodiac"), dict):
-            val = zdb["zodiac"].get(zodiac_key)
-
-        if isinstance(val, list):
-            zodiac_pool = val
-        elif isinstance(val, dict):
-            for k in ("items", "lines", "pools"):
-                vv = val.get(k)
-                if isinstance(vv, list):
-                    zodiac_pool = vv
-                    break
-
-    zodiac_text = pick_one(
-        [strip_trailing_index(normalize_zodiac_text(strip_html_like(safe_str(x)))) for x in zodiac_pool if safe_str(x).strip()],
-        stable_seed(str(base_seed), "zodiac")
-    )
-
-    # 2) MBTI 특징
-    mbti_trait = strip_html_like(get_mbti_trait_text(dbs["mbti_db"], mbti))
-
-    # 3) 사주 한마디 (saju_ko.json: elements 기반)
-    saju_text = ""
-    sdb = dbs["saju_db"]
-    if isinstance(sdb, dict) and isinstance(sdb.get("elements"), list) and sdb["elements"]:
-        elements = sdb["elements"]
-        idx = stable_seed(str(base_seed), "saju_element") % len(elements)
-        el = elements[idx]
-        pool = []
-        if isinstance(el, dict) and isinstance(el.get("pools"), dict) and isinstance(el["pools"].get("overall"), list):
-            pool = el["pools"]["overall"]
-        saju_text = pick_one([strip_trailing_index(strip_html_like(str(x))) for x in pool if str(x).strip()],
-                             stable_seed(str(base_seed), "saju_overall"))
-    else:
-        pool = []
-        if isinstance(sdb, dict) and isinstance(sdb.get("pools"), dict) and isinstance(sdb["pools"].get("saju"), list):
-            pool = sdb["pools"]["saju"]
-        saju_text = pick_one([strip_trailing_index(strip_html_like(str(x))) for x in pool if str(x).strip()],
-                             stable_seed(str(base_seed), "saju"))
-
-    # 4) 오늘/내일 운세 (날짜 seed → 날짜 바뀌면 다른 내용)
-    today = date.today()
-    tomorrow = today + timedelta(days=1)
-
-    def get_pool_from_fortune_db(fdb, key_name):
-        pool = []
-        if isinstance(fdb, dict):
-            if isinstance(fdb.get("pools"), dict) and isinstance(fdb["pools"].get(key_name), list):
-                pool = fdb["pools"][key_name]
-            elif isinstance(fdb.get(key_name), list):
-                pool = fdb[key_name]
-            elif isinstance(fdb.get("lines"), list):
-                pool = fdb["lines"]
-        elif isinstance(fdb, list):
-            pool = fdb
-        return [strip_trailing_index(strip_html_like(safe_str(x))) for x in pool if safe_str(x).strip()]
-
-    today_pool = get_pool_from_fortune_db(dbs["fortunes_today"], "today")
-    tomorrow_pool = get_pool_from_fortune_db(dbs["fortunes_tomorrow"], "tomorrow")
-
-    today_text = pick_one(today_pool, stable_seed(str(base_seed), str(today), "today"))
-    tomorrow_text = pick_one(tomorrow_pool, stable_seed(str(base_seed), str(tomorrow), "tomorrow"))
-
-    # 5) 2026 전체 운세
-    year_pool = []
-    ydb = dbs["fortunes_year"]
-    if isinstance(ydb, dict):
-        if isinstance(ydb.get("pools"), dict) and isinstance(ydb["pools"].get("year_all"), list):
-            year_pool = ydb["pools"]["year_all"]
-        elif isinstance(ydb.get("year_all"), list):
-            year_pool = ydb["year_all"]
-        elif isinstance(ydb.get("lines"), list):
-            year_pool = ydb["lines"]
-    elif isinstance(ydb, list):
-        year_pool = ydb
-
-    year_text = pick_one(
-        [strip_trailing_index(strip_html_like(safe_str(x))) for x in year_pool if safe_str(x).strip()],
-        stable_seed(str(base_seed), "year_2026")
-    )
-
-    # 비어있으면 명확히 표시(대체/자동생성 금지)
-    def ensure_text(val, label):
-        if val and str(val).strip():
-            return strip_trailing_index(val)
-        return f"{label} 데이터를 DB에서 찾지 못했습니다. (data 폴더 JSON 확인)"
-
-    zodiac_text = ensure_text(zodiac_text, "띠 운세")
-    mbti_trait = ensure_text(mbti_trait, "MBTI 특징")
-    saju_text = ensure_text(saju_text, "사주 한 마디")
-    today_text = ensure_text(today_text, "오늘 운세")
-    tomorrow_text = ensure_text(tomorrow_text, "내일 운세")
-    year_text = ensure_text(year_text, "2026 전체 운세")
-
-    display_name = f"{name}님의" if name else "당신의"
-    st.markdown(
+    # 선택 로직은 fortune_engine (Streamlit 비의존) — 여기서는 그리기만
+    # 같은 사용자+날짜 결과는 프로세스 전역 캐시(fortune_cache)에서 재사용
+    with timed(SECTION, "compute_fortune"):
+        res = cached_fortune(st.session_state.birth, st.session_state.name, st.session_state.mbti, date.today(), dbs)
+    if st.session_state.pop("log_view", False):
+        emit("result_view", st.session_state.sid, mbti=res.mbti, zodiac=res.zodiac_key)
+
+    display_name = f"{res.name}님의" if res.name else "당신의"
+    _md("hero",
         f"""
         <div class="header-hero">
           <p class="hero-title">{display_name} 운세 결과</p>
-          <p class="hero-sub">{zodiac_label} · {mbti} · (설 기준 띠년도 {zodiac_year})</p>
+          <p class="hero-sub">{res.zodiac_label} · {res.mbti} · (설 기준 띠년도 {res.zodiac_year})</p>
           <span class="badge">2026 · {APP_VERSION}</span>
         </div>
         """,
         unsafe_allow_html=True
     )
 
-    st.markdown("<div class='result-card'>", unsafe_allow_html=True)
-    st.markdown(f"**🧧 띠 운세**: {zodiac_text}")
-    st.markdown(f"**🧠 MBTI 특징**: {mbti_trait}")
-    st.markdown(f"**🧾 사주 한 마디**: {saju_text}")
-    st.markdown("---")
-    st.markdown(f"**🌞 오늘 운세**: {today_text}")
-    st.markdown(f"**🌙 내일 운세**: {tomorrow_text}")
-    st.markdown("---")
-    st.markdown(f"**📅 2026 전체 운세**: {year_text}")
-    st.markdown("</div>", unsafe_allow_html=True)
+    _md("result_card", "<div class='result-card'>", unsafe_allow_html=True)
+    _md("result_card", f"**🧧 띠 운세**: {res.zodiac_text}")
+    _md("result_card", f"**🧠 MBTI 특징**: {res.mbti_trait}")
+    _md("result_card", f"**🧾 사주 한 마디**: {res.saju_text}")
+    _md("result_card", "---")
+    _md("result_card", f"**🌞 오늘 운세**: {res.today_text}")
+    _md("result_card", f"**🌙 내일 운세**: {res.tomorrow_text}")
+    _md("result_card", "---")
+    _md("result_card", f"**📅 2026 전체 운세**: {res.year_text}")
+    _md("result_card", "</div>", unsafe_allow_html=True)
 
     share_block()
     dananeum_ad_block()
-    tarot_ui(dbs["tarot_db"], birth, name, mbti)
+    tarot_ui(res.tarot)
 
     if st.button("입력 화면으로", use_container_width=True):
         st.session_state.stage = "input"
@@ -1006,13 +798,23 @@ def render_result(dbs):
     if DEBUG_MODE:
         with st.expander("DB 연결 상태(확인용)"):
             st.write(dbs["paths"])
+            st.write(db_watch_status())
+            st.write({"dedup": dedup_stats(dbs), "pools": load_pools(dbs).string_stats})
+        with st.expander("이벤트 로깅 상태(확인용)"):
+            st.write(event_stats() or {"backend": EVENTS_BACKEND})
+            for p in load_pools(dbs).problems:
+                st.warning(p)
+        with st.expander("rerun 페이로드(확인용)"):
+            payload_debug_panel()
+        with st.expander("메모리(확인용)"):
+            memory_debug_panel(dbs)
 
 # =========================================================
 # 11) 실행
 # =========================================================
 
     # === CTA: 미니게임하고 커피쿠폰 받기 (2페이지 맨 아래 강조 버튼) ===
-    st.markdown('''
+    _md("cta", '''
     <div style="margin:24px 0 8px 0; text-align:center;">
       <a href="https://chipper-biscuit-1c9ec3.netlify.app/" target="_blank" style="text-decoration:none;">
         <div style="
@@ -1039,13 +841,32 @@ def render_result(dbs):
     </style>
     ''', unsafe_allow_html=True)
 
+def _gcp_credentials():
+    """Sheets 서비스 계정: st.secrets["gcp_service_account"] (없으면 None → 환경변수/기본 경로).
+    전송 스레드가 처음 연결할 때 1회 호출."""
+    try:
+        return dict(st.secrets["gcp_service_account"])
+    except Exception:  # secrets.toml 없음 / 키 없음
+        return None
+
+start_exporter()  # FORTUNE_METRICS_FILE / FORTUNE_METRICS_PORT (fortune_metrics.py)
+start_event_sink(_gcp_credentials)  # FORTUNE_EVENTS / FORTUNE_EVENTS_SHEET (fortune_events.py)
+if st.session_state.pop("log_share_open", False):
+    emit("share_open", st.session_state.sid)
+inc(RERUNS, st.session_state.stage)
+st.session_state.script_run = True  # tarot_ui 가 fragment 단독 rerun 과 구분
+
 try:
-    dbs = load_all_dbs()
+    with timed(SECTION, "load_dbs"):
+        start_db_watcher()  # data/*.json 변경 시 백그라운드에서 다시 읽고 스냅샷 교체 (fortune_db.py)
+        dbs = load_all_dbs()
 except Exception as e:
     st.error(str(e))
     st.stop()
 
 if st.session_state.stage == "input":
-    render_input(dbs)
+    with timed(SECTION, "render_input"):
+        render_input(dbs)
 else:
-    render_result(dbs)
+    with timed(SECTION, "render_result"):
+        render_result(dbs)
@@ -0,0 +1,339 @@
+# fortune_assets.py
+# - assets/ (타로 이미지, 효과음)을 URL 로 제공 → 타로 HTML 에 base64 를 싣지 않음
+# - URL 은 내용 해시 포함: {base}/{sha256 앞 16자}/{assets/...}
+#   · 내용이 바뀌면 URL 이 바뀌므로 오래 캐시해도 안전
+#   · 재방문 시 브라우저 캐시 적중 → rerun 당 수백 바이트
+# - 전달 방식 (환경변수)
+#   FORTUNE_ASSET_MODE      inline(기본: 기존 data: URI) / url
+#   FORTUNE_ASSET_BASE_URL  브라우저가 볼 URL prefix (CDN / 별도 정적 서버). 비우면(기본)
+#                           Streamlit 정적 제공: static/{해시}/assets/... 에 파일을 두고 상대 URL app/static/...?v={해시}
+#                           · .streamlit/config.toml 의 server.enableStaticServing = true 필요 (꺼져 있으면 inline)
+#                           · Streamlit(tornado StaticFileHandler)은 ?v= 가 있는 요청에만
+#                             Cache-Control: max-age=315360000 (10년) → URL 에 항상 붙임
+#                           · 이미지(png/jpg/gif/webp) 외 확장자(mp3/AVIF)는 text/plain + nosniff 로 오지만
+#                             nosniff 는 script/style 만 막으므로 <audio>/<picture> 는 그대로 재생/표시
+#   FORTUNE_ASSET_CACHE_BYTES  inline 모드 base64 캐시 예산 (기본 32MB, 0 = 캐시 안 함)
+# - 앱 프로세스 안에서 별도 포트를 열지 않음 (serve 는 CLI 로만, 기본 127.0.0.1)
+#
+# 사용:
+#   python fortune_assets.py serve                 # 정적 엔드포인트 단독 실행 (127.0.0.1:8502, 프록시 뒤에 둘 때)
+#   python fortune_assets.py export out/           # 해시 경로 구조로 복사 (CDN 업로드용)
+#   python fortune_assets.py export static/        # Streamlit 정적 제공 폴더를 미리 채움 (없으면 첫 요청 때 채움)
+
+import argparse
+import base64
+import hashlib
+import mimetypes
+import os
+import shutil
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, unquote, urlsplit
+
+ASSET_ROOT = Path("assets")
+ASSET_MODE = os.environ.get("FORTUNE_ASSET_MODE", "inline").strip().lower()
+ASSET_BASE_URL = os.environ.get("FORTUNE_ASSET_BASE_URL", "").strip().rstrip("/")
+ASSET_CACHE_BYTES = int(os.environ.get("FORTUNE_ASSET_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+STATIC_ROOT = Path("static")   # Streamlit 정적 제공 폴더 (app.py 옆)
+STATIC_URL = "app/static"      # 브라우저 기준 상대 URL
+IMAGE_SIGNATURES = (b"\x89PNG", b"\xFF\xD8")  # + WEBP(RIFF) 는 아래에서
+
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+mimetypes.add_type("audio/mpeg", ".mp3")
+
+# =========================================================
+# 1) 내용 해시 (경로 + mtime/size 기준 캐시)
+# =========================================================
+_HASH_LOCK = threading.Lock()
+_HASHES = {}  # 경로 -> ((mtime_ns, size), hash)
+
+def content_hash(path) -> str | None:
+    p = str(path)
+    try:
+        stt = os.stat(p)
+    except OSError:
+        return None
+    sig = (stt.st_mtime_ns, stt.st_size)
+    ent = _HASHES.get(p)
+    if ent is not None and ent[0] == sig:
+        return ent[1]
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()[:16]
+    with _HASH_LOCK:
+        _HASHES[p] = (sig, digest)
+    return digest
+
+def is_image_file(path) -> bool:
+    """앞 12바이트 시그니처로 이미지(PNG/JPG/WEBP) 판별 (파일 전체를 읽지 않음)."""
+    try:
+        with open(path, "rb") as f:
+            sig = f.read(12)
+    except OSError:
+        return False
+    if len(sig) < 12:
+        return False
+    return sig.startswith(IMAGE_SIGNATURES) or sig[0:4] == b"RIFF"
+
+def _asset_relpath(path) -> str | None:
+    """assets/ 아래 파일이면 'assets/...' 형태 상대경로, 아니면 None."""
+    try:
+        rel = Path(os.path.realpath(path)).relative_to(Path(os.path.realpath(ASSET_ROOT)))
+    except ValueError:
+        return None
+    return (ASSET_ROOT / rel).as_posix()
+
+def asset_url(path, image: bool = False) -> str | None:
+    """assets/ 파일의 내용 해시 URL. None 이면 호출자가 inline(data: URI)으로.
+
+    - 없거나 (image=True 인데) 이미지가 아님
+    - FORTUNE_ASSET_BASE_URL 없이: 정적 제공이 꺼져 있거나 static/ 에 쓸 수 없음
+    """
+    if path is None or not Path(path).is_file():
+        return None
+    if image and not is_image_file(path):
+        return None
+    rel = _asset_relpath(path)
+    digest = content_hash(path)
+    if rel is None or digest is None:
+        return None
+    if ASSET_BASE_URL:
+        return f"{ASSET_BASE_URL}/{digest}/{quote(rel)}"
+    if not static_serving_enabled() or not _publish_static(path, rel, digest):
+        return None
+    # ?v= : tornado 가 이 인자가 있을 때만 장기 캐시 헤더를 붙임 (경로에 이미 해시가 있어 값은 같은 해시)
+    return f"{STATIC_URL}/{digest}/{quote(rel)}?v={digest}"
+
+# =========================================================
+# 1-1) Streamlit 정적 제공 (static/{해시}/assets/...)
+# =========================================================
+_PUBLISHED = set()  # (대상 폴더, 해시, 상대경로)
+_PUBLISH_LOCK = threading.Lock()
+_STATIC_ON = None
+
+def static_serving_enabled() -> bool:
+    """server.enableStaticServing (프로세스당 1회 확인, Streamlit 밖이면 False)."""
+    global _STATIC_ON
+    if _STATIC_ON is None:
+        try:
+            from streamlit import config
+
+            _STATIC_ON = bool(config.get_option("server.enableStaticServing"))
+        except Exception:
+            _STATIC_ON = False
+        if not _STATIC_ON:
+            print("fortune_assets: FORTUNE_ASSET_MODE=url 인데 FORTUNE_ASSET_BASE_URL 도 없고 "
+                  "server.enableStaticServing 도 꺼져 있어 inline 으로 보냅니다.", file=sys.stderr)
+    return _STATIC_ON
+
+def _publish_static(path, rel: str, digest: str, root: Path = STATIC_ROOT) -> bool:
+    """static/{해시}/{rel} 에 파일을 둠 (하드링크, 안 되면 복사). 이미 있으면 그대로."""
+    key = (str(root), digest, rel)
+    if key in _PUBLISHED:
+        return True
+    dst = root / digest / rel
+    with _PUBLISH_LOCK:
+        if key in _PUBLISHED:
+            return True
+        try:
+            if not dst.is_file():
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                tmp = dst.with_name(f"{dst.name}.{os.getpid()}.tmp")
+                try:
+                    os.link(path, tmp)
+                except OSError:
+                    shutil.copy2(path, tmp)
+                os.replace(tmp, dst)  # 다른 워커와 동시에 써도 완성된 파일만 보임
+        except OSError:
+            return False  # 읽기 전용 배포 환경 등 → inline
+        _PUBLISHED.add(key)
+    return True
+
+# =========================================================
+# 1-2) base64 캐시 (inline 모드: 세션/rerun 마다 디스크 읽기 + 인코딩 X)
+# =========================================================
+class AssetB64Cache:
+    """경로 → base64 문자열 LRU. (mtime_ns, size) 가 바뀌면 다시 읽음. 스레드 안전."""
+
+    def __init__(self, max_bytes: int = ASSET_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # (경로, image) -> ((mtime_ns, size), b64 | None)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path, image: bool = False) -> str | None:
+        """파일의 base64 (없음/빈 파일/image=True 인데 이미지 아님 → None)."""
+        p = str(path)
+        try:
+            stt = os.stat(p)
+        except OSError:
+            return None
+        sig = (stt.st_mtime_ns, stt.st_size)
+        key = (p, image)
+        with self._lock:
+            ent = self._data.get(key)
+            if ent is not None and ent[0] == sig:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return ent[1]
+            self.misses += 1
+
+        b64 = self._read(p, image)
+        nbytes = len(b64) if b64 else 0
+        if nbytes > self.max_bytes:
+            return b64  # 예산보다 큰 파일은 캐시하지 않음
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1]) if old[1] else 0
+            self._data[key] = (sig, b64)
+            self._bytes += nbytes
+            while self._data and self._bytes > self.max_bytes:
+                _, (_, v) = self._data.popitem(last=False)
+                self._bytes -= len(v) if v else 0
+                self.evictions += 1
+        return b64
+
+    @staticmethod
+    def _read(p: str, image: bool) -> str | None:
+        if image and not is_image_file(p):
+            return None
+        try:
+            with open(p, "rb") as f:
+                b = f.read()
+        except OSError:
+            return None
+        if not b:
+            return None
+        return base64.b64encode(b).decode("ascii")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def entries(self) -> list[dict]:
+        """캐시 항목별 크기 (오래된 것부터)."""
+        with self._lock:
+            return [
+                {"path": p, "image": image, "bytes": sys.getsizeof(v) if v else 0}
+                for (p, image), (_, v) in self._data.items()
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+_B64_CACHE = AssetB64Cache()
+
+def asset_b64(path, image: bool = False) -> str | None:
+    """프로세스 전역 캐시 경유 base64 (app.py read_file_b64/read_image_b64 용)."""
+    return _B64_CACHE.get(path, image)
+
+def asset_cache_stats() -> dict:
+    return _B64_CACHE.stats()
+
+def asset_cache_entries() -> list[dict]:
+    return _B64_CACHE.entries()
+
+# =========================================================
+# 2) 단독 정적 엔드포인트 (CLI serve 전용 — 리버스 프록시 뒤에서 FORTUNE_ASSET_BASE_URL 로 지정)
+# =========================================================
+class _AssetHandler(BaseHTTPRequestHandler):
+    server_version = "fortune-assets"
+
+    def do_HEAD(self):
+        self._serve(body=False)
+
+    def do_GET(self):
+        self._serve(body=True)
+
+    def _serve(self, body: bool):
+        parts = unquote(urlsplit(self.path).path).lstrip("/").split("/", 1)
+        if len(parts) != 2:
+            return self.send_error(404)
+        digest, rel = parts
+        fp = Path(rel)
+        # assets/ 밖(../ 등) 접근 차단 + 해시가 현재 내용과 같을 때만 (immutable 캐시 오염 방지)
+        if _asset_relpath(fp) != rel or not fp.is_file() or content_hash(fp) != digest:
+            return self.send_error(404)
+
+        etag = f'"{digest}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", CACHE_CONTROL)
+            self.end_headers()
+            return
+
+        size = fp.stat().st_size
+        self.send_response(200)
+        self.send_header("Content-Type", mimetypes.guess_type(fp.name)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.send_header("ETag", etag)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        if body:
+            with open(fp, "rb") as f:
+                shutil.copyfileobj(f, self.wfile)
+
+    def log_message(self, format, *args):
+        pass
+
+# =========================================================
+# 3) CLI
+# =========================================================
+def export_assets(out_dir) -> int:
+    """assets/ 전체를 {out}/{hash}/assets/... 구조로 복사. 복사한 파일 수 반환."""
+    out_dir = Path(out_dir)
+    n = 0
+    for fp in sorted(ASSET_ROOT.rglob("*")):
+        if not fp.is_file():
+            continue
+        if not _publish_static(fp, fp.as_posix(), content_hash(fp), out_dir):
+            raise OSError(f"복사 실패: {fp} → {out_dir}")
+        n += 1
+    return n
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="assets/ 정적 제공 (내용 해시 URL)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("serve", help="정적 엔드포인트 실행")
+    s.add_argument("--host", default="127.0.0.1", help="바인드 주소 (외부 공개는 프록시 뒤에서)")
+    s.add_argument("--port", type=int, default=8502)
+    e = sub.add_parser("export", help="해시 경로 구조로 복사")
+    e.add_argument("out")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "export":
+        print(f"exported {export_assets(args.out)} files → {args.out}")
+        return 0
+    srv = ThreadingHTTPServer((args.host, args.port), _AssetHandler)
+    print(f"serving {ASSET_ROOT}/ on {args.host}:{args.port}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
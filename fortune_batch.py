@@ -0,0 +1,297 @@
+# fortune_batch.py
+# - 전체 사용자 운세 일괄 생성 (푸시 알림용 사전 계산)
+# - 입력 CSV/JSONL 을 스트리밍으로 읽어 프로세스 풀에 청크 단위로 분배
+#   · 워커는 시작 시 DB/풀 팩을 1회만 로드
+#   · 청크의 올바른 행은 compute_fortunes 로 한 번에 (pick seed 를 배열로 유도)
+#   · 동시에 떠 있는 청크 수를 제한 → 입력이 수백만 줄이어도 메모리 일정
+# - 결과는 입력 순서대로 바로바로 기록 (JSONL 또는 CSV)
+# - 결과 = compute_fortune() = 화면(render_result)에 나오는 내용 그대로
+#
+# 사용:
+#   python fortune_batch.py users.csv -o out.jsonl --date 2026-01-01 --workers 8
+#   python fortune_batch.py users.jsonl -o out.jsonl --offset 1200000 --append   # 중단 지점부터 이어서
+#
+# 입력 컬럼: name, birth(YYYY-MM-DD 또는 YYYYMMDD), mbti
+
+import argparse
+import csv
+import io
+import json
+import multiprocessing as mp
+import sys
+import time
+from collections import deque
+from datetime import date
+from itertools import islice
+from typing import NamedTuple
+
+from fortune_db import load_all_dbs
+from fortune_engine import compute_fortune, compute_fortunes
+from fortune_metrics import set_enabled as set_metrics_enabled
+from fortune_pack import load_pools
+from fortune_schema import MBTI_TYPES
+from fortune_select import SEED_MODES
+
+OUTPUT_FIELDS = [
+    "row", "name", "birth", "mbti", "date",
+    "zodiac_key", "zodiac_label", "zodiac_year",
+    "zodiac", "mbti_trait", "saju", "today", "tomorrow", "year",
+    "tarot_name", "tarot_meaning", "tarot_image",
+    "error",
+]
+
+# =========================================================
+# 1) 입력
+# =========================================================
+def parse_birth(v) -> date:
+    s = str(v or "").strip()
+    if len(s) == 8 and s.isdigit():
+        return date(int(s[:4]), int(s[4:6]), int(s[6:]))
+    return date.fromisoformat(s)
+
+class BadRow(NamedTuple):
+    """읽기 단계에서 이미 잘못된 행 (JSON 파싱 실패 등) → 출력에 error 행으로."""
+    error: str
+
+def iter_rows(fp, fmt: str):
+    """입력 행(dict, 잘못된 줄은 BadRow)을 하나씩. fmt: csv / jsonl"""
+    if fmt == "csv":
+        yield from csv.DictReader(fp)
+        return
+    for line in fp:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield BadRow(f"JSON 파싱 실패: {e}")
+
+def _detect_format(path: str, fmt: str | None) -> str:
+    if fmt:
+        return fmt
+    return "jsonl" if path.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+# =========================================================
+# 2) 워커
+# =========================================================
+_DBS = None
+
+def _init_worker():
+    global _DBS
+    set_metrics_enabled(False)  # 화면 구간 계측 불필요 (진행률은 _Progress 가 보고)
+    _DBS = load_all_dbs()
+    load_pools(_DBS)
+
+def _text_field(raw: dict, key: str) -> str:
+    v = raw.get(key)
+    if v is None:
+        return ""
+    if not isinstance(v, str):
+        raise TypeError(f"{key} 는 문자열이어야 합니다: {v!r}")
+    return v
+
+def parse_user(raw) -> tuple[date, str, str]:
+    """입력 1행 → (birth, name, mbti). 잘못된 행은 TypeError/ValueError."""
+    if isinstance(raw, BadRow):
+        raise ValueError(raw.error)
+    if not isinstance(raw, dict):
+        raise TypeError(f"행이 객체가 아닙니다: {type(raw).__name__}")
+    birth = raw.get("birth")
+    if not isinstance(birth, (str, int)):
+        raise TypeError(f"birth 는 YYYY-MM-DD 또는 YYYYMMDD 여야 합니다: {birth!r}")
+    birth = parse_birth(birth)
+    name = _text_field(raw, "name")
+    mbti = (_text_field(raw, "mbti") or "ENFP").strip().upper()
+    if mbti not in MBTI_TYPES:
+        raise ValueError(f"알 수 없는 MBTI: {mbti}")
+    return birth, name, mbti
+
+def _raw_user(raw) -> dict:
+    """error 행에 남길 입력값 (객체가 아닌 행은 없음)."""
+    if not isinstance(raw, dict):
+        return {}
+    return {"name": raw.get("name"), "birth": raw.get("birth"), "mbti": raw.get("mbti")}
+
+def result_record(row_no: int, raw, on_date: date, seed_mode: str | None = None, res=None) -> dict:
+    """입력 1행 → 출력 레코드. 잘못된 행은 예외 대신 error 만 채운 레코드 (배치 전체가 멈추지 않게).
+
+    res: 이미 계산한 결과 (compute_fortunes) — 없으면 여기서 compute_fortune
+    """
+    rec = {"row": row_no, "date": str(on_date)}
+    try:
+        if res is None:
+            res = compute_fortune(*parse_user(raw), on_date, _DBS, seed_mode)
+    except (TypeError, ValueError) as e:
+        rec.update(_raw_user(raw), error=str(e))
+        return rec
+    except Exception as e:  # 예상 못 한 입력도 그 행만 error
+        rec.update(_raw_user(raw), error=f"{type(e).__name__}: {e}")
+        return rec
+    rec.update(
+        name=res.name,
+        birth=str(res.birth),
+        mbti=res.mbti,
+        zodiac_key=res.zodiac_key,
+        zodiac_label=res.zodiac_label,
+        zodiac_year=res.zodiac_year,
+        zodiac=res.zodiac_text,
+        mbti_trait=res.mbti_trait,
+        saju=res.saju_text,
+        today=res.today_text,
+        tomorrow=res.tomorrow_text,
+        year=res.year_text,
+        tarot_name=res.tarot.name if res.tarot else None,
+        tarot_meaning=res.tarot.meaning if res.tarot else None,
+        tarot_image=res.tarot.image if res.tarot else None,
+    )
+    return rec
+
+def _run_chunk(args) -> tuple[int, str]:
+    """(시작 행 번호, 행 목록, 날짜, 출력 형식, seed 방식) → (행 수, 직렬화된 텍스트). 직렬화도 워커에서."""
+    start, rows, on_date, out_fmt, seed_mode = args
+    if _DBS is None:
+        _init_worker()
+    # 올바른 행은 한 번에 (seed 유도를 사용자끼리 공유), 잘못된 행은 result_record 가 error 행으로
+    ok = {}
+    for i, raw in enumerate(rows):
+        try:
+            ok[i] = parse_user(raw)
+        except (TypeError, ValueError):
+            pass
+    try:
+        results = dict(zip(ok, compute_fortunes(ok.values(), on_date, _DBS, seed_mode)))
+    except Exception:  # 어느 행 때문인지 모름 → 행마다 다시 계산해서 그 행만 error
+        results = {}
+    recs = [result_record(start + i, raw, on_date, seed_mode, results.get(i)) for i, raw in enumerate(rows)]
+    if out_fmt == "csv":
+        buf = io.StringIO()
+        w = csv.DictWriter(buf, fieldnames=OUTPUT_FIELDS, extrasaction="ignore", lineterminator="\n")
+        w.writerows(recs)
+        return len(recs), buf.getvalue()
+    return len(recs), "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in recs)
+
+# =========================================================
+# 3) 실행 (청크 스트리밍 + 진행률)
+# =========================================================
+def _chunks(rows, start: int, size: int):
+    n = start
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield n, chunk
+        n += len(chunk)
+
+class _Progress:
+    def __init__(self, offset: int, every: float, out=sys.stderr):
+        self.offset = offset
+        self.every = every
+        self.out = out
+        self.done = 0
+        self.t0 = self.last = time.monotonic()
+
+    def add(self, n: int):
+        self.done += n
+        now = time.monotonic()
+        if self.every and now - self.last >= self.every:
+            self.last = now
+            self.report()
+
+    def rate(self) -> float:
+        dt = time.monotonic() - self.t0
+        return self.done / dt if dt > 0 else 0.0
+
+    def report(self, final: bool = False):
+        tag = "done" if final else "progress"
+        print(
+            f"[{tag}] rows={self.done:,} rows/sec={self.rate():,.0f} next_offset={self.offset + self.done}",
+            file=self.out, flush=True,
+        )
+
+def _is_empty_output(out) -> bool:
+    """새 파일/빈 파일이면 True (CSV 헤더 여부). 위치를 알 수 없는 스트림(파이프 등)은 새 출력으로 봄."""
+    try:
+        return out.tell() == 0
+    except (OSError, ValueError):
+        return True
+
+def run_batch(rows, out, on_date: date, *, workers: int, chunk_size: int, offset: int,
+              out_fmt: str = "jsonl", progress_every: float = 5.0, seed_mode: str | None = None) -> int:
+    """rows(입력 dict 이터레이터, offset 만큼은 이미 건너뛴 상태) → out 에 기록. 처리한 행 수 반환."""
+    prog = _Progress(offset, progress_every)
+    tasks = ((start, chunk, on_date, out_fmt, seed_mode) for start, chunk in _chunks(rows, offset, chunk_size))
+
+    # 헤더는 offset/--append 가 아니라 출력이 비어 있는지로 (이어 쓰기에 헤더 중복 X, 새 파일엔 항상)
+    if out_fmt == "csv" and _is_empty_output(out):
+        csv.DictWriter(out, fieldnames=OUTPUT_FIELDS, lineterminator="\n").writeheader()
+
+    try:
+        if workers <= 0:
+            _init_worker()
+            for t in tasks:
+                n, text = _run_chunk(t)
+                out.write(text)
+                prog.add(n)
+        else:
+            # 부모에서 먼저 풀 팩을 최신화 → 워커들은 완성된 팩만 mmap
+            load_pools(load_all_dbs())
+            with mp.Pool(workers, initializer=_init_worker) as pool:
+                pending = deque()
+                max_pending = workers * 2
+                for t in tasks:
+                    pending.append(pool.apply_async(_run_chunk, (t,)))
+                    if len(pending) >= max_pending:
+                        n, text = pending.popleft().get()
+                        out.write(text)
+                        prog.add(n)
+                while pending:
+                    n, text = pending.popleft().get()
+                    out.write(text)
+                    prog.add(n)
+    finally:
+        out.flush()
+        prog.report(final=True)
+    return prog.done
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="운세 결과 일괄 생성 (CSV/JSONL 스트리밍)")
+    ap.add_argument("input", help="입력 파일 (- 이면 stdin)")
+    ap.add_argument("-o", "--output", default="-", help="출력 파일 (기본 stdout)")
+    ap.add_argument("--input-format", choices=["csv", "jsonl"])
+    ap.add_argument("--output-format", choices=["csv", "jsonl"], default="jsonl")
+    ap.add_argument("--date", type=date.fromisoformat, default=None, help="기준 날짜 (기본: 오늘)")
+    ap.add_argument("--workers", type=int, default=mp.cpu_count(), help="프로세스 수 (0 = 현재 프로세스에서)")
+    ap.add_argument("--chunk-size", type=int, default=2000)
+    ap.add_argument("--offset", type=int, default=0, help="입력 앞쪽 N행 건너뛰기 (이어서 실행)")
+    ap.add_argument("--append", action="store_true", help="출력 파일에 이어 쓰기")
+    ap.add_argument("--seed-mode", choices=list(SEED_MODES), default=None,
+                    help="pick seed 방식 (기본: FORTUNE_SEED_MODE 환경변수, 없으면 compat)")
+    ap.add_argument("--progress-every", type=float, default=5.0, help="진행률 출력 간격(초), 0 = 끔")
+    args = ap.parse_args(argv)
+
+    on_date = args.date or date.today()
+    fmt = _detect_format(args.input, args.input_format)
+    fin = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8", newline="")
+    fout = sys.stdout if args.output == "-" else open(
+        args.output, "a" if args.append else "w", encoding="utf-8", newline=""
+    )
+    try:
+        rows = islice(iter_rows(fin, fmt), args.offset, None)
+        run_batch(
+            rows, fout, on_date,
+            workers=args.workers, chunk_size=args.chunk_size, offset=args.offset,
+            out_fmt=args.output_format, progress_every=args.progress_every, seed_mode=args.seed_mode,
+        )
+    except KeyboardInterrupt:
+        # 진행률의 next_offset 으로 --offset/--append 재실행
+        return 130
+    finally:
+        if fin is not sys.stdin:
+            fin.close()
+        if fout is not sys.stdout:
+            fout.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
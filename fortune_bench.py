@@ -0,0 +1,379 @@
+# fortune_bench.py
+# - 핫패스 벤치마크: 실제 data/ + 풀을 10x/100x/1000x 로 늘린 합성 데이터
+#   · load_all_dbs (cold/warm), 풀 정리(build_pools), normalize_zodiac_text
+#   · stable_seed / pick_one / derive_seeds(_many), get_tarot_of_day, compute_fortune(s)
+#   · read_image_b64 (cold/warm), render_result 전체(Streamlit AppTest, headless)
+# - 배율마다 임시 작업 폴더(data/ 생성 + assets 링크)에서 새 프로세스로 실행
+#   → 프로세스 전역 캐시/풀 팩이 배율끼리 섞이지 않고, 저장소의 data/pools.pack 도 건드리지 않음
+# - 결과는 JSON (초/회: min/median/mean/p95) → compare 로 기준 결과와 비교 (회귀면 exit 1)
+#
+# 사용:
+#   python fortune_bench.py run -o bench.json                       # 1x,10x,100x,1000x
+#   python fortune_bench.py run -o bench.json --scales 1,10 --skip-render
+#   python fortune_bench.py run -o bench.json --max-data-mb 512     # 작은 머신: 1000x(≈2GB) 건너뜀
+#   ※ 1000x 는 작업 폴더에 ≈2GB, 워커 프로세스가 그 JSON 을 파싱하므로 메모리도 수 GB 필요
+#   python fortune_bench.py compare bench_base.json bench.json --threshold 0.10
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+DEFAULT_SCALES = (1, 10, 100, 1000)
+BENCH_VERSION = 1
+
+# =========================================================
+# 1) 합성 데이터 (풀 문장 / 타로 카드를 scale 배로)
+# - 배율 결과를 메모리에 만들지 않고 파일로 바로 씀 (1000x ≈ 2GB 도 부모 프로세스 메모리 일정)
+# =========================================================
+def _scaled_items(x: list, scale: int, deck: bool):
+    """리스트 1개의 scale 배 항목. 문자열 리스트는 2번째부터 ' · k' 접미사, 타로 카드는 key/id 접미사."""
+    if x and all(isinstance(v, str) for v in x):
+        return (v if k == 0 else f"{v} · {k}" for k in range(scale) for v in x)
+    if deck and x and all(isinstance(v, dict) and ("image" in v or "img" in v) for v in x):
+        def cards():
+            for k in range(scale):
+                for v in x:
+                    c = dict(v)
+                    if k and "key" in c:
+                        c["key"] = f"{c['key']}_{k}"
+                    if k and "id" in c:
+                        c["id"] = f"{c['id']}_{k}"
+                    yield c
+        return cards()
+    return None
+
+def dump_scaled(x, f, scale: int, deck: bool = False):
+    """json.dump(배율 적용한 x, f, ensure_ascii=False) 와 같은 출력을 스트리밍으로."""
+    if isinstance(x, dict):
+        f.write("{")
+        for i, (k, v) in enumerate(x.items()):
+            f.write(", " if i else "")
+            f.write(json.dumps(k, ensure_ascii=False) + ": ")
+            dump_scaled(v, f, scale, deck)
+        f.write("}")
+        return
+    if isinstance(x, list):
+        items = _scaled_items(x, scale, deck)
+        f.write("[")
+        if items is None:
+            for i, v in enumerate(x):
+                f.write(", " if i else "")
+                dump_scaled(v, f, scale, deck)
+        else:
+            for i, v in enumerate(items):
+                f.write(", " if i else "")
+                f.write(json.dumps(v, ensure_ascii=False))
+        f.write("]")
+        return
+    f.write(json.dumps(x, ensure_ascii=False))
+
+def _source_files() -> dict:
+    """DB 키 → 실제로 쓰이는 원본 파일(후보 중 첫 번째로 있는 것)."""
+    from fortune_db import DB_CANDIDATES
+
+    out = {}
+    for key, (_, cands) in DB_CANDIDATES.items():
+        for c in cands:
+            if (REPO_DIR / c).is_file():
+                out[key] = c
+                break
+    return out
+
+def estimate_bytes(scale: int) -> int:
+    return sum((REPO_DIR / p).stat().st_size for p in _source_files().values()) * scale
+
+def make_workdir(scale: int, root: Path) -> Path:
+    """root/x{scale}/ 에 data/(scale 배) + assets 링크 생성."""
+    wd = root / f"x{scale}"
+    (wd / "data").mkdir(parents=True, exist_ok=True)
+    for key, rel in _source_files().items():
+        dst = wd / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        if scale == 1 or key == "lunar_lny":
+            shutil.copyfile(REPO_DIR / rel, dst)
+            continue
+        with open(REPO_DIR / rel, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with open(dst, "w", encoding="utf-8", buffering=1 << 20) as f:
+            dump_scaled(data, f, scale, deck=(key == "tarot_db"))
+    if not (wd / "assets").exists():
+        os.symlink(REPO_DIR / "assets", wd / "assets")
+    return wd
+
+# =========================================================
+# 2) 측정
+# =========================================================
+def _measure(fn, number: int, repeat: int) -> dict:
+    """fn 을 number 번씩 repeat 회 → 1회당 초."""
+    per_op = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_op.append((time.perf_counter() - t0) / number)
+    per_op.sort()
+    p95 = per_op[min(len(per_op) - 1, int(round(0.95 * (len(per_op) - 1))))]
+    return {
+        "unit": "s/op",
+        "number": number,
+        "repeat": repeat,
+        "min": per_op[0],
+        "median": statistics.median(per_op),
+        "mean": statistics.fmean(per_op),
+        "p95": p95,
+    }
+
+def _users(n: int):
+    mbtis = ("INTJ", "ENFP", "ISTP", "ESFJ")
+    for i in range(n):
+        yield date(1950, 1, 1) + timedelta(days=(i * 137) % 25000), f"user{i}", mbtis[i % 4]
+
+def run_benchmarks(scale: int, repeat: int, skip_render: bool) -> dict:
+    """현재 작업 폴더(data/, assets/)에서 벤치마크 실행."""
+    import fortune_db
+    import fortune_metrics
+    from fortune_assets import AssetB64Cache
+    from fortune_db import load_all_dbs
+    from fortune_engine import (
+        compute_fortune, compute_fortunes, get_tarot_of_day, lny_table, pick_one, stable_seed, zodiac_by_birth, zodiac_by_birth_many,
+    )
+    from fortune_pack import build_pools, load_pools
+    from fortune_schema import resolve_schema, zodiac_pool_name
+    from fortune_select import derive_seeds, derive_seeds_many
+    from fortune_text import ZODIAC_ORDER, normalize_zodiac_text
+
+    fortune_metrics.set_enabled(False)
+    res = {}
+    on_date = date(2026, 1, 1)
+
+    def cold_load():
+        fortune_db._ENTRIES.clear()
+        fortune_db._SNAPSHOT = None
+        return load_all_dbs()
+
+    res["load_all_dbs.cold"] = _measure(cold_load, 1, max(1, repeat // 2) if scale >= 100 else repeat)
+    dbs = cold_load()
+    res["load_all_dbs.warm"] = _measure(load_all_dbs, 2000, repeat)
+
+    res["build_pools"] = _measure(lambda: build_pools(dbs), 1, max(1, repeat // 2) if scale >= 100 else repeat)
+    t0 = time.perf_counter()
+    load_pools(dbs)
+    res["load_pools.first"] = {"unit": "s/op", "number": 1, "repeat": 1, "median": time.perf_counter() - t0}
+
+    schema = resolve_schema(dbs)
+    lines = [s for zk in ZODIAC_ORDER for s in schema.pools[zodiac_pool_name(zk)][0] if isinstance(s, str)]
+    sample = lines[:5000]
+    if sample:
+        res["normalize_zodiac_text"] = _measure(lambda: [normalize_zodiac_text(s) for s in sample], 1, repeat)
+        res["normalize_zodiac_text"]["lines"] = len(sample)
+
+    res["stable_seed"] = _measure(lambda: stable_seed("1990-01-20", "홍길동", "INTJ"), 20000, repeat)
+    pool = load_pools(dbs).daily_pool("today")
+    res["pick_one"] = _measure(lambda: pick_one(pool, 123456789), 20000, repeat)
+    res["derive_seeds.compat"] = _measure(lambda: derive_seeds("1990-01-20", "홍길동", "INTJ", on_date, "compat"), 5000, repeat)
+    res["derive_seeds.v2"] = _measure(lambda: derive_seeds("1990-01-20", "홍길동", "INTJ", on_date, "v2"), 5000, repeat)
+    many = list(_users(2000))
+    for mode in ("compat", "v2"):
+        res[f"derive_seeds_many.{mode}"] = _measure(lambda: derive_seeds_many(many, (on_date,), mode), 1, repeat)
+        res[f"derive_seeds_many.{mode}"]["users"] = len(many)
+
+    t0 = time.perf_counter()
+    get_tarot_of_day(dbs["tarot_db"], 1, on_date)
+    res["get_tarot_of_day.first"] = {"unit": "s/op", "number": 1, "repeat": 1, "median": time.perf_counter() - t0}
+    res["get_tarot_of_day"] = _measure(lambda: get_tarot_of_day(dbs["tarot_db"], 123456789, on_date), 5000, repeat)
+
+    users = list(_users(2000))
+    it = iter(())
+
+    def one_fortune():
+        nonlocal it
+        u = next(it, None)
+        if u is None:
+            it = iter(users)
+            u = next(it)
+        compute_fortune(u[0], u[1], u[2], on_date, dbs)
+
+    res["compute_fortune"] = _measure(one_fortune, 2000, repeat)
+    res["compute_fortunes"] = _measure(lambda: compute_fortunes(users, on_date, dbs), 1, repeat)
+    res["compute_fortunes"]["users"] = len(users)
+
+    lny = lny_table(dbs["lunar_lny"])
+    births = [u[0] for u in _users(100_000)]
+    res["zodiac_by_birth"] = _measure(lambda: [zodiac_by_birth(d, lny) for d in births], 1, repeat)
+    res["zodiac_by_birth_many"] = _measure(lambda: zodiac_by_birth_many(births, lny), 1, repeat)
+    res["zodiac_by_birth"]["dates"] = res["zodiac_by_birth_many"]["dates"] = len(births)
+
+    img = Path("assets/tarot/back.png")
+    if img.is_file():
+        res["read_image_b64.cold"] = _measure(lambda: AssetB64Cache().get(img, image=True), 20, repeat)
+        warm = AssetB64Cache()
+        warm.get(img, image=True)
+        res["read_image_b64.warm"] = _measure(lambda: warm.get(img, image=True), 5000, repeat)
+
+    res["render_result"] = _bench_render(repeat) if not skip_render else {"skipped": "--skip-render"}
+    return res
+
+def _bench_render(repeat: int) -> dict:
+    """headless render_result 1회 (AppTest, 결과 화면 + 타로 공개 fragment rerun 포함).
+
+    DB/풀 팩/에셋 같은 프로세스 전역 캐시는 워밍업으로 채우고, 결과 캐시(fortune_cache)는 매회 비움
+    → 사용자의 첫 결과 화면(결과 계산 포함) 기준.
+    """
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError as e:
+        return {"skipped": f"streamlit 없음: {e}"}
+    from fortune_cache import get_result_cache
+
+    def once():
+        get_result_cache().clear()
+        at = AppTest.from_file(str(REPO_DIR / "app.py"), default_timeout=120)
+        at.session_state.stage = "result"
+        at.session_state.name = "홍길동"
+        at.session_state.birth = date(1990, 1, 20)
+        at.session_state.mbti = "INTJ"
+        at.run()
+        if not at.exception:
+            at.button(key="btn_tarot_draw").click().run()
+        if at.exception:
+            raise RuntimeError(str(at.exception))
+
+    once()  # 프로세스 전역 캐시 채우기
+    return dict(_measure(once, 1, repeat), result_cache="cold")
+
+# =========================================================
+# 3) 실행 / 비교
+# =========================================================
+def _git_rev() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_all(scales, repeat: int, skip_render: bool, max_data_mb: float, keep: bool = False) -> dict:
+    report = {
+        "version": BENCH_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": _git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scales": {},
+    }
+    root = Path(tempfile.mkdtemp(prefix="fortune-bench-"))
+    try:
+        for scale in scales:
+            est = estimate_bytes(scale)
+            skip = None
+            if est > max_data_mb * 1024 * 1024:
+                skip = f"예상 데이터 {est / 1e6:,.0f}MB > --max-data-mb {max_data_mb:g}"
+            elif est > shutil.disk_usage(root).free:
+                skip = f"예상 데이터 {est / 1e6:,.0f}MB > 임시 폴더 여유 공간"
+            if skip:
+                report["scales"][str(scale)] = {"skipped": skip}
+                print(f"[x{scale}] skipped: {skip}", file=sys.stderr)
+                continue
+            wd = make_workdir(scale, root)
+            out = wd / "result.json"
+            print(f"[x{scale}] running in {wd}", file=sys.stderr, flush=True)
+            env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(REPO_DIR), os.environ.get("PYTHONPATH", "")]))
+            cmd = [sys.executable, str(REPO_DIR / "fortune_bench.py"), "_worker",
+                   "--scale", str(scale), "--repeat", str(repeat), "--out", str(out)]
+            if skip_render:
+                cmd.append("--skip-render")
+            proc = subprocess.run(cmd, cwd=wd, env=env)
+            if proc.returncode != 0:
+                report["scales"][str(scale)] = {"error": f"worker exit {proc.returncode}"}
+                continue
+            with open(out, "r", encoding="utf-8") as f:
+                report["scales"][str(scale)] = json.load(f)
+            if not keep:
+                shutil.rmtree(wd, ignore_errors=True)
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+    return report
+
+def compare(base: dict, new: dict, threshold: float, out=sys.stdout) -> list[tuple]:
+    """median 기준 비교. (배율, 이름, 기준, 새 값, 비율) 중 회귀 목록 반환."""
+    regressions = []
+    print(f"{'scale':>6}  {'benchmark':<26} {'base':>12} {'new':>12} {'ratio':>7}", file=out)
+    for scale, results in new.get("scales", {}).items():
+        base_results = base.get("scales", {}).get(scale, {})
+        for name, r in results.items():
+            b = base_results.get(name)
+            if not isinstance(r, dict) or not isinstance(b, dict) or "median" not in r or "median" not in b:
+                continue
+            ratio = r["median"] / b["median"] if b["median"] else float("inf")
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "  REGRESSION"
+                regressions.append((scale, name, b["median"], r["median"], ratio))
+            elif ratio < 1 - threshold:
+                flag = "  faster"
+            print(f"{'x' + scale:>6}  {name:<26} {b['median']:>12.3e} {r['median']:>12.3e} {ratio:>7.2f}{flag}", file=out)
+    return regressions
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="운세 앱 핫패스 벤치마크")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="벤치마크 실행 → JSON")
+    r.add_argument("-o", "--output", default="-", help="결과 JSON (기본 stdout)")
+    r.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)), help="배율 목록 (기본 1,10,100,1000)")
+    r.add_argument("--repeat", type=int, default=5)
+    r.add_argument("--skip-render", action="store_true", help="render_result(AppTest) 생략")
+    r.add_argument("--max-data-mb", type=float, default=4096,
+                   help="합성 data/ 예상 크기가 이보다 크면 그 배율은 건너뜀 (기본 4096: 1000x 포함, 작은 머신은 낮출 것)")
+    r.add_argument("--keep", action="store_true", help="임시 작업 폴더 남기기")
+    c = sub.add_parser("compare", help="기준 결과와 비교 (회귀면 exit 1)")
+    c.add_argument("baseline")
+    c.add_argument("current")
+    c.add_argument("--threshold", type=float, default=0.10, help="허용 비율 (기본 0.10 = 10%% 느려짐까지)")
+    w = sub.add_parser("_worker")
+    w.add_argument("--scale", type=int, required=True)
+    w.add_argument("--repeat", type=int, default=5)
+    w.add_argument("--out", required=True)
+    w.add_argument("--skip-render", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "_worker":
+        res = run_benchmarks(args.scale, args.repeat, args.skip_render)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(res, f, ensure_ascii=False, indent=1)
+        return 0
+
+    if args.cmd == "compare":
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.current, "r", encoding="utf-8") as f:
+            new = json.load(f)
+        regressions = compare(base, new, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) > {args.threshold:.0%}", file=sys.stderr)
+            return 1
+        return 0
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    report = run_all(scales, args.repeat, args.skip_render, args.max_data_mb, args.keep)
+    text = json.dumps(report, ensure_ascii=False, indent=1)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+# fortune_cache.py
+# - 사용자별 "오늘 결과" 캐시: 같은 (생일+이름+MBTI, 날짜) 는 결과가 항상 같으므로 재계산 X
+# - 키: (seed 방식, base_seed, 날짜)  ※ 적중 시 사용자 정보까지 비교 (48bit seed 충돌 대비)
+# - LRU 축출: 항목 수 / 바이트 예산 (환경변수로 설정)
+# - date.today() 가 바뀌면 지난 날짜 항목은 모두 만료
+# - 자정 직전(warm_ahead 초 전)에 최근 사용자들의 "내일" 결과를 미리 계산
+#   → 자정 직후 몰리는 요청이 캐시 미스 폭주가 되지 않게
+#   · 예열 예산(항목 수/바이트의 warm_share, 기본 절반)까지: 캐시가 꽉 차 있으면 오늘 항목 중
+#     가장 오래 안 쓰인 것부터 밀어내고 내일 항목을 넣음 (예열 대상인 최근 사용자의 오늘 항목은 남음)
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time as dtime, timedelta
+
+from fortune_db import load_all_dbs
+from fortune_engine import compute_fortune, normalize_user, stable_seed
+from fortune_select import DEFAULT_SEED_MODE
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("FORTUNE_RESULT_CACHE_ENTRIES", "50000"))
+DEFAULT_MAX_BYTES = int(os.environ.get("FORTUNE_RESULT_CACHE_BYTES", str(64 * 1024 * 1024)))
+DEFAULT_WARM_AHEAD = float(os.environ.get("FORTUNE_RESULT_CACHE_WARM_AHEAD", "300"))
+DEFAULT_WARM_SHARE = float(os.environ.get("FORTUNE_RESULT_CACHE_WARM_SHARE", "0.5"))
+
+_TEXT_FIELDS = ("name", "zodiac_label", "zodiac_text", "mbti_trait", "saju_text",
+                "today_text", "tomorrow_text", "year_text")
+
+def result_nbytes(res) -> int:
+    """캐시 예산용 대략 크기 (결과 객체 + 문자열)."""
+    n = sys.getsizeof(res) + sum(sys.getsizeof(getattr(res, f)) for f in _TEXT_FIELDS)
+    if res.tarot is not None:
+        n += sys.getsizeof(res.tarot) + sys.getsizeof(res.tarot.name) + sys.getsizeof(res.tarot.meaning)
+    return n
+
+class ResultCache:
+    """(사용자, 날짜) → FortuneResult LRU 캐시. 스레드 안전."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES,
+                 warm_ahead: float = DEFAULT_WARM_AHEAD, warm_share: float = DEFAULT_WARM_SHARE,
+                 today=date.today):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.warm_ahead = warm_ahead
+        self.warm_share = min(max(warm_share, 0.0), 1.0)
+        self._today = today
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (result, nbytes)
+        self._bytes = 0
+        self._day = today()
+        self._dbs = None
+        self._warm_thread = None
+        self._stop = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.warmed = 0
+        self.warm_evictions = 0
+
+    # ---------- 조회/저장 ----------
+    def get_or_compute(self, birth: date, name: str, mbti: str, on_date: date | None = None,
+                       dbs=None, seed_mode: str | None = None):
+        if dbs is None:
+            dbs = load_all_dbs()
+        if on_date is None:
+            on_date = self._today()
+        name, mbti = normalize_user(name, mbti)
+        mode = seed_mode or DEFAULT_SEED_MODE
+        key = (mode, stable_seed(str(birth), name, mbti), on_date)
+
+        with self._lock:
+            self._check_epoch(dbs)
+            ent = self._data.get(key)
+            if ent is not None:
+                res = ent[0]
+                if res.birth == birth and res.name == name and res.mbti == mbti:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return res
+            self.misses += 1
+
+        res = compute_fortune(birth, name, mbti, on_date, dbs, mode)
+        self.put(key, res, dbs)
+        return res
+
+    def put(self, key, res, dbs) -> int | None:
+        """저장 후 밀어낸 항목 수 반환. 저장하지 않았으면 None (DB 스냅샷 바뀜 / 지난 날짜)."""
+        nbytes = result_nbytes(res)
+        with self._lock:
+            if dbs is not self._dbs:
+                return None  # 계산 도중 DB 스냅샷이 바뀜 → 버림
+            self._check_day()
+            if key[2] < self._day:
+                return None  # 이미 지난 날짜
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (res, nbytes)
+            self._bytes += nbytes
+            return self._evict()
+
+    def _evict(self) -> int:
+        n = 0
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, nbytes) = self._data.popitem(last=False)
+            self._bytes -= nbytes
+            n += 1
+        self.evictions += n
+        return n
+
+    def _check_epoch(self, dbs):
+        """(lock 보유 상태) DB 스냅샷이 바뀌면 전체 폐기, 날짜가 바뀌면 지난 날짜 폐기."""
+        if dbs is not self._dbs:
+            if self._dbs is not None:
+                self._data.clear()
+                self._bytes = 0
+            self._dbs = dbs
+        self._check_day()
+
+    def _check_day(self):
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            for k in [k for k in self._data if k[2] < today]:
+                self._bytes -= self._data.pop(k)[1]
+                self.expired += 1
+
+    # ---------- 자정 전 예열 ----------
+    def warm(self, on_date: date, limit: int | None = None) -> int:
+        """최근 사용자(LRU 최신순)들의 on_date 결과를 예열 예산만큼 미리 계산. 저장한 개수 반환.
+
+        예산 = 항목 수/바이트 한도 × warm_share. 캐시가 차 있으면 LRU 끝(가장 오래 안 쓰인 오늘 항목)부터
+        밀려남 → 예열 대상(최근 사용자)의 오늘 항목은 자정까지 남고, 자정 직후 내일 항목이 적중.
+        """
+        with self._lock:
+            budget = int(self.max_entries * self.warm_share)
+            limit = budget if limit is None else min(limit, budget)
+            byte_budget = self.max_bytes * self.warm_share
+            if limit <= 0:
+                return 0
+            dbs = self._dbs
+            users = []
+            seen = set()
+            for (mode, seed, d), (res, _) in reversed(self._data.items()):
+                if d == on_date or (mode, seed) in seen:
+                    continue
+                seen.add((mode, seed))
+                users.append((mode, res.birth, res.name, res.mbti))
+                if len(users) >= limit:
+                    break
+        if dbs is None:
+            return 0
+        n = used = evicted = 0
+        for mode, birth, name, mbti in users:
+            if self._stop.is_set():
+                break
+            res = compute_fortune(birth, name, mbti, on_date, dbs, mode)
+            used += result_nbytes(res)
+            if used > byte_budget:
+                break
+            out = self.put((mode, stable_seed(str(birth), name, mbti), on_date), res, dbs)
+            if out is None:
+                break  # DB 스냅샷 바뀜
+            evicted += out
+            n += 1
+        with self._lock:
+            self.warmed += n
+            self.warm_evictions += evicted
+        return n
+
+    def _warm_loop(self):
+        while not self._stop.is_set():
+            now = datetime.now()
+            tomorrow = now.date() + timedelta(days=1)
+            midnight = datetime.combine(tomorrow, dtime())
+            wait = (midnight - now).total_seconds() - self.warm_ahead
+            if wait > 0 and self._stop.wait(wait):
+                return
+            if datetime.now() < midnight:
+                self.warm(tomorrow)
+            # 자정 넘어갈 때까지 대기 후 다음 날 예열 일정으로
+            rest = (midnight - datetime.now()).total_seconds() + 1
+            if rest > 0 and self._stop.wait(rest):
+                return
+
+    def start_warmer(self):
+        with self._lock:
+            if self._warm_thread is None and self.warm_ahead > 0:
+                self._warm_thread = threading.Thread(target=self._warm_loop, name="fortune-cache-warm", daemon=True)
+                self._warm_thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # ---------- 상태 ----------
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "warmed": self.warmed,
+                "warm_evictions": self.warm_evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+# =========================================================
+# 프로세스 전역 캐시 (app.py 용)
+# =========================================================
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                cache = ResultCache()
+                cache.start_warmer()
+                _CACHE = cache
+    return _CACHE
+
+def cached_fortune(birth: date, name: str, mbti: str, on_date: date | None = None,
+                   dbs=None, seed_mode: str | None = None):
+    """compute_fortune 과 같은 결과, 프로세스 전역 캐시 경유."""
+    return get_result_cache().get_or_compute(birth, name, mbti, on_date, dbs, seed_mode)
@@ -0,0 +1,299 @@
+# fortune_db.py
+# - data/*.json DB 로더 (프로세스 전역 1회 파싱 + 공유)
+# - Streamlit 은 rerun 마다 app.py 를 다시 실행하지만, import 된 모듈은 프로세스에 남아있음
+#   → 여기 캐시를 두면 모든 세션/rerun 이 같은 파싱 결과를 복사 없이 공유
+# - 후보 파일 목록의 mtime/size 가 바뀌면 해당 DB 만 다시 읽음
+# - start_db_watcher(): 백그라운드 스레드가 바뀐 파일을 읽어 스냅샷을 통째로 교체 (핫 리로드)
+# - 문자열은 스냅샷 전체 표 1개로 intern (fortune_strings): 같은 문장은 DB 안/사이 모두 객체 1개
+#   → dedup_stats(): DB 키별 중복 제거 통계
+#   FORTUNE_DB_WATCH_INTERVAL  감시 간격(초, 기본 2, 0 = 감시 안 함)
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import fortune_metrics as metrics
+from fortune_strings import DedupCounter, StringTable, walk_strings
+
+WATCH_INTERVAL = float(os.environ.get("FORTUNE_DB_WATCH_INTERVAL", "2"))
+
+# =========================================================
+# 1) DB 후보 파일 목록 (앞쪽 우선)
+# =========================================================
+DB_CANDIDATES = {
+    "fortunes_year": ("year", [
+        "data/fortunes_ko_2026.json",
+        "data/fortunes_ko_2026 (1).json",
+    ]),
+    "fortunes_today": ("today", [
+        "data/fortunes_ko_today.json",
+        "data/fortunes_ko_today (1).json",
+        "data/fortunes_ko_today (2).json",
+        "data/fortunes_ko_today (3).json",
+    ]),
+    "fortunes_tomorrow": ("tomorrow", [
+        "data/fortunes_ko_tomorrow.json",
+        "data/fortunes_ko_tomorrow (1).json",
+        "data/fortunes_ko_tomorrow (2).json",
+    ]),
+    "lunar_lny": ("lny", [
+        "data/lunar_new_year_1920_2026.json",
+    ]),
+    "zodiac_db": ("zodiac", [
+        "data/zodiac_fortunes_ko_2026.json",
+        "data/zodiac_fortunes_ko_2026_FIXED.json",
+        "data/zodiac_fortunes_ko_2026_FIXED (1).json",
+    ]),
+    "mbti_db": ("mbti", [
+        "data/mbti_traits_ko.json",
+    ]),
+    "saju_db": ("saju", [
+        "data/saju_ko.json",
+    ]),
+    "tarot_db": ("tarot", [
+        "data/tarot_db_ko.json",
+        "data/tarot_db_ko (1).json",
+        "tarot_db_ko (1).json",
+        "tarot_db_ko.json",
+    ]),
+}
+
+# =========================================================
+# 2) 읽기 전용 컨테이너
+# - dict/list 를 상속하므로 기존 isinstance(x, dict/list) 분기는 그대로 동작
+# - 수정 시도는 TypeError (세션 하나가 공유 DB 를 오염시키는 것 방지)
+# =========================================================
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} 는 읽기 전용입니다. (공유 DB)")
+
+class FrozenDict(dict):
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+class FrozenList(list):
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+def freeze(obj, intern=None):
+    """JSON 파싱 결과(dict/list 중첩)를 FrozenDict/FrozenList 로 1회 변환.
+
+    intern: 문자열(키 포함)을 대표 객체로 바꾸는 함수 (예: DedupCounter.intern)
+    """
+    if isinstance(obj, dict):
+        if intern is None:
+            return FrozenDict({k: freeze(v) for k, v in obj.items()})
+        return FrozenDict({intern(k): freeze(v, intern) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return FrozenList([freeze(v, intern) for v in obj])
+    if intern is not None and isinstance(obj, str):
+        return intern(obj)
+    return obj
+
+# =========================================================
+# 3) 로더
+# =========================================================
+def _load_json_by_candidates(candidates):
+    for p in candidates:
+        fp = Path(p)
+        if fp.exists():
+            with open(fp, "r", encoding="utf-8") as f:
+                return json.load(f), str(fp)
+    raise FileNotFoundError(
+        "필수 DB 파일을 찾지 못했습니다.\n"
+        + "\n".join([f"- {c}" for c in candidates])
+        + "\n\nGitHub에 업로드한 data 폴더 파일명을 다시 확인해주세요."
+    )
+
+def _fingerprint(candidates) -> tuple:
+    """후보 목록 전체의 (경로, mtime_ns, size). 앞 후보가 새로 생겨도 감지됨."""
+    out = []
+    for p in candidates:
+        try:
+            stt = os.stat(p)
+        except OSError:
+            out.append((p, None, None))
+            continue
+        out.append((p, stt.st_mtime_ns, stt.st_size))
+    return tuple(out)
+
+_LOCK = threading.Lock()
+_ENTRIES = {}      # key -> (fingerprint, frozen_data, path, dedup_stats)
+_SNAPSHOT = None   # (fingerprints, dbs)
+
+def _fingerprints() -> tuple:
+    return tuple(_fingerprint(cands) for _, cands in DB_CANDIDATES.values())
+
+def _build_snapshot(fps):
+    """(_LOCK 보유 상태) fps 기준 새 (스냅샷, 항목). 바뀐 DB 만 다시 읽음.
+
+    전역(_ENTRIES/_SNAPSHOT)은 건드리지 않음 → 호출자가 검증 후 _commit 으로 함께 교체.
+    """
+    items = list(zip(DB_CANDIDATES.items(), fps))
+    # 문자열 표는 스냅샷마다 새로: 그대로 쓰는 DB 의 문자열을 먼저 넣고 → 새로 읽는 DB 가 그 객체를 공유
+    table = StringTable()
+    for (key, _), fp in items:
+        ent = _ENTRIES.get(key)
+        if ent is not None and ent[0] == fp:
+            for s in walk_strings(ent[1]):
+                table.add(s)
+    out = {}
+    paths = {}
+    entries = {}
+    for (key, (path_key, cands)), fp in items:
+        ent = _ENTRIES.get(key)
+        if ent is None or ent[0] != fp:
+            data, path = _load_json_by_candidates(cands)
+            counter = DedupCounter(table)
+            ent = (fp, freeze(data, counter.intern), path, counter.stats())
+        entries[key] = ent
+        out[key] = ent[1]
+        paths[path_key] = ent[2]
+    out["paths"] = FrozenDict(paths)
+    return FrozenDict(out), entries
+
+def _commit(fps, dbs, entries):
+    """(_LOCK 보유 상태) 항목 캐시와 스냅샷을 함께 교체."""
+    global _ENTRIES, _SNAPSHOT
+    _ENTRIES = entries
+    _SNAPSHOT = (fps, dbs)
+
+def load_all_dbs():
+    """전체 DB 를 반환(프로세스 전역 캐시).
+
+    반환값은 FrozenDict 이며 파일이 바뀌지 않는 한 매번 같은 객체입니다.
+    호출자는 복사 없이 그대로 읽기만 해야 합니다.
+    감시 스레드(start_db_watcher)가 돌고 있으면 파일 확인 없이 현재 스냅샷을 바로 반환합니다.
+    """
+    snap = _SNAPSHOT
+    if snap is not None and _WATCHER is not None:
+        return snap[1]
+    fps = _fingerprints()
+    if snap is not None and snap[0] == fps:
+        return snap[1]
+
+    with _LOCK:
+        snap = _SNAPSHOT
+        if snap is not None and snap[0] == fps:
+            return snap[1]
+        dbs, entries = _build_snapshot(fps)
+        _commit(fps, dbs, entries)
+        return dbs
+
+def dedup_stats(dbs=None) -> dict:
+    """스냅샷(기본: 현재)의 DB 키별 문자열 중복 제거 통계 (fortune_strings.DedupCounter.stats)."""
+    if dbs is None:
+        dbs = load_all_dbs()
+    out = {}
+    entries = _ENTRIES
+    for key in DB_CANDIDATES:
+        ent = entries.get(key)
+        if ent is not None and ent[1] is dbs.get(key):
+            out[key] = ent[3]
+    return out
+
+# =========================================================
+# 4) 핫 리로드 (백그라운드 감시)
+# - 감시 스레드가 파일 지문을 주기적으로 확인 → 바뀌면 요청 경로 밖에서 파싱/검증/풀 준비
+#   → 성공하면 _SNAPSHOT 을 한 번에 교체 (진행 중인 rerun 은 받아 둔 이전 스냅샷을 그대로 씀)
+# - 지문이 두 번 연속 같을 때만 읽음 (파일을 쓰는 중일 수 있음)
+# - 파싱 실패 / 새 구조 문제 → 이전 스냅샷 유지, 같은 지문은 다시 시도하지 않음
+# - 소요시간/실패는 fortune_metrics.DB_RELOAD (result=ok/error)
+# =========================================================
+_WATCHER = None
+_WATCHER_LOCK = threading.Lock()
+_STATUS = {"generation": 0, "reloads": 0, "failures": 0, "last_reload": None, "last_error": None}
+
+def _validate(new, old):
+    """새 스냅샷의 구조 확인. 이전 스냅샷에 없던 문제가 생기면 ValueError."""
+    from fortune_schema import resolve_schema
+
+    problems = set(resolve_schema(new).problems)
+    if old is not None:
+        problems -= set(resolve_schema(old).problems)
+    if problems:
+        raise ValueError("DB 구조 문제: " + "; ".join(sorted(problems)))
+
+def _warm(dbs):
+    """교체 전에 스냅샷 단위 캐시(풀 팩, 타로 덱)를 미리 채움 → 교체 직후 rerun 이 빌드하지 않음."""
+    from fortune_engine import tarot_deck
+    from fortune_pack import load_pools
+
+    load_pools(dbs)
+    tarot_deck(dbs["tarot_db"])
+
+def reload_dbs(fps=None) -> bool:
+    """지금 파일 기준으로 다시 읽어서 검증 후 교체. 성공 여부 반환 (실패 시 이전 스냅샷·항목 캐시 유지).
+
+    빌드 → 검증 → 준비 → 교체를 _LOCK 안에서 한 번에 (검증에 실패한 데이터는 어디에도 남지 않음).
+    감시 스레드가 돌 때 요청 경로(load_all_dbs)는 잠금 없이 현재 스냅샷을 읽으므로 막히지 않음.
+    """
+    if fps is None:
+        fps = _fingerprints()
+    t0 = time.perf_counter()
+    with _LOCK:
+        old = _SNAPSHOT
+        try:
+            new, entries = _build_snapshot(fps)
+            _validate(new, old[1] if old is not None else None)
+            _warm(new)
+        except Exception as e:  # 파싱/검증 실패 → 서비스는 이전 스냅샷으로 계속
+            metrics.observe(metrics.DB_RELOAD, "error", time.perf_counter() - t0)
+            _STATUS["failures"] += 1
+            _STATUS["last_error"] = f"{type(e).__name__}: {e}"
+            return False
+        _commit(fps, new, entries)
+        metrics.observe(metrics.DB_RELOAD, "ok", time.perf_counter() - t0)
+        _STATUS["generation"] += 1
+        _STATUS["reloads"] += 1
+        _STATUS["last_reload"] = time.time()
+        _STATUS["last_error"] = None
+    return True
+
+def _watch_loop(interval: float):
+    pending = failed = None
+    while True:
+        time.sleep(interval)
+        try:
+            fps = _fingerprints()
+            snap = _SNAPSHOT
+            if (snap is not None and snap[0] == fps) or fps == failed:
+                pending = None
+                continue
+            if fps != pending:
+                pending = fps  # 한 주기 뒤에도 같으면 읽음
+                continue
+            pending = None
+            failed = None if reload_dbs(fps) else fps
+        except Exception as e:  # 감시 스레드는 죽지 않음
+            with _LOCK:
+                _STATUS["last_error"] = f"{type(e).__name__}: {e}"
+
+def start_db_watcher(interval: float = WATCH_INTERVAL):
+    """프로세스당 1회: DB 파일 감시 스레드 시작 (interval <= 0 이면 시작 안 함 → 기존처럼 호출마다 확인)."""
+    global _WATCHER
+    if _WATCHER is not None or interval <= 0:
+        return _WATCHER
+    with _WATCHER_LOCK:
+        if _WATCHER is not None:
+            return _WATCHER
+        load_all_dbs()  # 첫 스냅샷은 지금 (실패하면 예외 그대로 → 앱이 안내)
+        t = threading.Thread(target=_watch_loop, args=(interval,), name="fortune-db-watch", daemon=True)
+        t.start()
+        _WATCHER = t
+        return _WATCHER
+
+def db_watch_status() -> dict:
+    """감시 상태 (DEBUG 화면용)."""
+    with _LOCK:
+        status = dict(_STATUS)
+    return dict(status, running=_WATCHER is not None, interval=WATCH_INTERVAL)
@@ -0,0 +1,257 @@
+# fortune_dist.py
+# - pick 분포 시뮬레이션: 가상 사용자 × 날짜로 풀마다 어떤 줄이 얼마나 뽑히는지 집계
+#   · 고정 pick (사용자당 1회): 띠 운세(zodiac/<띠>), 사주 오행/오행별 풀, 2026 전체(year_all)
+#   · 날짜 pick (사용자 × 날짜): 오늘(today), 내일(tomorrow), 타로(tarot)
+# - 보고 (풀마다)
+#   · 줄별 hit 수, 카이제곱 균등성 (p 값: Wilson–Hilferty 근사, scipy 불필요)
+#   · 한 번도 안 뽑힌 줄 (인덱스 + 앞부분 미리보기)
+#   · 충돌률: 임의의 두 pick 이 같은 줄일 확률 (균등이면 1/줄 수)
+#   · 연속일 반복률(날짜 pick): 같은 사용자가 전날과 같은 줄을 볼 확률 (균등이면 1/줄 수)
+# - seed 는 청크(사용자 × 날짜) 단위로 한 번에 (fortune_select.derive_seeds_many), 인덱스·집계도 배열로
+#   청크 단위로 워커 프로세스에 분배
+# - 처리량 (코어 1개 기준 실측, 사용자 × 날짜 14일): compat ≈ 40만 pick/s, v2 ≈ 1,500만 pick/s
+#   · 100만 명 × 14일(4,600만 pick): compat ≈ 2분/코어, v2 ≈ 3초 → compat 대량 실행은 --workers 로 나눔
+#   · compat 은 pick 마다 MT19937 상태 초기화(기존 결과 재현 조건)가 남아서 느림
+#
+# 사용:
+#   python fortune_dist.py                                   # 5만 명 × 14일 (~230만 pick)
+#   python fortune_dist.py --users 200000 --days 30 --workers 8
+#   python fortune_dist.py --users 100000 --days 7 --seed-mode v2 -o dist.json
+
+import argparse
+import json
+import math
+import multiprocessing as mp
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from fortune_db import load_all_dbs
+from fortune_engine import lny_table, tarot_deck, zodiac_by_birth_many
+from fortune_metrics import set_enabled as set_metrics_enabled
+from fortune_pack import load_pools
+from fortune_schema import MBTI_TYPES, saju_pool_name, zodiac_pool_name
+from fortune_select import DEFAULT_SEED_MODE, SEED_MODES, derive_seeds_many
+from fortune_text import ZODIAC_ORDER
+
+DAILY = ("today", "tomorrow", "tarot")
+NEVER_SHOWN = 20  # 풀마다 미리보기로 보여줄 안 뽑힌 줄 수
+
+# =========================================================
+# 1) 풀 목록 (이름 → 시퀀스)
+# =========================================================
+def sim_pools(dbs) -> tuple[dict, int]:
+    """시뮬레이션 대상 풀 {이름: 시퀀스}, 사주 오행 수(0 = 구버전)."""
+    pools = load_pools(dbs)
+    n_el = pools.meta.get("saju_elements", 0)
+    out = {zodiac_pool_name(zk): pools.zodiac_pool(zk) for zk in ZODIAC_ORDER}
+    if n_el:
+        out["saju/elements"] = [f"element {i}" for i in range(n_el)]
+        for i in range(n_el):
+            out[saju_pool_name(i)] = pools.saju_pool(i)
+    else:
+        out[saju_pool_name(None)] = pools.saju_pool(None)
+    out["year_all"] = pools.daily_pool("year_all")
+    out["today"] = pools.daily_pool("today")
+    out["tomorrow"] = pools.daily_pool("tomorrow")
+    out["tarot"] = [c.name for c in tarot_deck(dbs["tarot_db"])]
+    return out, n_el
+
+# =========================================================
+# 2) 워커: 청크 → 풀별 hit 수 + 연속일 반복 수
+# =========================================================
+_DBS = None
+
+def _init_worker():
+    global _DBS
+    set_metrics_enabled(False)
+    _DBS = load_all_dbs()
+    load_pools(_DBS)
+
+def _users(seed: int, start: int, count: int):
+    r = random.Random(f"dist:{seed}:{start}")
+    first = date(1930, 1, 1).toordinal()
+    for i in range(start, start + count):
+        birth = date.fromordinal(first + r.randrange(0, 35000))
+        yield birth, f"u{i}-{r.getrandbits(24):06x}", r.choice(MBTI_TYPES)
+
+def _run_chunk(args) -> tuple[dict, dict]:
+    seed, start, count, dates, seed_mode = args
+    if _DBS is None:
+        _init_worker()
+    pools, n_el = sim_pools(_DBS)
+    sizes = {k: len(v) for k, v in pools.items()}
+    users = list(_users(seed, start, count))
+    seeds = derive_seeds_many(users, dates, seed_mode, legacy_saju=not n_el)
+    idx = {}
+
+    # 고정 pick: 사용자당 1번 (날짜와 무관) — 같은 풀을 쓰는 사용자끼리 모아서 배열로
+    zkeys, _ = zodiac_by_birth_many([u[0] for u in users], lny_table(_DBS["lunar_lny"]))
+    for zk in ZODIAC_ORDER:
+        name = zodiac_pool_name(zk)
+        idx[name] = _group_index(seeds, seeds.zodiac, zkeys == zk, sizes[name])
+    if n_el:
+        el = seeds.element_index(n_el)
+        idx["saju/elements"] = el
+        for e in range(n_el):
+            name = saju_pool_name(e)
+            idx[name] = _group_index(seeds, seeds.saju, el == e, sizes[name])
+    else:
+        name = saju_pool_name(None)
+        idx[name] = _group_index(seeds, seeds.saju, None, sizes[name])
+    idx["year_all"] = _group_index(seeds, seeds.year, None, sizes["year_all"])
+
+    # 날짜 pick: (사용자, 날짜) 배열 → 전날과 같은 칸 수
+    repeats = {k: 0 for k in DAILY}
+    for k in DAILY:
+        a = _group_index(seeds, getattr(seeds, k), None, sizes[k])
+        idx[k] = a
+        if a.size:
+            repeats[k] = int((a[:, 1:] == a[:, :-1]).sum())
+    counts = {k: np.bincount(idx[k].ravel(), minlength=sizes[k]) for k in pools}
+    return counts, repeats
+
+def _group_index(seeds, values, mask, n: int):
+    """values(선택: mask 인 사용자만)의 풀 크기 n 인덱스 배열. 빈 풀이면 빈 배열."""
+    if mask is not None:
+        values = values[mask]
+    if not n:
+        return np.zeros(0, dtype=np.int64)
+    return seeds.index(values, n)
+
+# =========================================================
+# 3) 통계
+# =========================================================
+def chi_square(counts) -> tuple[float, int, float]:
+    """(χ², 자유도, 균등 가정 p 값). p 는 Wilson–Hilferty 정규 근사."""
+    n = len(counts)
+    total = int(counts.sum())
+    if n < 2 or total == 0:
+        return 0.0, max(0, n - 1), 1.0
+    exp = total / n
+    chi2 = float(((counts - exp) ** 2).sum() / exp)
+    df = n - 1
+    z = ((chi2 / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+    return chi2, df, 0.5 * math.erfc(z / math.sqrt(2))
+
+def pool_report(name: str, lines, counts, repeats: int | None, users: int, days: int) -> dict:
+    n = len(lines)
+    total = int(counts.sum())
+    chi2, df, p = chi_square(counts)
+    never = np.flatnonzero(counts == 0)
+    c = counts.astype(np.float64)
+    collision = float((c * (c - 1)).sum() / (total * (total - 1))) if total > 1 else 0.0
+    rep = {
+        "lines": n,
+        "picks": total,
+        "expected_per_line": total / n if n else 0.0,
+        "min_hits": int(counts.min()) if n else 0,
+        "max_hits": int(counts.max()) if n else 0,
+        "chi2": chi2,
+        "df": df,
+        "p_uniform": p,
+        "never_picked": int(len(never)),
+        "never_picked_lines": [
+            {"index": int(i), "text": str(lines[int(i)])[:40]} for i in never[:NEVER_SHOWN]
+        ],
+        "collision_rate": collision,
+        "collision_expected": 1 / n if n else 0.0,
+    }
+    if repeats is not None and days > 1:
+        pairs = users * (days - 1)
+        rep["repeat_rate"] = repeats / pairs if pairs else 0.0
+        rep["repeat_expected"] = 1 / n if n else 0.0
+    return rep
+
+# =========================================================
+# 4) 실행
+# =========================================================
+def simulate(users: int, days: int, *, start_date: date = date(2026, 1, 1), seed: int = 0,
+             seed_mode: str | None = None, workers: int = 0, chunk_size: int = 5000, out=sys.stderr) -> dict:
+    seed_mode = seed_mode or DEFAULT_SEED_MODE
+    dates = tuple(start_date + timedelta(days=i) for i in range(days))
+    dbs = load_all_dbs()
+    pools, _ = sim_pools(dbs)
+    tasks = [(seed, s, min(chunk_size, users - s), dates, seed_mode) for s in range(0, users, chunk_size)]
+
+    t0 = time.monotonic()
+    counts = {k: np.zeros(len(v), dtype=np.int64) for k, v in pools.items()}
+    repeats = {k: 0 for k in DAILY}
+
+    def merge(res):
+        c, r = res
+        for k, v in c.items():
+            counts[k] += v
+        for k, v in r.items():
+            repeats[k] += v
+
+    if workers <= 0:
+        _init_worker()
+        for t in tasks:
+            merge(_run_chunk(t))
+    else:
+        with mp.Pool(workers, initializer=_init_worker) as pool:
+            for res in pool.imap_unordered(_run_chunk, tasks):
+                merge(res)
+    elapsed = time.monotonic() - t0
+
+    picks = users * (4 + days * len(DAILY))
+    print(f"simulated {users:,} users × {days} days ({seed_mode}) = {picks:,} picks in {elapsed:.1f}s "
+          f"({picks / elapsed if elapsed else 0:,.0f} picks/s)", file=out)
+    return {
+        "users": users,
+        "days": days,
+        "start_date": str(start_date),
+        "seed": seed,
+        "seed_mode": seed_mode,
+        "seconds": elapsed,
+        "pools": {
+            k: pool_report(k, pools[k], counts[k], repeats.get(k), users, days) for k in pools
+        },
+    }
+
+def print_report(rep: dict, out=sys.stdout):
+    print(f"{'pool':<22} {'lines':>6} {'picks':>10} {'min':>6} {'max':>6} {'p(uniform)':>10} "
+          f"{'never':>6} {'coll×n':>7} {'repeat×n':>8}", file=out)
+    for name, r in rep["pools"].items():
+        if not r["lines"]:
+            print(f"{name:<22} {'(빈 풀)':>6}", file=out)
+            continue
+        coll = r["collision_rate"] / r["collision_expected"]
+        repeat = f"{r['repeat_rate'] / r['repeat_expected']:.2f}" if "repeat_rate" in r else "-"
+        flag = "  ← 편향?" if r["p_uniform"] < 0.001 else ""
+        print(f"{name:<22} {r['lines']:>6,} {r['picks']:>10,} {r['min_hits']:>6,} {r['max_hits']:>6,} "
+              f"{r['p_uniform']:>10.4f} {r['never_picked']:>6,} {coll:>7.3f} {repeat:>8}{flag}", file=out)
+    for name, r in rep["pools"].items():
+        if r["never_picked"]:
+            print(f"\n[{name}] 한 번도 안 뽑힌 줄 {r['never_picked']:,}개:", file=out)
+            for ln in r["never_picked_lines"]:
+                print(f"  #{ln['index']}: {ln['text']}", file=out)
+    print("\ncoll×n / repeat×n: 균등 기대값 대비 배수 (1.0 근처가 정상)", file=out)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="pick 분포 시뮬레이션 (줄별 hit/균등성/미노출/충돌률)")
+    ap.add_argument("--users", type=int, default=50_000)
+    ap.add_argument("--days", type=int, default=14, help="사용자마다 연속 날짜 수 (날짜 pick)")
+    ap.add_argument("--start-date", type=date.fromisoformat, default=date(2026, 1, 1))
+    ap.add_argument("--seed", type=int, default=0, help="가상 사용자 생성 seed")
+    ap.add_argument("--seed-mode", choices=list(SEED_MODES), default=None,
+                    help="pick seed 방식 (기본: FORTUNE_SEED_MODE 환경변수, 없으면 compat)")
+    ap.add_argument("--workers", type=int, default=mp.cpu_count(), help="프로세스 수 (0 = 현재 프로세스에서)")
+    ap.add_argument("--chunk-size", type=int, default=5000)
+    ap.add_argument("-o", "--output", help="결과 JSON 파일")
+    args = ap.parse_args(argv)
+
+    rep = simulate(args.users, args.days, start_date=args.start_date, seed=args.seed, seed_mode=args.seed_mode,
+                   workers=args.workers, chunk_size=args.chunk_size)
+    print_report(rep)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rep, f, ensure_ascii=False, indent=1)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
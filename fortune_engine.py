@@ -0,0 +1,408 @@
+# fortune_engine.py
+# - 운세 선택 로직 (띠/MBTI/사주/오늘/내일/2026/타로) — Streamlit 비의존
+# - app.py 는 compute_fortune() 결과를 그리기만 함
+# - 배치/벤치마크/테스트에서 UI 없이 그대로 호출 가능 (여러 사용자: compute_fortunes)
+#
+#   from fortune_engine import compute_fortune
+#   res = compute_fortune(date(1990, 1, 20), "홍길동", "INTJ", date(2026, 1, 1))
+
+import random
+import hashlib
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+import fortune_metrics as metrics
+from fortune_db import load_all_dbs
+from fortune_pack import load_pools
+from fortune_select import derive_seeds, derive_seeds_many
+from fortune_text import (
+    ZODIAC_ORDER,
+    ZODIAC_LABEL_KO,
+    strip_html_like,
+    strip_trailing_index,
+)
+
+# =========================================================
+# 1) seed / pick
+# =========================================================
+def stable_seed(*parts: str) -> int:
+    s = "|".join([str(p) for p in parts])
+    h = hashlib.sha256(s.encode("utf-8")).hexdigest()
+    return int(h[:12], 16)
+
+def pick_one(pool, seed_int: int):
+    # list 외에 풀 팩(PackPool) 같은 시퀀스도 허용 → 고른 1줄만 읽음
+    if not isinstance(pool, Sequence) or isinstance(pool, str) or len(pool) == 0:
+        return None
+    r = random.Random(seed_int)
+    return r.choice(pool)
+
+# =========================================================
+# 2) 음력 설 기준 띠 계산
+# =========================================================
+def parse_lny_map(lny_json):
+    out = {}
+    if isinstance(lny_json, dict):
+        for y, dstr in lny_json.items():
+            try:
+                yy = int(str(y))
+                a, b, c = str(dstr).split("-")
+                out[yy] = date(int(a), int(b), int(c))
+            except Exception:
+                continue
+    return out
+
+def zodiac_key_from_year(gregorian_year: int) -> str:
+    idx = (gregorian_year - 4) % 12
+    return ZODIAC_ORDER[idx]
+
+def zodiac_by_birth(birth: date, lny_map) -> tuple[str, int]:
+    """lny_map: parse_lny_map() 결과 또는 LnyTable (설날 전 출생이면 전년도 띠)."""
+    y = birth.year
+    lny = lny_map.get(y)
+    zodiac_year = y
+    if lny and birth < lny:
+        zodiac_year = y - 1
+    zk = zodiac_key_from_year(zodiac_year)
+    return zk, zodiac_year
+
+_EPOCH = date(1970, 1, 1)
+
+class LnyTable:
+    """연도 → 설날 조회표 (first_year 부터 연속 배열). DB 스냅샷당 1회 생성.
+
+    - get(year): parse_lny_map() 의 dict.get 과 같은 결과 → zodiac_by_birth 에 그대로 전달
+    - zodiac_by_birth_many(): numpy 배열 버전 (설날 일수 배열은 처음 쓸 때 1회 생성)
+    """
+    __slots__ = ("first_year", "dates", "_days")
+
+    def __init__(self, lny_map: dict):
+        if lny_map:
+            self.first_year = min(lny_map)
+            self.dates = tuple(lny_map.get(y) for y in range(self.first_year, max(lny_map) + 1))
+        else:
+            self.first_year = 0
+            self.dates = ()
+        self._days = None
+
+    def get(self, year: int, default=None):
+        i = year - self.first_year
+        if 0 <= i < len(self.dates):
+            d = self.dates[i]
+            return default if d is None else d
+        return default
+
+    def days(self):
+        """1970-01-01 기준 일수 int64 배열 (없는 해는 int64 최솟값 → '설날 전' 비교가 항상 False)."""
+        if self._days is None:
+            import numpy as np
+
+            none = np.iinfo(np.int64).min
+            self._days = np.array(
+                [none if d is None else (d - _EPOCH).days for d in self.dates], dtype=np.int64
+            )
+        return self._days
+
+_LNY = (None, None)  # (lunar_lny DB, LnyTable)
+_LNY_LOCK = threading.Lock()
+
+def lny_table(lny_json) -> LnyTable:
+    """lunar_lny DB 스냅샷에 대응하는 LnyTable (같은 객체인 동안 캐시 → rerun 마다 다시 파싱 X)."""
+    global _LNY
+    cur = _LNY
+    if cur[0] is lny_json and cur[1] is not None:
+        return cur[1]
+    with _LNY_LOCK:
+        if _LNY[0] is not lny_json or _LNY[1] is None:
+            _LNY = (lny_json, LnyTable(parse_lny_map(lny_json)))
+        return _LNY[1]
+
+def _as_datetime64(births):
+    import numpy as np
+
+    if isinstance(births, (list, tuple)) and births and isinstance(births[0], date):
+        # date 목록: numpy 의 객체별 변환보다 toordinal 경유가 ~20배 빠름
+        ords = np.fromiter((d.toordinal() for d in births), np.int64, len(births))
+        return (ords - _EPOCH.toordinal()).astype("datetime64[D]")
+    return np.asarray(births, dtype="datetime64[D]")
+
+def zodiac_by_birth_many(births, lny) -> tuple:
+    """생일 배열 → (띠 키 배열, 띠 연도 배열). zodiac_by_birth 를 원소마다 부른 것과 같은 결과.
+
+    - births: datetime64 배열 / date 목록 / "YYYY-MM-DD" 목록 (NaT 불가)
+    - lny: LnyTable 또는 lunar_lny DB(JSON dict)
+    """
+    import numpy as np
+
+    if not isinstance(lny, LnyTable):
+        lny = lny_table(lny)
+    b = _as_datetime64(births)
+    years = b.astype("datetime64[Y]").astype(np.int64) + 1970
+    zodiac_years = years.copy()
+    table = lny.days()
+    if len(table):
+        idx = years - lny.first_year
+        inside = (idx >= 0) & (idx < len(table))
+        lny_days = table[np.clip(idx, 0, len(table) - 1)]
+        before = inside & (b.astype(np.int64) < lny_days)
+        zodiac_years -= before
+    keys = np.asarray(ZODIAC_ORDER)[(zodiac_years - 4) % 12]
+    return keys, zodiac_years
+
+# =========================================================
+# 3) MBTI 특징
+# =========================================================
+# MBTI_TYPES / get_mbti_trait_text: fortune_schema
+# 유형별 문장은 DB 로드 시 미리 완성 → compute_fortune 은 pools.mbti_trait() 조회만
+
+# =========================================================
+# 4) 타로 (하루 고정)
+# =========================================================
+@dataclass(frozen=True, slots=True)
+class TarotCard:
+    name: str
+    meaning: str
+    image: str
+    key: str = ""
+    image_exists: bool = False
+
+def _tarot_raw_cards(tarot_db) -> list:
+    """타로 DB 구조별 카드 원본 목록.
+    - DB가 78장(메이저+마이너) 전부 들어있으면 전체
+    - 기존 구조(majors/cards/list)도 그대로 호환
+    """
+    cards_raw = []
+
+    # 1) 가장 흔한 구조: {"cards":[...]} 또는 list
+    if isinstance(tarot_db, dict) and isinstance(tarot_db.get("cards"), list):
+        cards_raw = tarot_db["cards"]
+    elif isinstance(tarot_db, list):
+        cards_raw = tarot_db
+    else:
+        # 2) 기존 majors 호환
+        if isinstance(tarot_db, dict) and isinstance(tarot_db.get("majors"), list):
+            cards_raw.extend(tarot_db.get("majors", []))
+
+        # 3) 마이너 아르카나/기타 키들까지 전부 흡수 (list of dict)
+        if isinstance(tarot_db, dict):
+            for k, v in tarot_db.items():
+                if k in ("cards", "majors"):
+                    continue
+                if isinstance(v, list) and v and all(isinstance(x, dict) for x in v):
+                    cards_raw.extend(v)
+    return cards_raw
+
+class TarotDeck(Sequence):
+    """정리된 타로 카드 배열 (tarot_db 스냅샷당 1회 생성).
+
+    - 카드 = TarotCard (이름/뜻 정리, 이미지 경로 + 파일 존재 여부 미리 계산)
+    - key("the_fool")/id(0) → 카드 O(1) 조회
+    - 하루 1장 선택은 compute_fortune 이 PickSeeds 로 인덱스만 고름 (원본 JSON 다시 안 봄)
+    """
+
+    __slots__ = ("cards", "_by_key")
+
+    def __init__(self, tarot_db):
+        cards = []
+        by_key = {}
+        for c in _tarot_raw_cards(tarot_db):
+            if not isinstance(c, dict):
+                continue
+            name = c.get("name_ko") or c.get("name") or c.get("title") or c.get("card")
+            img = c.get("image") or c.get("img") or ""
+            meaning = ""
+            if isinstance(c.get("upright"), dict) and c["upright"].get("summary"):
+                meaning = c["upright"]["summary"]
+            else:
+                meaning = c.get("meaning") or c.get("desc") or c.get("text") or ""
+            if not (name and meaning):
+                continue
+            image = str(img).strip()
+            key = str(c.get("key") or "").strip()
+            card = TarotCard(
+                name=strip_html_like(str(name)),
+                meaning=strip_html_like(str(meaning)),
+                image=image,
+                key=key,
+                image_exists=bool(image) and Path(image).is_file(),
+            )
+            i = len(cards)
+            cards.append(card)
+            for k in (key, c.get("id")):
+                if k is not None and k != "" and k not in by_key:
+                    by_key[k] = i
+        self.cards = tuple(cards)
+        self._by_key = by_key
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __getitem__(self, i):
+        return self.cards[i]
+
+    def get(self, key) -> TarotCard | None:
+        """key("the_fool") 또는 DB id(0) 로 조회."""
+        i = self._by_key.get(key)
+        return None if i is None else self.cards[i]
+
+_DECK = (None, None)  # (tarot_db, TarotDeck)
+_DECK_LOCK = threading.Lock()
+
+def tarot_deck(tarot_db) -> TarotDeck:
+    """tarot_db 스냅샷에 대응하는 TarotDeck (같은 객체인 동안 캐시)."""
+    global _DECK
+    cur = _DECK
+    if cur[0] is tarot_db and cur[1] is not None:
+        return cur[1]
+    with _DECK_LOCK:
+        if _DECK[0] is not tarot_db or _DECK[1] is None:
+            _DECK = (tarot_db, TarotDeck(tarot_db))
+        return _DECK[1]
+
+def tarot_cards(tarot_db: dict) -> list[dict]:
+    """타로 DB → 정리된 카드 목록 [{"name","meaning","image"}]."""
+    return [{"name": c.name, "meaning": c.meaning, "image": c.image} for c in tarot_deck(tarot_db)]
+
+def get_tarot_of_day(tarot_db: dict, user_seed: int, today_: date):
+    """타로카드 1장 (하루 고정)."""
+    deck = tarot_deck(tarot_db)
+    if not deck:
+        return None
+
+    # ✅ 하루 고정: (날짜 + 사용자 seed)로 선택
+    seed_int = stable_seed(str(today_), str(user_seed), "tarot")
+    r = random.Random(seed_int)
+    c = deck[r.choice(range(len(deck)))]
+    return {"name": c.name, "meaning": c.meaning, "image": c.image}
+
+# =========================================================
+# 5) 결과
+# =========================================================
+@dataclass(frozen=True, slots=True)
+class FortuneResult:
+    """한 사용자(생일+이름+MBTI)의 on_date 기준 운세 결과 (render_result 표시 내용 그대로)."""
+    name: str
+    birth: date
+    mbti: str
+    on_date: date
+    base_seed: int
+    zodiac_key: str
+    zodiac_year: int
+    zodiac_label: str
+    zodiac_text: str
+    mbti_trait: str
+    saju_text: str
+    today_text: str
+    tomorrow_text: str
+    year_text: str
+    tarot: TarotCard | None
+
+def ensure_text(val, label):
+    """비어있으면 명확히 표시(대체/자동생성 금지)."""
+    if val and str(val).strip():
+        return strip_trailing_index(val)
+    return f"{label} 데이터를 DB에서 찾지 못했습니다. (data 폴더 JSON 확인)"
+
+def normalize_user(name: str, mbti: str) -> tuple[str, str]:
+    """화면과 같은 입력 정리 (이름 앞뒤 공백 제거, MBTI 기본값)."""
+    return (name or "").strip(), (mbti or "ENFP")
+
+def compute_fortune(birth: date, name: str, mbti: str, on_date: date | None = None, dbs=None,
+                    seed_mode: str | None = None) -> FortuneResult:
+    """운세 결과 계산.
+
+    - on_date: 오늘 기준 날짜(기본 date.today()) — 오늘/내일 운세, 타로가 날짜에 따라 바뀜
+    - dbs: load_all_dbs() 결과(기본: 프로세스 전역 캐시)
+    - seed_mode: "compat"/"v2" (기본: FORTUNE_SEED_MODE 환경변수, 없으면 compat)
+    """
+    if dbs is None:
+        dbs = load_all_dbs()
+    if on_date is None:
+        on_date = date.today()
+    name, mbti = normalize_user(name, mbti)
+
+    # 정리된 풀(풀 팩 mmap 또는 메모리 정리본) — 렌더마다 정규식 정리/DB 모양 탐색 X
+    pools = load_pools(dbs)
+    n_elements = pools.meta.get("saju_elements", 0)
+
+    # pick seed 를 한 번에 유도 (compat: 기존 stable_seed/pick_one 과 같은 결과)
+    seeds = derive_seeds(birth, name, mbti, on_date, seed_mode, legacy_saju=not n_elements)
+    return _fortune_result(birth, name, mbti, on_date, dbs, pools, seeds)
+
+def compute_fortunes(users, on_date: date | None = None, dbs=None,
+                     seed_mode: str | None = None) -> list[FortuneResult]:
+    """여러 사용자 [(birth, name, mbti), ...] 의 on_date 결과 (배치용).
+
+    compute_fortune 을 사용자마다 부른 것과 같은 결과. seed 는 derive_seeds_many 로 한 번에 유도.
+    """
+    if dbs is None:
+        dbs = load_all_dbs()
+    if on_date is None:
+        on_date = date.today()
+    users = [(birth, *normalize_user(name, mbti)) for birth, name, mbti in users]
+    pools = load_pools(dbs)
+    n_elements = pools.meta.get("saju_elements", 0)
+    batch = derive_seeds_many(users, (on_date,), seed_mode, legacy_saju=not n_elements)
+    return [
+        _fortune_result(birth, name, mbti, on_date, dbs, pools, batch.seeds(u))
+        for u, (birth, name, mbti) in enumerate(users)
+    ]
+
+def _fortune_result(birth: date, name: str, mbti: str, on_date: date, dbs, pools, seeds) -> FortuneResult:
+    """정리된 사용자 입력 + seed → 결과 (compute_fortune / compute_fortunes 공통)."""
+    zodiac_key, zodiac_year = zodiac_by_birth(birth, lny_table(dbs["lunar_lny"]))
+    n_elements = pools.meta.get("saju_elements", 0)
+
+    timing = metrics.ENABLED
+    clock = time.perf_counter
+
+    def pick(label, pool, value):
+        t0 = clock() if timing else 0.0
+        i = seeds.index(value, len(pool))
+        if timing:
+            metrics.observe(metrics.PICK, label, clock() - t0)
+        return None if i is None else pool[i]
+
+    # 1) 띠별 운세
+    zodiac_text = pick("zodiac", pools.zodiac_pool(zodiac_key), seeds.zodiac)
+
+    # 2) MBTI 특징
+    mbti_trait = pools.mbti_trait(mbti)
+
+    # 3) 사주 한마디 (saju_ko.json: elements 기반)
+    if n_elements:
+        saju_text = pick("saju", pools.saju_pool(seeds.element_index(n_elements)), seeds.saju)
+    else:
+        saju_text = pick("saju", pools.saju_pool(None), seeds.saju)
+
+    # 4) 오늘/내일 운세 (날짜 seed → 날짜 바뀌면 다른 내용)
+    today_text = pick("today", pools.daily_pool("today"), seeds.today)
+    tomorrow_text = pick("tomorrow", pools.daily_pool("tomorrow"), seeds.tomorrow)
+
+    # 5) 2026 전체 운세
+    year_text = pick("year", pools.daily_pool("year_all"), seeds.year)
+
+    # 6) 타로 (사용자 seed = base_seed, 하루 고정)
+    tarot = pick("tarot", tarot_deck(dbs["tarot_db"]), seeds.tarot)
+
+    return FortuneResult(
+        name=name,
+        birth=birth,
+        mbti=mbti,
+        on_date=on_date,
+        base_seed=seeds.base_seed,
+        zodiac_key=zodiac_key,
+        zodiac_year=zodiac_year,
+        zodiac_label=ZODIAC_LABEL_KO.get(zodiac_key, zodiac_key),
+        zodiac_text=ensure_text(zodiac_text, "띠 운세"),
+        mbti_trait=ensure_text(mbti_trait, "MBTI 특징"),
+        saju_text=ensure_text(saju_text, "사주 한 마디"),
+        today_text=ensure_text(today_text, "오늘 운세"),
+        tomorrow_text=ensure_text(tomorrow_text, "내일 운세"),
+        year_text=ensure_text(year_text, "2026 전체 운세"),
+        tarot=tarot,
+    )
@@ -0,0 +1,359 @@
+# fortune_events.py
+# - 사용 이벤트 로깅 (결과 보기 / 타로 공개 / 공유 링크 유입) → Google Sheets (gspread)
+# - 렌더 경로에서는 메모리 큐에 넣기만 함 (수 µs) → 백그라운드 스레드가 모아서 append_rows 1회로 전송
+#   · 큐 크기 제한: 가득 차면 드롭 (newest: 새 이벤트 버림 / oldest: 가장 오래된 것 버림)
+#   · 전송 실패: 지수 백오프 + full jitter 로 재시도, 끝내 실패하면 그 배치는 버림 (개수는 메트릭)
+#   · Sheets 연결(인증)도 첫 전송 때 백그라운드에서
+# - 이름/생년월일은 기록하지 않음 (세션 id 는 세션마다 새로 만든 임의 값)
+# - 백엔드 (환경변수)
+#   FORTUNE_EVENTS                  off / sheets / file / memory  (기본: FORTUNE_EVENTS_SHEET 가 있으면 sheets, 없으면 off)
+#   FORTUNE_EVENTS_SHEET            스프레드시트 key 또는 URL
+#   FORTUNE_EVENTS_WORKSHEET        워크시트 이름 (기본 events, 없으면 헤더와 함께 생성)
+#   FORTUNE_EVENTS_CREDENTIALS      서비스 계정 JSON 경로 (없으면 앱이 넘긴 st.secrets 또는 gspread 기본 경로)
+#   FORTUNE_EVENTS_FILE             file 백엔드 출력 (JSONL, 기본 events.jsonl)
+#   FORTUNE_EVENTS_QUEUE            큐 최대 이벤트 수 (기본 10000)
+#   FORTUNE_EVENTS_BATCH            배치 최대 행 수 (기본 200)
+#   FORTUNE_EVENTS_FLUSH_INTERVAL   배치가 덜 찼을 때 전송 간격(초, 기본 5)
+#   FORTUNE_EVENTS_RETRIES          배치당 재시도 횟수 (기본 5)
+#   FORTUNE_EVENTS_DROP             newest / oldest (기본 newest)
+#
+# 사용:
+#   from fortune_events import emit, start_event_sink
+#   start_event_sink()
+#   emit("tarot_reveal", session=sid, mbti="INTJ", tarot="The Fool")
+#
+#   python fortune_events.py upload events.jsonl      # file 백엔드로 쌓은 이벤트를 Sheets 로
+#   python fortune_events.py bench --n 20000 --latency 0.3 --fail-rate 0.2   # 가짜 백엔드로 동작 확인
+
+import argparse
+import atexit
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import fortune_metrics as metrics
+
+EVENTS_SHEET = os.environ.get("FORTUNE_EVENTS_SHEET", "").strip()
+EVENTS_BACKEND = (os.environ.get("FORTUNE_EVENTS", "").strip().lower()
+                  or ("sheets" if EVENTS_SHEET else "off"))
+EVENTS_WORKSHEET = os.environ.get("FORTUNE_EVENTS_WORKSHEET", "events").strip() or "events"
+EVENTS_CREDENTIALS = os.environ.get("FORTUNE_EVENTS_CREDENTIALS", "").strip()
+EVENTS_FILE = os.environ.get("FORTUNE_EVENTS_FILE", "events.jsonl").strip()
+QUEUE_MAX = int(os.environ.get("FORTUNE_EVENTS_QUEUE", "10000"))
+BATCH_SIZE = int(os.environ.get("FORTUNE_EVENTS_BATCH", "200"))
+FLUSH_INTERVAL = float(os.environ.get("FORTUNE_EVENTS_FLUSH_INTERVAL", "5"))
+MAX_RETRIES = int(os.environ.get("FORTUNE_EVENTS_RETRIES", "5"))
+DROP_POLICY = os.environ.get("FORTUNE_EVENTS_DROP", "newest").strip().lower()
+
+BACKENDS = ("off", "sheets", "file", "memory")
+DROP_POLICIES = ("newest", "oldest")
+COLUMNS = ("ts", "event", "session", "mbti", "zodiac", "tarot", "extra")
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+
+# =========================================================
+# 1) 백엔드: append_rows(rows) 하나만 있으면 됨
+# =========================================================
+class MemoryBackend:
+    """프로세스 안 가짜 백엔드 (오프라인 확인용). latency 초 지연, fail_rate 확률로 실패."""
+    name = "memory"
+
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0, seed: int | None = None):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rows = []
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    def append_rows(self, rows: list):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_rate and self._rng.random() < self.fail_rate:
+            raise ConnectionError("memory backend: injected failure")
+        self.rows.extend(rows)
+
+class FileBackend:
+    """JSONL 파일에 이어 쓰기 (한 줄 = {컬럼: 값}). 나중에 upload 로 Sheets 에 올릴 수 있음."""
+    name = "file"
+
+    def __init__(self, path=EVENTS_FILE):
+        self.path = path
+
+    def append_rows(self, rows: list):
+        text = "".join(json.dumps(dict(zip(COLUMNS, r)), ensure_ascii=False) + "\n" for r in rows)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+class SheetsBackend:
+    """gspread 워크시트. 연결은 첫 append_rows 때 (요청 경로가 아니라 전송 스레드에서)."""
+    name = "sheets"
+
+    def __init__(self, sheet=EVENTS_SHEET, worksheet=EVENTS_WORKSHEET, credentials=None):
+        if not sheet:
+            raise ValueError("FORTUNE_EVENTS_SHEET 가 비어 있습니다.")
+        self.sheet = sheet
+        self.worksheet = worksheet
+        self.credentials = credentials or EVENTS_CREDENTIALS or None
+        self._ws = None
+
+    def _connect(self):
+        import gspread
+
+        creds = self.credentials() if callable(self.credentials) else self.credentials
+        if isinstance(creds, dict):
+            gc = gspread.service_account_from_dict(creds)
+        elif creds:
+            gc = gspread.service_account(filename=creds)
+        else:
+            gc = gspread.service_account()
+        sh = gc.open_by_url(self.sheet) if self.sheet.startswith("http") else gc.open_by_key(self.sheet)
+        try:
+            ws = sh.worksheet(self.worksheet)
+        except gspread.WorksheetNotFound:
+            ws = sh.add_worksheet(self.worksheet, rows=1000, cols=len(COLUMNS))
+            ws.append_row(list(COLUMNS), value_input_option="RAW")
+        return ws
+
+    def append_rows(self, rows: list):
+        if self._ws is None:
+            self._ws = self._connect()
+        self._ws.append_rows(rows, value_input_option="RAW")
+
+def make_backend(kind: str = EVENTS_BACKEND, credentials=None):
+    """kind → 백엔드 객체 (off 이면 None)."""
+    if kind == "sheets":
+        return SheetsBackend(credentials=credentials)
+    if kind == "file":
+        return FileBackend()
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "off":
+        return None
+    raise ValueError(f"알 수 없는 FORTUNE_EVENTS: {kind} ({'/'.join(BACKENDS)})")
+
+# =========================================================
+# 2) 싱크: 제한된 큐 + 전송 스레드
+# =========================================================
+def event_row(event: str, session: str = "", **fields) -> list:
+    """이벤트 1건 → COLUMNS 순서의 행 (나머지 필드는 extra 에 JSON)."""
+    ts = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+    row = [ts, event, session, fields.pop("mbti", ""), fields.pop("zodiac", ""), fields.pop("tarot", "")]
+    row.append(json.dumps(fields, ensure_ascii=False) if fields else "")
+    return row
+
+class EventSink:
+    """put() 은 막히지 않음. 전송은 백그라운드 스레드가 배치로."""
+
+    def __init__(self, backend, *, max_queue: int = QUEUE_MAX, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, max_retries: int = MAX_RETRIES,
+                 drop_policy: str = DROP_POLICY):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"알 수 없는 FORTUNE_EVENTS_DROP: {drop_policy} ({'/'.join(DROP_POLICIES)})")
+        self.backend = backend
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.drop_policy = drop_policy
+        self._cond = threading.Condition()
+        self._q = deque()
+        self._closing = False
+        self._inflight = 0
+        self.enqueued = self.dropped = self.written = self.failed = self.retried = 0
+        self.last_error = None
+        self._thread = threading.Thread(target=self._loop, name="fortune-events", daemon=True)
+        self._thread.start()
+
+    def put(self, row: list) -> bool:
+        """큐에 넣기. 드롭되면 False (newest 정책에서 새 이벤트가 버려진 경우)."""
+        with self._cond:
+            if self._closing:
+                return False
+            if len(self._q) >= self.max_queue:
+                self.dropped += 1
+                metrics.inc(metrics.EVENTS, "dropped")
+                if self.drop_policy == "newest":
+                    return False
+                self._q.popleft()
+            self._q.append(row)
+            self.enqueued += 1
+            if len(self._q) >= self.batch_size:
+                self._cond.notify()
+        metrics.inc(metrics.EVENTS, "enqueued")
+        return True
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if len(self._q) < self.batch_size and not self._closing:
+                    self._cond.wait(self.flush_interval)
+                if not self._q:
+                    if self._closing:
+                        return
+                    continue
+                batch = [self._q.popleft() for _ in range(min(self.batch_size, len(self._q)))]
+                self._inflight = len(batch)
+            try:
+                self._send(batch)
+            finally:
+                with self._cond:
+                    self._inflight = 0
+                    self._cond.notify_all()
+
+    def _send(self, batch: list):
+        for attempt in range(self.max_retries + 1):
+            t0 = time.perf_counter()
+            try:
+                self.backend.append_rows(batch)
+            except Exception as e:  # 네트워크/쿼터/인증 등 → 재시도 후 포기
+                self.last_error = f"{type(e).__name__}: {e}"
+                metrics.observe(metrics.EVENT_FLUSH, f"{self.backend.name}_error", time.perf_counter() - t0)
+                if attempt == self.max_retries or self._closing:
+                    self.failed += len(batch)
+                    metrics.inc(metrics.EVENTS, "failed", len(batch))
+                    return
+                self.retried += 1
+                metrics.inc(metrics.EVENTS, "retried")
+                time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+                continue
+            metrics.observe(metrics.EVENT_FLUSH, self.backend.name, time.perf_counter() - t0)
+            self.written += len(batch)
+            metrics.inc(metrics.EVENTS, "written", len(batch))
+            return
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """큐가 빌 때까지 기다림 (테스트/종료용). 시간 안에 비었으면 True."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify()
+            while self._q or self._inflight:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    return False
+                self._cond.notify()
+                self._cond.wait(0.05 if left is None else min(0.05, left))
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """남은 이벤트를 최대 timeout 초 동안 전송하고 스레드 종료."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "backend": self.backend.name,
+                "queued": len(self._q),
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "written": self.written,
+                "failed": self.failed,
+                "retried": self.retried,
+                "last_error": self.last_error,
+            }
+
+# =========================================================
+# 3) 앱용 진입점 (프로세스 전역)
+# =========================================================
+_SINK = None
+_SINK_LOCK = threading.Lock()
+
+def start_event_sink(credentials=None):
+    """프로세스당 1회 싱크 시작 (FORTUNE_EVENTS=off 이면 None).
+
+    credentials: sheets 백엔드용 서비스 계정 (dict / JSON 경로 / 이를 돌려주는 함수 — 연결 시 1회 호출)
+    """
+    global _SINK
+    if _SINK is not None or EVENTS_BACKEND == "off":
+        return _SINK
+    with _SINK_LOCK:
+        if _SINK is None:
+            _SINK = EventSink(make_backend(EVENTS_BACKEND, credentials))
+            atexit.register(_SINK.close)
+        return _SINK
+
+def emit(event: str, session: str = "", **fields) -> bool:
+    """이벤트 기록 (막히지 않음). 싱크가 없거나 드롭되면 False."""
+    sink = _SINK
+    if sink is None:
+        return False
+    return sink.put(event_row(event, session, **fields))
+
+def event_stats() -> dict | None:
+    return _SINK.stats() if _SINK is not None else None
+
+# =========================================================
+# 4) CLI
+# =========================================================
+def upload(path, batch_size: int = 500) -> int:
+    """file 백엔드 JSONL → Sheets. 올린 행 수 반환."""
+    backend = SheetsBackend()
+    n = 0
+    batch = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            rec = json.loads(line)
+            batch.append([rec.get(c, "") for c in COLUMNS])
+            if len(batch) >= batch_size:
+                backend.append_rows(batch)
+                n += len(batch)
+                batch = []
+    if batch:
+        backend.append_rows(batch)
+        n += len(batch)
+    return n
+
+def bench(n: int, latency: float, fail_rate: float, max_queue: int, batch_size: int, drop_policy: str) -> dict:
+    """가짜 백엔드로 emit 지연/처리량/드롭 확인."""
+    backend = MemoryBackend(latency=latency, fail_rate=fail_rate, seed=0)
+    sink = EventSink(backend, max_queue=max_queue, batch_size=batch_size, flush_interval=0.2,
+                     max_retries=3, drop_policy=drop_policy)
+    lat = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        sink.put(event_row("tarot_reveal", f"s{i % 97}", mbti="INTJ", tarot="The Fool", i=i))
+        lat.append(time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    sink.flush(timeout=120)
+    drain = time.perf_counter() - t0
+    sink.close()
+    lat.sort()
+    return dict(sink.stats(), backend_calls=backend.calls, drain_seconds=round(drain, 3),
+                emit_p50_us=round(lat[len(lat) // 2] * 1e6, 2), emit_p99_us=round(lat[int(len(lat) * 0.99)] * 1e6, 2),
+                emit_max_us=round(lat[-1] * 1e6, 2))
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="이벤트 로깅 (Google Sheets) 도구")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    u = sub.add_parser("upload", help="file 백엔드 JSONL 을 Sheets 로 올림")
+    u.add_argument("path")
+    u.add_argument("--batch-size", type=int, default=500)
+    b = sub.add_parser("bench", help="가짜 백엔드로 동작/지연 확인")
+    b.add_argument("--n", type=int, default=20000)
+    b.add_argument("--latency", type=float, default=0.3, help="가짜 append_rows 지연(초)")
+    b.add_argument("--fail-rate", type=float, default=0.2, help="가짜 append_rows 실패 확률")
+    b.add_argument("--max-queue", type=int, default=QUEUE_MAX)
+    b.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    b.add_argument("--drop", choices=list(DROP_POLICIES), default=DROP_POLICY)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "upload":
+        print(f"uploaded {upload(args.path, args.batch_size):,} rows → {EVENTS_SHEET}")
+        return 0
+    rep = bench(args.n, args.latency, args.fail_rate, args.max_queue, args.batch_size, args.drop)
+    print(json.dumps(rep, ensure_ascii=False, indent=1))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
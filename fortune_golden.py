@@ -0,0 +1,266 @@
+# fortune_golden.py
+# - 골든 결과 코퍼스: 최적화(stable_seed/pick_one/풀 정리/DB 로드 등) 후에도
+#   사용자에게 보이는 결과가 1글자도 바뀌지 않았는지 확인
+# - generate: 가상 사용자 (이름, 생일, MBTI, 날짜) N명을 seed 로 만들고
+#             compute_fortune() 전체 결과(띠/MBTI/사주/오늘/내일/2026/타로)를 기록
+# - verify:   같은 사용자들을 현재 코드로 다시 계산해서 골든 파일과 비교 (다르면 종료코드 1)
+# - 사용자 i 는 (seed, i) 만으로 만들어짐 → 파일에 사용자 목록을 싣지 않고, 워커가 청크를 직접 생성
+# - 파일 형식: gzip JSON (작게)
+#   {"version", "seed", "count", "start_date", "days", "seed_mode", "sources": {DB: sha256},
+#    "fields": [...], "strings": [문장 표], "rows": [[base_seed, zodiac_year, 문장 인덱스...], ...]}
+#   · 같은 문장은 표에 1번만 (풀 문장이 사용자들 사이에서 반복되므로 수백 MB → 수 MB)
+#
+# 사용:
+#   python fortune_golden.py generate -o golden.json.gz --count 100000 --workers 8
+#   python fortune_golden.py verify golden.json.gz --workers 8
+
+import argparse
+import gzip
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from fortune_db import load_all_dbs
+from fortune_engine import compute_fortune
+from fortune_metrics import set_enabled as set_metrics_enabled
+from fortune_pack import load_pools
+from fortune_schema import MBTI_TYPES
+from fortune_select import DEFAULT_SEED_MODE, SEED_MODES
+
+VERSION = 1
+INT_FIELDS = ("base_seed", "zodiac_year")
+TEXT_FIELDS = (
+    "name", "birth", "mbti", "on_date",
+    "zodiac_key", "zodiac_label", "zodiac_text", "mbti_trait",
+    "saju_text", "today_text", "tomorrow_text", "year_text",
+    "tarot_name", "tarot_meaning", "tarot_image",
+)
+FIELDS = INT_FIELDS + TEXT_FIELDS
+
+_SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+_GIVEN = "민서지현수영준우하윤도예은진호성연유아"
+_LATIN = ("alex", "Sam", "jo", "Kim", "LEE")
+
+# =========================================================
+# 1) 가상 사용자 (seed, i 로 결정)
+# =========================================================
+def make_user(seed: int, i: int, start_date: date, days: int) -> tuple[str, date, str, date]:
+    r = random.Random(f"{seed}:{i}")
+    k = r.random()
+    if k < 0.80:
+        name = r.choice(_SURNAMES) + "".join(r.choice(_GIVEN) for _ in range(r.randint(1, 2)))
+    elif k < 0.92:
+        name = r.choice(_LATIN) + str(r.randrange(100))
+    elif k < 0.97:
+        name = f"  {r.choice(_SURNAMES)}{r.choice(_GIVEN)} "  # 앞뒤 공백 → 화면처럼 정리됨
+    else:
+        name = ""
+    if r.random() < 0.1:
+        # 설날 전후(띠 경계) 집중
+        y = r.randint(1921, 2026)
+        birth = date(y, 1, 15) + timedelta(days=r.randrange(0, 35))
+    else:
+        birth = date(1930, 1, 1) + timedelta(days=r.randrange(0, 35000))
+    mbti = r.choice(MBTI_TYPES)
+    on_date = start_date + timedelta(days=r.randrange(0, max(1, days)))
+    return name, birth, mbti, on_date
+
+# =========================================================
+# 2) 워커: 청크 계산 → (청크 문장 표, 행)
+# =========================================================
+_DBS = None
+
+def _init_worker():
+    global _DBS
+    set_metrics_enabled(False)
+    _DBS = load_all_dbs()
+    load_pools(_DBS)
+
+def result_row(res) -> tuple:
+    t = res.tarot
+    return (
+        res.base_seed, res.zodiac_year,
+        res.name, str(res.birth), res.mbti, str(res.on_date),
+        res.zodiac_key, res.zodiac_label, res.zodiac_text, res.mbti_trait,
+        res.saju_text, res.today_text, res.tomorrow_text, res.year_text,
+        t.name if t else None, t.meaning if t else None, t.image if t else None,
+    )
+
+def _run_chunk(args) -> tuple[list, list]:
+    """(seed, 시작, 개수, 시작 날짜, 일수, seed 방식) → (청크 문장 표, 청크 인덱스 기준 행).
+    청크 안에서 먼저 중복 제거 → 부모로 보내는 양이 적음."""
+    seed, start, count, start_date, days, seed_mode = args
+    if _DBS is None:
+        _init_worker()
+    strings, index, rows = [], {}, []
+    n_int = len(INT_FIELDS)
+    for i in range(start, start + count):
+        name, birth, mbti, on_date = make_user(seed, i, start_date, days)
+        row = result_row(compute_fortune(birth, name, mbti, on_date, _DBS, seed_mode))
+        out = list(row[:n_int])
+        for s in row[n_int:]:
+            j = index.get(s)
+            if j is None:
+                j = index[s] = len(strings)
+                strings.append(s)
+            out.append(j)
+        rows.append(out)
+    return strings, rows
+
+def _run_chunks(tasks: list, workers: int):
+    """청크 결과를 순서대로."""
+    if workers <= 0:
+        _init_worker()
+        yield from map(_run_chunk, tasks)
+        return
+    load_pools(load_all_dbs())  # 부모에서 먼저 풀 팩 최신화
+    with mp.Pool(workers, initializer=_init_worker) as pool:
+        yield from pool.imap(_run_chunk, tasks)
+
+def _tasks(seed, count, start_date, days, seed_mode, chunk_size) -> list:
+    return [
+        (seed, s, min(chunk_size, count - s), start_date, days, seed_mode)
+        for s in range(0, count, chunk_size)
+    ]
+
+def source_digests(dbs) -> dict:
+    """DB 파일별 sha256 (데이터가 바뀐 경우와 코드가 바뀐 경우를 구분하기 위해)."""
+    out = {}
+    for k, p in sorted(dbs["paths"].items()):
+        with open(p, "rb") as f:
+            out[k] = hashlib.sha256(f.read()).hexdigest()
+    return out
+
+# =========================================================
+# 3) generate / verify
+# =========================================================
+def generate(path, *, count: int, seed: int = 0, start_date: date = date(2026, 1, 1), days: int = 400,
+             seed_mode: str | None = None, workers: int = 0, chunk_size: int = 2000, out=sys.stderr) -> dict:
+    seed_mode = seed_mode or DEFAULT_SEED_MODE
+    t0 = time.monotonic()
+    strings, index, rows = [], {}, []
+    n_int = len(INT_FIELDS)
+    for c_strings, c_rows in _run_chunks(_tasks(seed, count, start_date, days, seed_mode, chunk_size), workers):
+        remap = []
+        for s in c_strings:
+            j = index.get(s)
+            if j is None:
+                j = index[s] = len(strings)
+                strings.append(s)
+            remap.append(j)
+        for r in c_rows:
+            rows.append(r[:n_int] + [remap[j] for j in r[n_int:]])
+    golden = {
+        "version": VERSION,
+        "seed": seed,
+        "count": count,
+        "start_date": str(start_date),
+        "days": days,
+        "seed_mode": seed_mode,
+        "sources": source_digests(load_all_dbs()),
+        "fields": list(FIELDS),
+        "strings": strings,
+        "rows": rows,
+    }
+    tmp = f"{path}.tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=9) as f:
+        json.dump(golden, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    print(f"generated {count:,} users, {len(strings):,} unique strings in {time.monotonic() - t0:.1f}s → {path}",
+          file=out)
+    return golden
+
+def load_golden(path) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        golden = json.load(f)
+    if golden.get("version") != VERSION or golden.get("fields") != list(FIELDS):
+        raise ValueError(f"골든 파일 형식이 다릅니다: {path} (다시 generate 하세요)")
+    return golden
+
+def verify(path, *, workers: int = 0, chunk_size: int = 2000, limit: int | None = None,
+           max_report: int = 10, out=sys.stderr) -> int:
+    """현재 코드 결과와 골든 파일 비교. 다른 사용자 수 반환."""
+    g = load_golden(path)
+    t0 = time.monotonic()
+    count = g["count"] if limit is None else min(limit, g["count"])
+    start_date = date.fromisoformat(g["start_date"])
+    g_strings, g_rows = g["strings"], g["rows"]
+    g_index = {s: i for i, s in enumerate(g_strings)}
+    n_int = len(INT_FIELDS)
+
+    changed = [k for k, v in source_digests(load_all_dbs()).items() if g["sources"].get(k) != v]
+    if changed:
+        print(f"주의: 골든 생성 이후 DB 파일이 바뀜 ({', '.join(changed)}) → 결과 차이는 데이터 변경일 수 있음",
+              file=out)
+
+    diffs = 0
+    row_no = 0
+    tasks = _tasks(g["seed"], count, start_date, g["days"], g["seed_mode"], chunk_size)
+    for c_strings, c_rows in _run_chunks(tasks, workers):
+        remap = [g_index.get(s, -1) for s in c_strings]
+        for r in c_rows:
+            exp = g_rows[row_no]
+            got = r[:n_int] + [remap[j] for j in r[n_int:]]
+            if got != exp:
+                diffs += 1
+                if diffs <= max_report:
+                    _report_diff(row_no, exp, r, c_strings, g_strings, out)
+            row_no += 1
+
+    dt = time.monotonic() - t0
+    status = "OK" if not diffs else "MISMATCH"
+    print(f"[{status}] {count:,} users ({g['seed_mode']}), {diffs:,} differ, {dt:.1f}s "
+          f"({count / dt if dt else 0:,.0f} users/s)", file=out)
+    return diffs
+
+def _report_diff(row_no: int, exp: list, got: list, c_strings: list, g_strings: list, out):
+    n_int = len(INT_FIELDS)
+
+    def val(row, k, strings):
+        return row[k] if k < n_int else strings[row[k]]
+
+    user = ", ".join(str(val(exp, FIELDS.index(f), g_strings)) for f in ("name", "birth", "mbti", "on_date"))
+    print(f"  #{row_no} ({user})", file=out)
+    for k, f in enumerate(FIELDS):
+        e, a = val(exp, k, g_strings), val(got, k, c_strings)
+        if e != a:
+            print(f"    {f}: {_short(e)!r} → {_short(a)!r}", file=out)
+
+def _short(v, n: int = 60):
+    return v[:n] + "…" if isinstance(v, str) and len(v) > n else v
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="골든 결과 코퍼스 생성/검증 (결정적 pick 회귀 확인)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    g = sub.add_parser("generate", help="현재 코드 결과로 골든 파일 생성")
+    g.add_argument("-o", "--output", default="golden.json.gz")
+    g.add_argument("--count", type=int, default=100_000)
+    g.add_argument("--seed", type=int, default=0, help="가상 사용자 생성 seed")
+    g.add_argument("--start-date", type=date.fromisoformat, default=date(2026, 1, 1))
+    g.add_argument("--days", type=int, default=400, help="기준 날짜 범위(일) — 사용자마다 이 안에서 고름")
+    g.add_argument("--seed-mode", choices=list(SEED_MODES), default=None,
+                   help="pick seed 방식 (기본: FORTUNE_SEED_MODE 환경변수, 없으면 compat)")
+    v = sub.add_parser("verify", help="현재 코드 결과를 골든 파일과 비교")
+    v.add_argument("golden")
+    v.add_argument("--limit", type=int, default=None, help="앞쪽 N명만 비교 (빠른 확인)")
+    v.add_argument("--max-report", type=int, default=10, help="자세히 출력할 차이 수")
+    for p in (g, v):
+        p.add_argument("--workers", type=int, default=mp.cpu_count(), help="프로세스 수 (0 = 현재 프로세스에서)")
+        p.add_argument("--chunk-size", type=int, default=2000)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "generate":
+        generate(args.output, count=args.count, seed=args.seed, start_date=args.start_date, days=args.days,
+                 seed_mode=args.seed_mode, workers=args.workers, chunk_size=args.chunk_size)
+        return 0
+    diffs = verify(args.golden, workers=args.workers, chunk_size=args.chunk_size, limit=args.limit,
+                   max_report=args.max_report)
+    return 1 if diffs else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
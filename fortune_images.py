@@ -0,0 +1,204 @@
+# fortune_images.py
+# - 타로 이미지 최적화 파이프라인 (오프라인)
+#   · data/tarot_db_ko.json 의 카드 image 경로(+ back.png)가 원본 기준
+#   · 무대 최대 폭 360px 기준 1x/2x/3x 폭의 WebP, 로컬 인코더가 있으면 AVIF 도 생성
+#     (원본보다 큰 폭은 만들지 않음 → 원본 폭으로 대체)
+#   · 결과 목록은 assets/optimized/manifest.json → tarot_ui 가 srcset 으로 사용
+# - 원본 내용 해시를 manifest 에 기록 → 원본이 바뀌면 해당 항목은 자동으로 무시(원본 PNG 사용)
+# - Pillow 필요 (streamlit 의존성으로 설치됨). AVIF: Pillow 내장 AVIF / pillow-avif-plugin / avifenc CLI
+#
+# 사용:
+#   python fortune_images.py build            # 바뀐 것만 다시 생성
+#   python fortune_images.py build --force
+
+import argparse
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from fortune_assets import content_hash
+
+OPT_ROOT = Path("assets/optimized")
+MANIFEST_PATH = OPT_ROOT / "manifest.json"
+STAGE_WIDTH = 360
+WIDTHS = (STAGE_WIDTH, STAGE_WIDTH * 2, STAGE_WIDTH * 3)
+WEBP_QUALITY = 82
+AVIF_QUALITY = 60
+EXTRA_SOURCES = ("assets/tarot/back.png",)
+
+# =========================================================
+# 1) manifest 읽기 (앱용, mtime 기준 캐시)
+# =========================================================
+_LOCK = threading.Lock()
+_MANIFEST = (None, {})  # (mtime_ns, images)
+
+def _load_manifest() -> dict:
+    global _MANIFEST
+    try:
+        mtime = os.stat(MANIFEST_PATH).st_mtime_ns
+    except OSError:
+        return {}
+    if _MANIFEST[0] == mtime:
+        return _MANIFEST[1]
+    with _LOCK:
+        if _MANIFEST[0] != mtime:
+            try:
+                with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+                    images = json.load(f).get("images", {})
+            except (OSError, ValueError):
+                images = {}
+            _MANIFEST = (mtime, images)
+        return _MANIFEST[1]
+
+def image_variants(path) -> dict:
+    """원본 이미지의 최적화 변형 {"webp": [(폭, 경로), ...], "avif": [...]} (폭 오름차순).
+
+    manifest 에 없거나, 원본이 바뀌었거나, 변형 파일이 빠져 있으면 {}.
+    """
+    ent = _load_manifest().get(Path(path).as_posix())
+    if not ent or ent.get("source_hash") != content_hash(path):
+        return {}
+    out = {}
+    for fmt, items in ent.get("variants", {}).items():
+        vs = [(int(v["w"]), v["path"]) for v in items]
+        if vs and all(Path(p).is_file() for _, p in vs):
+            out[fmt] = sorted(vs)
+    return out
+
+# =========================================================
+# 2) 빌드
+# =========================================================
+def _tarot_sources() -> list[str]:
+    """타로 DB 에 들어있는 모든 카드 image 경로(메이저+마이너) + back.png."""
+    from fortune_db import load_all_dbs
+
+    seen = []
+
+    def walk(x):
+        if isinstance(x, dict):
+            img = x.get("image")
+            if isinstance(img, str) and img.strip() and img.strip() not in seen:
+                seen.append(img.strip())
+            for v in x.values():
+                walk(v)
+        elif isinstance(x, list):
+            for v in x:
+                walk(v)
+
+    walk(load_all_dbs()["tarot_db"])
+    for p in EXTRA_SOURCES:
+        if p not in seen:
+            seen.append(p)
+    return seen
+
+def _avif_encoder():
+    """사용 가능한 AVIF 인코더: "pillow" / "avifenc" / None."""
+    from PIL import features
+    try:
+        importlib.import_module("pillow_avif")  # 플러그인 등록
+        return "pillow"
+    except ImportError:
+        pass
+    try:
+        if features.check_module("avif"):  # Pillow 11.2+
+            return "pillow"
+    except ValueError:
+        pass
+    if shutil.which("avifenc"):
+        return "avifenc"
+    return None
+
+def _variant_path(src: str, w: int, fmt: str) -> Path:
+    # assets/tarot/majors/00_the_fool.png → assets/optimized/tarot/majors/00_the_fool.360.webp
+    rel = Path(src).relative_to("assets") if Path(src).parts[0] == "assets" else Path(src)
+    return OPT_ROOT / rel.parent / f"{rel.stem}.{w}.{fmt}"
+
+def _save(im, dst: Path, fmt: str, avif: str | None):
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "webp":
+        im.save(dst, "WEBP", quality=WEBP_QUALITY, method=6)
+    elif avif == "pillow":
+        im.save(dst, "AVIF", quality=AVIF_QUALITY)
+    else:
+        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
+            im.save(tmp.name, "PNG")
+        try:
+            subprocess.run(
+                ["avifenc", "-q", str(AVIF_QUALITY), tmp.name, str(dst)],
+                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+        finally:
+            os.unlink(tmp.name)
+
+def build(force: bool = False, out=sys.stdout) -> dict:
+    from PIL import Image
+
+    avif = _avif_encoder()
+    fmts = ("webp", "avif") if avif else ("webp",)
+    old = {} if force else _load_manifest()
+    images = {}
+    total_src = total_opt = 0
+
+    for src in _tarot_sources():
+        if not Path(src).is_file():
+            print(f"  skip (없음): {src}", file=out)
+            continue
+        digest = content_hash(src)
+        prev = old.get(src)
+        if prev and prev.get("source_hash") == digest and set(prev.get("variants", {})) >= set(fmts) \
+                and all(Path(v["path"]).is_file() for vs in prev["variants"].values() for v in vs):
+            images[src] = prev
+            continue
+
+        with Image.open(src) as im0:
+            im0.load()
+            im = im0.convert("RGBA") if im0.mode in ("P", "LA", "RGBA") else im0.convert("RGB")
+        widths = sorted({min(w, im.width) for w in WIDTHS})
+        variants = {fmt: [] for fmt in fmts}
+        for w in widths:
+            h = round(im.height * w / im.width)
+            resized = im if w == im.width else im.resize((w, h), Image.LANCZOS)
+            for fmt in fmts:
+                dst = _variant_path(src, w, fmt)
+                _save(resized, dst, fmt, avif)
+                variants[fmt].append({"w": w, "path": dst.as_posix(), "bytes": dst.stat().st_size})
+        images[src] = {
+            "source_hash": digest,
+            "width": im.width,
+            "height": im.height,
+            "variants": variants,
+        }
+        src_bytes = Path(src).stat().st_size
+        opt_bytes = variants["webp"][-1]["bytes"]
+        total_src += src_bytes
+        total_opt += opt_bytes
+        print(f"  {src}: {src_bytes:,} → webp {[v['bytes'] for v in variants['webp']]}", file=out)
+
+    manifest = {"version": 1, "stage_width": STAGE_WIDTH, "widths": list(WIDTHS), "images": images}
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_PATH.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, MANIFEST_PATH)
+    print(f"manifest: {len(images)} images, avif={'yes (' + avif + ')' if avif else 'no'}", file=out)
+    if total_src:
+        print(f"rebuilt: {total_src:,} bytes PNG → {total_opt:,} bytes largest WebP", file=out)
+    return manifest
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="타로 이미지 WebP/AVIF 변형 + manifest 생성")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build")
+    b.add_argument("--force", action="store_true", help="manifest 무시하고 전부 다시 생성")
+    args = ap.parse_args(argv)
+    build(force=args.force)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
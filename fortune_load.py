@@ -0,0 +1,348 @@
+# fortune_load.py
+# - 동시 세션 부하 하네스 (오프라인, 리눅스 1대)
+#   · Streamlit AppTest 로 실제 app.py 를 세션마다 실행: 입력 → "운세 보기" → 타로 뽑기
+#   · 세션 N 개를 스레드 C 개로 동시에 돌림 (세션마다 다른 이름/생일/MBTI)
+# - 보고: 단계별 rerun 지연 p50/p95/p99, 처리량(rerun/s, 세션/s), RSS 증가량(세션당)
+# - AppTest.run() 은 실행마다 전역(Runtime 인스턴스, global.appTest 설정)을 바꿨다 되돌려서
+#   스레드끼리 겹치면 서로의 실행을 깨뜨림 → 부하 실행 동안 전역은 1번만 설정하고
+#   세션별 실행만 하는 _SessionAppTest 사용 (Streamlit 1.37 AppTest 내부 구조 기준)
+#   · 내부(private) API 에 기대므로 시작 시 버전 확인 → 1.37.x 가 아니면 RuntimeError
+#     (requirements.txt 의 streamlit==1.37.* 을 올릴 때 _SessionAppTest 를 새 AppTest._run 과 맞출 것)
+#   · 컴파일된 스크립트(ScriptCache)도 실제 서버처럼 세션끼리 공유
+#
+# 사용:
+#   python fortune_load.py --sessions 200 --concurrency 8
+#   python fortune_load.py --sessions 1000 --concurrency 16 -o load.json
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock
+from urllib import parse
+
+from fortune_schema import MBTI_TYPES
+
+APP_PATH = Path(__file__).resolve().parent / "app.py"
+STEPS = ("input", "view", "tarot")
+TESTED_STREAMLIT = "1.37."  # _SessionAppTest/shared_runtime 이 맞춰진 Streamlit 버전
+
+# =========================================================
+# 1) RSS (리눅스 /proc)
+# =========================================================
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class _RssSampler:
+    """백그라운드로 RSS 최대값 추적."""
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.peak = rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="fortune-load-rss", daemon=True)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+# =========================================================
+# 2) 세션 1개
+# =========================================================
+def make_users(n: int, seed: int = 0) -> list[tuple[str, date, str]]:
+    r = random.Random(seed)
+    out = []
+    for i in range(n):
+        birth = date(1950, 1, 1) + timedelta(days=r.randrange(0, 27000))
+        out.append((f"user{i}", birth, r.choice(MBTI_TYPES)))
+    return out
+
+class _DropMissingContext(logging.Filter):
+    def filter(self, record):
+        return "missing ScriptRunContext" not in record.getMessage()
+
+# 모듈 → 하네스가 쓰는 속성 (점으로 이어진 경로)
+_INTERNAL_ATTRS = {
+    "streamlit.runtime": ("Runtime._instance",),
+    "streamlit.runtime.caching.storage.dummy_cache_storage": ("MemoryCacheStorageManager",),
+    "streamlit.runtime.media_file_manager": ("MediaFileManager",),
+    "streamlit.runtime.memory_media_file_storage": ("MemoryMediaFileStorage",),
+    "streamlit.runtime.pages_manager": ("PagesManager",),
+    "streamlit.runtime.scriptrunner.script_cache": ("ScriptCache",),
+    "streamlit.testing.v1": ("AppTest._run",),
+    "streamlit.testing.v1.local_script_runner": ("LocalScriptRunner.run",),
+    "streamlit.testing.v1.util": ("patch_config_options",),
+}
+
+def _has_path(obj, path: str) -> bool:
+    for name in path.split("."):
+        if not hasattr(obj, name):
+            return False
+        obj = getattr(obj, name)
+    return True
+
+def check_streamlit(attrs: dict | None = None):
+    """쓰는 Streamlit 내부 구조(attrs: 모듈 → 속성 경로, 기본 = 부하 하네스)가 있는 버전인지 확인. 아니면 RuntimeError.
+
+    fortune_mem(세션 측정)도 자기 목록으로 같은 확인을 씀.
+    """
+    import streamlit
+
+    if attrs is None:
+        attrs = _INTERNAL_ATTRS
+    ver = streamlit.__version__
+    if not ver.startswith(TESTED_STREAMLIT):
+        raise RuntimeError(
+            f"Streamlit {TESTED_STREAMLIT}x 의 내부 구조에 맞춰져 있음 (설치: {ver}). "
+            f"requirements.txt 버전으로 설치하거나 내부 API 를 쓰는 코드(_SessionAppTest 등)를 새 버전에 맞게 고칠 것"
+        )
+    try:
+        mods = {m: importlib.import_module(m) for m in attrs}
+    except ImportError as e:
+        raise RuntimeError(f"Streamlit {ver}: 내부 모듈 없음 ({e})") from e
+    missing = [
+        f"{m}.{path}" for m, paths in attrs.items() for path in paths
+        if not _has_path(mods[m], path)
+    ]
+    if missing:
+        raise RuntimeError(f"Streamlit {ver}: 내부 속성 없음 ({', '.join(missing)})")
+
+@contextmanager
+def shared_runtime():
+    """부하 실행 동안 AppTest 용 전역(mock Runtime, global.appTest)을 한 번만 설정."""
+    check_streamlit()
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1.util import patch_config_options
+
+    # 위젯 조작(세션 스레드)마다 찍히는 "missing ScriptRunContext" 경고 숨김
+    # (Streamlit 이 실행 중 로그 레벨을 다시 설정하므로 레벨 대신 필터로)
+    ctx_logger = logging.getLogger("streamlit.runtime.scriptrunner.script_run_context")
+    quiet = _DropMissingContext()
+    ctx_logger.addFilter(quiet)
+
+    saved = Runtime._instance
+    mock_runtime = MagicMock(spec=Runtime)
+    mock_runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    mock_runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = mock_runtime
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        Runtime._instance = saved
+        ctx_logger.removeFilter(quiet)
+
+_APP_TEST_CLS = None
+
+def _session_app_test_cls():
+    global _APP_TEST_CLS
+    if _APP_TEST_CLS is not None:
+        return _APP_TEST_CLS
+    from streamlit.runtime.pages_manager import PagesManager
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import AppTest
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    # 실제 서버처럼 모든 세션이 컴파일된 스크립트 1개를 공유
+    # (세션마다 ast.parse 하면 Python 3.11 에서 스레드 동시 파싱 시 SystemError 가 남)
+    script_cache = ScriptCache()
+
+    class _SessionAppTest(AppTest):
+        """AppTest._run 에서 전역 설정/해제를 뺀 버전 (shared_runtime() 안에서만 사용)."""
+
+        def _run(self, widget_state=None, timeout=None):
+            if timeout is None:
+                timeout = self.default_timeout
+            pages_manager = PagesManager(self._script_path, setup_watcher=False)
+            runner = LocalScriptRunner(
+                self._script_path, self.session_state, pages_manager, args=self.args, kwargs=self.kwargs
+            )
+            runner._script_cache = script_cache
+            self._tree = runner.run(widget_state, self.query_params, timeout, self._page_hash)
+            self._tree._runner = self
+            self.query_params = parse.parse_qs(runner.event_data[-1]["client_state"].query_string)
+            return self
+
+    _APP_TEST_CLS = _SessionAppTest
+    return _APP_TEST_CLS
+
+def run_session(user: tuple[str, date, str], timeout: float = 60) -> dict:
+    """입력 → 운세 보기 → 타로 뽑기. 단계별 rerun 지연(초) 반환. shared_runtime() 안에서 호출."""
+    return run_session_app(user, timeout)[1]
+
+def run_session_app(user: tuple[str, date, str], timeout: float = 60):
+    """run_session 과 같고 (AppTest, 지연) 반환 — 세션 상태를 계속 들고 있어야 할 때 (fortune_mem)."""
+    name, birth, mbti = user
+    lat = {}
+    # AppTest.from_file 은 항상 AppTest 를 만들므로 직접 생성
+    at = _session_app_test_cls()(str(APP_PATH), default_timeout=timeout)
+
+    t0 = time.perf_counter()
+    at.run()
+    lat["input"] = time.perf_counter() - t0
+    _check(at, "input")
+
+    at.text_input[0].input(name)
+    at.date_input[0].set_value(birth)
+    at.selectbox[0].set_value(mbti)
+    view = next(b for b in at.button if b.label == "운세 보기")
+    t0 = time.perf_counter()
+    view.click().run()
+    lat["view"] = time.perf_counter() - t0
+    _check(at, "view")
+    if at.session_state.stage != "result":
+        raise RuntimeError("view: 결과 화면으로 가지 않음")
+
+    t0 = time.perf_counter()
+    at.button(key="btn_tarot_draw").click().run()
+    lat["tarot"] = time.perf_counter() - t0
+    _check(at, "tarot")
+    return at, lat
+
+def _check(at, step: str):
+    if at.exception:
+        raise RuntimeError(f"{step}: {at.exception[0].message}")
+
+# =========================================================
+# 3) 부하 실행 / 보고
+# =========================================================
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    v = sorted(values)
+
+    def q(p):
+        return v[min(len(v) - 1, max(0, int(round(p * (len(v) - 1)))))]
+
+    return {
+        "count": len(v),
+        "mean": statistics.fmean(v),
+        "p50": q(0.50),
+        "p95": q(0.95),
+        "p99": q(0.99),
+        "max": v[-1],
+    }
+
+def run_load(sessions: int, concurrency: int, warmup: int = 2, seed: int = 0, out=sys.stderr) -> dict:
+    with shared_runtime():
+        return _run_load(sessions, concurrency, warmup, seed, out)
+
+def _run_load(sessions: int, concurrency: int, warmup: int, seed: int, out) -> dict:
+    users = make_users(sessions + warmup, seed)
+
+    # 워밍업: import / DB 로드 / 풀 팩 / 에셋 캐시 → 측정에서 제외
+    for u in users[:warmup]:
+        run_session(u)
+    users = users[warmup:]
+
+    rss0 = rss_bytes()
+    lat = {s: [] for s in STEPS}
+    errors = []
+    done = 0
+    lock = threading.Lock()
+
+    def one(u):
+        nonlocal done
+        try:
+            r = run_session(u)
+        except Exception as e:  # 세션 하나 실패로 전체 중단 X
+            with lock:
+                errors.append(f"{u[0]}: {e}")
+            return
+        with lock:
+            for s in STEPS:
+                lat[s].append(r[s])
+            done += 1
+            if done % max(1, sessions // 10) == 0:
+                print(f"  {done}/{sessions} sessions", file=out, flush=True)
+
+    t0 = time.perf_counter()
+    with _RssSampler() as rss, ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(one, users))
+    wall = time.perf_counter() - t0
+    rss1 = rss_bytes()
+
+    reruns = sum(len(v) for v in lat.values())
+    all_lat = [x for v in lat.values() for x in v]
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "completed": done,
+        "errors": len(errors),
+        "error_samples": errors[:10],
+        "wall_seconds": wall,
+        "throughput": {
+            "sessions_per_sec": done / wall if wall else 0.0,
+            "reruns_per_sec": reruns / wall if wall else 0.0,
+        },
+        "latency": {"all": _percentiles(all_lat), **{s: _percentiles(lat[s]) for s in STEPS}},
+        "rss": {
+            "start": rss0,
+            "end": rss1,
+            "peak": rss.peak,
+            "growth_per_session": (rss1 - rss0) / done if done else 0.0,
+        },
+    }
+
+def print_report(rep: dict, out=sys.stdout):
+    print(f"sessions={rep['completed']}/{rep['sessions']} concurrency={rep['concurrency']} "
+          f"errors={rep['errors']} wall={rep['wall_seconds']:.1f}s", file=out)
+    tp = rep["throughput"]
+    print(f"throughput: {tp['sessions_per_sec']:.2f} sessions/s, {tp['reruns_per_sec']:.2f} reruns/s", file=out)
+    print(f"{'step':<6} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)", file=out)
+    for step, p in rep["latency"].items():
+        if p.get("count"):
+            print(f"{step:<6} {p['count']:>6} {p['p50'] * 1e3:>9.1f} {p['p95'] * 1e3:>9.1f} "
+                  f"{p['p99'] * 1e3:>9.1f} {p['max'] * 1e3:>9.1f}", file=out)
+    m = rep["rss"]
+    print(f"rss: start={m['start'] / 2**20:.1f}MB end={m['end'] / 2**20:.1f}MB peak={m['peak'] / 2**20:.1f}MB "
+          f"growth/session={m['growth_per_session'] / 1024:.1f}KB", file=out)
+    for e in rep["error_samples"]:
+        print(f"  error: {e}", file=out)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="동시 세션 부하 하네스 (AppTest, 오프라인)")
+    ap.add_argument("--sessions", type=int, default=100)
+    ap.add_argument("--concurrency", type=int, default=8, help="동시 실행 스레드 수")
+    ap.add_argument("--warmup", type=int, default=2, help="측정 전 워밍업 세션 수")
+    ap.add_argument("--seed", type=int, default=0, help="가상 사용자 생성 seed")
+    ap.add_argument("-o", "--output", help="결과 JSON 파일")
+    args = ap.parse_args(argv)
+
+    os.chdir(APP_PATH.parent)  # app.py 는 data/, assets/ 를 상대경로로 읽음
+    rep = run_load(args.sessions, args.concurrency, args.warmup, args.seed)
+    print_report(rep)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rep, f, ensure_ascii=False, indent=1)
+    return 1 if rep["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
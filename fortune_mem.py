@@ -0,0 +1,309 @@
+# fortune_mem.py
+# - 메모리 사용량 진단: 세션 수에 따라 RSS 가 늘 때 무엇이 차지하는지 나눠서 보기
+#   · DB 키별 (load_all_dbs 의 파싱 결과)
+#   · 프로세스 전역 캐시별 (풀, 타로 덱, 음력 설날 표, 결과 캐시, 이벤트 큐)
+#   · 에셋 base64 캐시 항목별 (fortune_assets)
+#   · 세션별 (st.session_state: 전체 + 키별)
+#   · 두 tracemalloc 스냅샷 사이 할당 위치(파일:줄) 상위 N개
+# - 크기 = 객체 그래프(gc.get_referents)를 따라간 합 (타입/모듈/함수/코드는 제외)
+#   · 여러 단위가 같은 객체를 공유하면(intern 된 문장 등) "bytes" 는 각자 전부, "new" 는 앞 단위에서 안 센 것만
+#   · 풀 팩(mmap)은 파일 페이지 캐시라 힙에 안 잡힘 (객체 크기만)
+# - DEBUG_MODE 화면: "메모리(확인용)" expander (측정 / 할당 추적 비교 버튼)
+#   FORTUNE_TRACEMALLOC_FRAMES  할당 위치 추적 깊이 (기본 1)
+#
+# 사용:
+#   python fortune_mem.py report                     # 세션 20개 실행 후 보고
+#   python fortune_mem.py report --sessions 50 --top 20 -o mem.json
+
+import argparse
+import gc
+import json
+import os
+import sys
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from types import BuiltinFunctionType, CodeType, FrameType, FunctionType, MethodType, ModuleType
+
+TRACE_FRAMES = int(os.environ.get("FORTUNE_TRACEMALLOC_FRAMES", "1"))
+
+# =========================================================
+# 1) 객체 그래프 크기
+# =========================================================
+_SKIP = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType, CodeType, FrameType)
+
+def deep_sizeof(obj, seen: set | None = None, exclude=frozenset()) -> int:
+    """obj 에서 닿는 객체들의 sys.getsizeof 합.
+
+    - seen: 이미 센 id (세지 않음). 센 id 를 여기에 추가
+    - exclude: 세지도 따라가지도 않을 id (바꾸지 않음)
+    """
+    if seen is None:
+        seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        i = id(o)
+        if i in seen or i in exclude or isinstance(o, _SKIP):
+            continue
+        seen.add(i)
+        total += sys.getsizeof(o)
+        stack.extend(gc.get_referents(o))
+    return total
+
+def _breakdown(items, seen: set) -> dict:
+    """[(이름, 객체)] → {이름: {"bytes": 단독 크기, "new": 앞 항목들과 겹치지 않는 크기}}."""
+    out = {}
+    for name, obj in items:
+        out[name] = {"bytes": deep_sizeof(obj), "new": deep_sizeof(obj, seen)}
+    return out
+
+# =========================================================
+# 2) 항목별 크기
+# =========================================================
+def db_breakdown(dbs, seen: set | None = None) -> dict:
+    """load_all_dbs() 의 DB 키별 크기."""
+    return _breakdown(((k, v) for k, v in dbs.items() if k != "paths"), set() if seen is None else seen)
+
+def _process_caches(dbs):
+    import fortune_cache
+    import fortune_events
+    from fortune_engine import lny_table, tarot_deck
+    from fortune_pack import load_pools
+
+    yield "pools", load_pools(dbs)
+    yield "tarot_deck", tarot_deck(dbs["tarot_db"])
+    yield "lny_table", lny_table(dbs["lunar_lny"])
+    # 아직 안 만든 캐시는 여기서 만들지 않음
+    if fortune_cache._CACHE is not None:
+        yield "result_cache", fortune_cache._CACHE
+    if fortune_events._SINK is not None:
+        yield "event_sink", fortune_events._SINK
+
+def cache_breakdown(dbs, seen: set | None = None) -> dict:
+    """프로세스 전역 캐시별 크기. seen 에 DB 를 먼저 세어 두면 "new" 는 DB 와 공유하지 않는 부분."""
+    return _breakdown(_process_caches(dbs), set() if seen is None else seen)
+
+def asset_breakdown() -> dict:
+    from fortune_assets import asset_cache_entries
+
+    entries = asset_cache_entries()
+    return {"entries": entries, "bytes": sum(e["bytes"] for e in entries)}
+
+def session_breakdown(states: dict, shared: set | None = None) -> dict:
+    """{세션 id: SessionState} → 세션별 {"bytes", "keys": {키: 크기}}.
+
+    shared: 세지 않을 객체 id (DB/캐시 측정에서 나온 seen — 공유 문장/결과가 세션에 잡히지 않게)
+    """
+    shared = shared or frozenset()
+    out = {}
+    for sid, state in states.items():
+        try:
+            filtered = state.filtered_state
+        except Exception:  # 위젯 메타데이터가 비어 있는 순간 등
+            filtered = {}
+        keys = {k: deep_sizeof(v, exclude=shared) for k, v in filtered.items()}
+        out[sid] = {"bytes": deep_sizeof(state, exclude=shared), "keys": keys}
+    return out
+
+# 세션 목록/현재 세션 상태는 Streamlit 내부(private) API → fortune_load 와 같은 버전 확인을 통과할 때만
+_SESSION_INTERNALS = {
+    "streamlit.runtime": ("Runtime.exists", "Runtime.instance"),
+    "streamlit.runtime.state": ("get_session_state",),
+}
+_SESSION_OK = None
+
+def session_internals_ok() -> bool:
+    """세션별 측정에 쓰는 Streamlit 내부 구조가 있는 버전인지 (프로세스당 1회 확인, 아니면 stderr 로 1번 알림)."""
+    global _SESSION_OK
+    if _SESSION_OK is None:
+        from fortune_load import check_streamlit
+
+        try:
+            check_streamlit(_SESSION_INTERNALS)
+            _SESSION_OK = True
+        except RuntimeError as e:
+            print(f"fortune_mem: 세션별 메모리 측정 생략 — {e}", file=sys.stderr)
+            _SESSION_OK = False
+    return _SESSION_OK
+
+def live_sessions() -> dict:
+    """실행 중인 Streamlit 서버의 세션 {id: SessionState} (서버 밖 / 확인 안 된 버전이면 {})."""
+    if not session_internals_ok():
+        return {}
+    try:
+        from streamlit.runtime import Runtime
+
+        if not Runtime.exists():
+            return {}
+        infos = Runtime.instance()._session_mgr.list_sessions()
+        return {i.session.id: i.session.session_state for i in infos}
+    except Exception:  # 인스턴스 속성(_session_mgr 등)까지는 버전 확인으로 못 봄
+        return {}
+
+def current_session(sid: str) -> dict:
+    """현재 스크립트 실행의 세션 {sid: SessionState} (AppTest 처럼 서버 세션 목록이 없을 때, 확인 안 된 버전이면 {})."""
+    if not session_internals_ok():
+        return {}
+    from streamlit.runtime.state import get_session_state
+
+    return {sid: get_session_state()}
+
+def rss_bytes() -> int:
+    from fortune_load import rss_bytes as _rss
+
+    return _rss()
+
+def memory_report(dbs, sessions: dict | None = None) -> dict:
+    """DB → 캐시 → 에셋 → 세션 순으로 측정 (앞에서 센 객체는 뒤의 "new"/세션 크기에서 빠짐)."""
+    gc.collect()
+    seen = set()
+    return {
+        "rss": rss_bytes(),
+        "dbs": db_breakdown(dbs, seen),
+        "caches": cache_breakdown(dbs, seen),
+        "assets": asset_breakdown(),
+        "sessions": session_breakdown(sessions or {}, seen),
+        "tracemalloc": tracing_status(),
+    }
+
+# =========================================================
+# 3) tracemalloc (할당 위치)
+# =========================================================
+_TRACE_LOCK = threading.Lock()
+_BASELINE = None
+
+_TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+def start_tracing(frames: int = TRACE_FRAMES):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+
+def top_sites(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int = 15) -> list[dict]:
+    """두 스냅샷 사이 증가량 상위 할당 위치."""
+    stats = after.compare_to(before, "lineno")
+    stats.sort(key=lambda s: s.size_diff, reverse=True)
+    out = []
+    for s in stats[:limit]:
+        fr = s.traceback[0]
+        out.append({
+            "site": f"{fr.filename}:{fr.lineno}",
+            "size_diff": s.size_diff,
+            "count_diff": s.count_diff,
+            "size": s.size,
+        })
+    return out
+
+def mark(limit: int = 15) -> list[dict]:
+    """이전 mark() 이후 할당 증가 상위 위치 (첫 호출은 추적 시작 + 기준만 잡고 [])."""
+    global _BASELINE
+    with _TRACE_LOCK:
+        start_tracing()
+        snap = take_snapshot()
+        prev, _BASELINE = _BASELINE, snap
+    return [] if prev is None else top_sites(prev, snap, limit)
+
+def tracing_status() -> dict:
+    if not tracemalloc.is_tracing():
+        return {"tracing": False}
+    cur, peak = tracemalloc.get_traced_memory()
+    return {"tracing": True, "frames": tracemalloc.get_traceback_limit(), "current": cur, "peak": peak}
+
+# =========================================================
+# 4) 보고
+# =========================================================
+def _kb(n: int) -> str:
+    return f"{n / 1024:,.1f}KB"
+
+def print_report(rep: dict, out=sys.stdout):
+    print(f"rss={rep['rss'] / 2**20:.1f}MB", file=out)
+    for title in ("dbs", "caches"):
+        print(f"\n[{title}] {'bytes':>12} {'new':>12}", file=out)
+        for name, r in rep[title].items():
+            print(f"  {name:<18} {_kb(r['bytes']):>12} {_kb(r['new']):>12}", file=out)
+    a = rep["assets"]
+    print(f"\n[assets] {len(a['entries'])} entries, {_kb(a['bytes'])}", file=out)
+    for e in sorted(a["entries"], key=lambda e: -e["bytes"])[:10]:
+        print(f"  {e['path']:<56} {_kb(e['bytes']):>12}", file=out)
+    s = rep["sessions"]
+    if s:
+        sizes = sorted(v["bytes"] for v in s.values())
+        print(f"\n[sessions] {len(s)} sessions, mean {_kb(sum(sizes) // len(sizes))}, max {_kb(sizes[-1])}", file=out)
+        keys = {}
+        for v in s.values():
+            for k, n in v["keys"].items():
+                keys[k] = keys.get(k, 0) + n
+        for k, n in sorted(keys.items(), key=lambda kv: -kv[1])[:10]:
+            print(f"  {k:<24} mean {_kb(n // len(s)):>10}", file=out)
+    for title, sites in rep.get("sites", {}).items():
+        print(f"\n[top allocation sites: {title}]", file=out)
+        for x in sites:
+            print(f"  {_kb(x['size_diff']):>12} {x['count_diff']:>+8,}  {x['site']}", file=out)
+
+def run_report(sessions: int, concurrency: int, top: int, seed: int = 0, out=sys.stderr) -> dict:
+    """DB 로드 / 세션 실행 각각의 할당 증가 + 세션을 붙잡은 상태에서 항목별 크기."""
+    from fortune_db import load_all_dbs
+    from fortune_load import make_users, run_session_app, shared_runtime
+
+    start_tracing()
+    s0 = take_snapshot()
+    dbs = load_all_dbs()
+    list(_process_caches(dbs))  # 풀/덱 준비
+    s1 = take_snapshot()
+
+    with shared_runtime():
+        # 첫 세션은 import/스크립트 컴파일/에셋 캐시 → 세션 증가분에서 제외
+        print("warmup session", file=out, flush=True)
+        warm = run_session_app(make_users(1, seed + 1)[0])[0]
+        s2 = take_snapshot()
+        print(f"{sessions} sessions (concurrency {concurrency})", file=out, flush=True)
+        with ThreadPoolExecutor(max_workers=concurrency) as ex:
+            apps = [at for at, _ in ex.map(run_session_app, make_users(sessions, seed))]
+        s3 = take_snapshot()
+
+    states = {f"session{i}": at.session_state._state for i, at in enumerate(apps, 1)}
+    rep = memory_report(dbs, states)
+    rep["sites"] = {
+        "load dbs + pools": top_sites(s0, s1, top),
+        "first session": top_sites(s1, s2, top),
+        f"{sessions} sessions": top_sites(s2, s3, top),
+    }
+    rep["session_growth"] = (sum(st.size for st in s3.statistics("filename"))
+                             - sum(st.size for st in s2.statistics("filename"))) / max(1, sessions)
+    del warm, apps
+    return rep
+
+def main(argv=None) -> int:
+    from fortune_load import APP_PATH
+
+    ap = argparse.ArgumentParser(description="메모리 사용량 진단 (tracemalloc + 객체 그래프 크기)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("report", help="DB/캐시/에셋/세션별 크기 + 할당 위치 상위")
+    r.add_argument("--sessions", type=int, default=20)
+    r.add_argument("--concurrency", type=int, default=4)
+    r.add_argument("--top", type=int, default=15, help="할당 위치 상위 N개")
+    r.add_argument("--seed", type=int, default=0, help="가상 사용자 생성 seed")
+    r.add_argument("-o", "--output", help="결과 JSON 파일")
+    args = ap.parse_args(argv)
+
+    os.chdir(APP_PATH.parent)  # app.py 는 data/, assets/ 를 상대경로로 읽음
+    rep = run_report(args.sessions, args.concurrency, args.top, args.seed)
+    print_report(rep)
+    print(f"\ntraced growth per session: {_kb(int(rep['session_growth']))}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rep, f, ensure_ascii=False, indent=1, default=str)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+# fortune_metrics.py
+# - rerun 구간별 소요시간 히스토그램 + 카운터 (프로세스 전역, 스레드 안전)
+#   · 히스토그램: 누적 버킷/합계/개수 + 최근 N개 표본의 p50/p95/p99
+#   · 카운터: stage 별 rerun 수 등
+#   · 페이로드: stage × 요소(st.markdown/components.html 묶음) 별 출력 바이트
+# - Prometheus 텍스트 형식으로 내보내기 (환경변수)
+#   FORTUNE_METRICS           0 이면 수집 안 함 (기본 1)
+#   FORTUNE_METRICS_FILE      주기적으로 이 파일에 기록 (node_exporter textfile collector 등)
+#   FORTUNE_METRICS_INTERVAL  파일 기록 간격(초, 기본 15)
+#   FORTUNE_METRICS_PORT      지정하면 http://{호스트}:{포트}/metrics 로 제공 (인증 없음)
+#   FORTUNE_METRICS_HOST      바인드 주소 (기본 127.0.0.1; 외부 수집기에 열 때만 0.0.0.0 등으로)
+#   FORTUNE_METRICS_WINDOW    분위수 계산용 최근 표본 수 (기본 2048)
+#
+#   from fortune_metrics import SECTION, timed
+#   with timed(SECTION, "load_dbs"):
+#       ...
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.environ.get("FORTUNE_METRICS", "1") != "0"
+METRICS_FILE = os.environ.get("FORTUNE_METRICS_FILE", "").strip()
+METRICS_INTERVAL = float(os.environ.get("FORTUNE_METRICS_INTERVAL", "15"))
+METRICS_PORT = int(os.environ.get("FORTUNE_METRICS_PORT", "0") or 0)
+METRICS_HOST = os.environ.get("FORTUNE_METRICS_HOST", "").strip() or "127.0.0.1"
+WINDOW = int(os.environ.get("FORTUNE_METRICS_WINDOW", "2048"))
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# =========================================================
+# 1) 메트릭 종류
+# =========================================================
+class Histogram:
+    """레이블 1개짜리 히스토그램 (초 단위)."""
+
+    def __init__(self, name: str, help_: str, label: str):
+        self.name = name
+        self.help = help_
+        self.label = label
+        self._lock = threading.Lock()
+        self._series = {}  # 레이블 값 -> [버킷별 개수, 합계, 개수, 최근 표본 deque]
+
+    def observe(self, label_value: str, seconds: float):
+        with self._lock:
+            s = self._series.get(label_value)
+            if s is None:
+                s = self._series[label_value] = [[0] * (len(BUCKETS) + 1), 0.0, 0, deque(maxlen=WINDOW)]
+            s[0][bisect_left(BUCKETS, seconds)] += 1
+            s[1] += seconds
+            s[2] += 1
+            s[3].append(seconds)
+
+    def snapshot(self) -> dict:
+        """{레이블 값: {"count", "sum", "buckets", "p50", "p95", "p99"}}."""
+        with self._lock:
+            items = [(k, list(b), total, n, sorted(w)) for k, (b, total, n, w) in self._series.items()]
+        out = {}
+        for k, b, total, n, w in items:
+            ent = {"count": n, "sum": total, "buckets": b}
+            for q in QUANTILES:
+                ent[f"p{round(q * 100)}"] = _quantile(w, q)
+            out[k] = ent
+        return out
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        summary = [f"# HELP {self.name}_window {self.help} (최근 {WINDOW}개 분위수)",
+                   f"# TYPE {self.name}_window summary"]
+        for k, ent in sorted(self.snapshot().items()):
+            lv = _label_value(k)
+            acc = 0
+            for le, c in zip(BUCKETS + (float("inf"),), ent["buckets"]):
+                acc += c
+                le_s = "+Inf" if le == float("inf") else repr(le)
+                lines.append(f'{self.name}_bucket{{{self.label}="{lv}",le="{le_s}"}} {acc}')
+            lines.append(f'{self.name}_sum{{{self.label}="{lv}"}} {ent["sum"]:.9f}')
+            lines.append(f'{self.name}_count{{{self.label}="{lv}"}} {ent["count"]}')
+            for q in QUANTILES:
+                v = ent[f"p{round(q * 100)}"]
+                summary.append(f'{self.name}_window{{{self.label}="{lv}",quantile="{q}"}} {v:.9f}')
+        return lines + summary
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+class Counter:
+    """레이블 1개짜리 카운터."""
+
+    def __init__(self, name: str, help_: str, label: str):
+        self.name = name
+        self.help = help_
+        self.label = label
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, label_value: str, n: int = 1):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for k, v in sorted(self.snapshot().items()):
+            lines.append(f'{self.name}{{{self.label}="{_label_value(k)}"}} {v}')
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+class PayloadStats:
+    """(stage, 요소) 별 출력 바이트: 호출 수 / 합계 / 최대."""
+
+    def __init__(self, name: str, help_: str):
+        self.name = name
+        self.help = help_
+        self._lock = threading.Lock()
+        self._values = {}  # (stage, element) -> [calls, bytes, max]
+
+    def add(self, stage: str, element: str, nbytes: int):
+        with self._lock:
+            v = self._values.get((stage, element))
+            if v is None:
+                v = self._values[(stage, element)] = [0, 0, 0]
+            v[0] += 1
+            v[1] += nbytes
+            if nbytes > v[2]:
+                v[2] = nbytes
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {k: tuple(v) for k, v in self._values.items()}
+
+    def top(self, stage: str | None = None, n: int = 10) -> list[dict]:
+        """바이트 합계 큰 순 [{"stage","element","calls","bytes","max"}]."""
+        rows = [
+            {"stage": st_, "element": el, "calls": c, "bytes": b, "max": m}
+            for (st_, el), (c, b, m) in self.snapshot().items()
+            if stage is None or st_ == stage
+        ]
+        rows.sort(key=lambda r: r["bytes"], reverse=True)
+        return rows[:n]
+
+    def render(self) -> list[str]:
+        snap = sorted(self.snapshot().items())
+        lines = [f"# HELP {self.name}_total {self.help}", f"# TYPE {self.name}_total counter"]
+        for (st_, el), (_, b, _) in snap:
+            lines.append(f'{self.name}_total{{stage="{_label_value(st_)}",element="{_label_value(el)}"}} {b}')
+        lines += [f"# HELP {self.name}_calls_total 출력 호출 수", f"# TYPE {self.name}_calls_total counter"]
+        for (st_, el), (c, _, _) in snap:
+            lines.append(f'{self.name}_calls_total{{stage="{_label_value(st_)}",element="{_label_value(el)}"}} {c}')
+        lines += [f"# HELP {self.name}_max 1회 출력 최대 바이트", f"# TYPE {self.name}_max gauge"]
+        for (st_, el), (_, _, m) in snap:
+            lines.append(f'{self.name}_max{{stage="{_label_value(st_)}",element="{_label_value(el)}"}} {m}')
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+def _quantile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[i]
+
+def _label_value(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# =========================================================
+# 2) 앱 공용 메트릭
+# =========================================================
+SECTION = Histogram("fortune_section_seconds", "rerun 구간별 소요시간", "section")
+PICK = Histogram("fortune_pick_seconds", "compute_fortune pick 별 소요시간", "pick")
+ASSET_READ = Histogram("fortune_asset_read_seconds", "에셋 base64 읽기 소요시간", "kind")
+EMIT = Histogram("fortune_emit_seconds", "st.markdown/components.html 출력 소요시간", "element")
+DB_RELOAD = Histogram("fortune_db_reload_seconds", "DB 핫 리로드(파싱+검증+풀 준비) 소요시간", "result")
+EVENT_FLUSH = Histogram("fortune_event_flush_seconds", "이벤트 배치 전송(append_rows) 소요시간", "backend")
+RERUNS = Counter("fortune_reruns_total", "stage 별 스크립트 rerun 수 (<stage>/fragment: fragment 단독 rerun)", "stage")
+EVENTS = Counter("fortune_events_total", "이벤트 로깅 결과 (enqueued/dropped/written/failed/retried)", "result")
+PAYLOAD = PayloadStats("fortune_payload_bytes", "stage/요소 별 st.markdown·components.html 출력 바이트")
+
+REGISTRY = [SECTION, PICK, ASSET_READ, EMIT, DB_RELOAD, EVENT_FLUSH, RERUNS, EVENTS, PAYLOAD]
+
+@contextmanager
+def timed(hist: Histogram, label_value: str):
+    """with 블록(또는 데코레이터)의 소요시간을 hist 에 기록."""
+    if not ENABLED:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        hist.observe(label_value, time.perf_counter() - t0)
+
+def observe(hist: Histogram, label_value: str, seconds: float):
+    if ENABLED:
+        hist.observe(label_value, seconds)
+
+def inc(counter: Counter, label_value: str, n: int = 1):
+    if ENABLED:
+        counter.inc(label_value, n)
+
+def add_payload(stage: str, element: str, body: str) -> int:
+    """출력 본문 바이트(UTF-8) 기록. 기록한 바이트 수 반환."""
+    if not ENABLED:
+        return 0
+    n = len(body.encode("utf-8"))
+    PAYLOAD.add(stage, element, n)
+    return n
+
+def set_enabled(on: bool):
+    """수집 on/off (배치 워커 등 화면이 없는 곳에서 끔)."""
+    global ENABLED
+    ENABLED = bool(on)
+
+def render_prometheus() -> str:
+    lines = []
+    for m in REGISTRY:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path) -> None:
+    """원자적으로 기록 (textfile collector 가 반쯤 쓴 파일을 읽지 않게)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+
+def reset():
+    for m in REGISTRY:
+        m.clear()
+
+# =========================================================
+# 3) 내보내기 (파일 / 포트)
+# =========================================================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    server_version = "fortune-metrics"
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            return self.send_error(404)
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_EXPORTER = None
+_EXPORTER_LOCK = threading.Lock()
+
+def _file_loop(path: str, interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            write_prometheus(path)
+        except OSError:
+            pass
+
+def start_exporter():
+    """프로세스당 1회: FORTUNE_METRICS_FILE/PORT 설정에 따라 백그라운드 내보내기 시작.
+    포트가 이미 쓰이면 그대로 둠."""
+    global _EXPORTER
+    if _EXPORTER is not None:
+        return _EXPORTER
+    with _EXPORTER_LOCK:
+        if _EXPORTER is not None:
+            return _EXPORTER
+        started = []
+        if ENABLED and METRICS_FILE:
+            threading.Thread(
+                target=_file_loop, args=(METRICS_FILE, METRICS_INTERVAL), name="fortune-metrics-file", daemon=True
+            ).start()
+            started.append("file")
+        if ENABLED and METRICS_PORT:
+            try:
+                srv = ThreadingHTTPServer((METRICS_HOST, METRICS_PORT), _MetricsHandler)
+            except OSError:
+                srv = None
+            if srv is not None:
+                srv.daemon_threads = True
+                threading.Thread(target=srv.serve_forever, name="fortune-metrics", daemon=True).start()
+                started.append("port")
+        _EXPORTER = tuple(started)
+        return _EXPORTER
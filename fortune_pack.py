@@ -0,0 +1,319 @@
+# fortune_pack.py
+# - 풀 팩(pool pack): data/*.json 의 문장 풀을 "정리 완료된 UTF-8 + 풀별 오프셋 표"로 컴파일한 바이너리
+# - 앱은 팩을 mmap 으로 열고, pick 된 한 줄만 디코딩 (렌더마다 정규식 정리 X)
+# - 같은 호스트의 여러 워커 프로세스가 같은 페이지 캐시를 공유
+# - 문장은 팩 전체에서 1번만 저장 (fortune_strings: 내용 기준 표), 풀은 문자열 id 표만 가짐
+#   (띠 items ↔ 띠 today/tomorrow/year/advice 처럼 여러 풀에 있는 문장도 1벌)
+# - 팩이 없거나 원본 JSON 과 다르면: 1회 자동 빌드 시도 → 실패 시 메모리 정리본 사용
+#
+# 사용:
+#   python fortune_pack.py build         # data/pools.pack 생성
+#   python fortune_pack.py info          # 풀 목록/줄 수/신선도 확인
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+
+from fortune_schema import PoolAccessors, resolve_schema
+from fortune_strings import IdPool, StringTable, id_array
+from fortune_text import clean_pool
+
+PACK_PATH = Path("data/pools.pack")
+PACK_MAGIC = b"FPACK\x00\x00\x01"
+# 정리 규칙(fortune_text 의 CLEAN_* 파이프라인)이나 풀 구성(fortune_schema)이 바뀌면 올릴 것
+# → 기존 팩은 자동으로 stale 처리
+PACK_VERSION = 3
+
+# =========================================================
+# 1) 풀 정리 (구조 해석은 fortune_schema, 정리는 fortune_text 파이프라인)
+# =========================================================
+def build_pools(dbs) -> tuple[dict, dict]:
+    """dbs → ({풀 이름: [정리된 문장]}, meta).
+
+    풀 이름 (fortune_schema 의 *_pool_name):
+    - zodiac/<띠키>[/<분류>]         (띠 운세, 분류: today/tomorrow/year/advice ...)
+    - saju/element/<i>[/<주제>]      (사주: elements[i].pools)         meta["saju_elements"] = len(elements)
+    - saju/saju                      (사주: 구버전 pools.saju)          meta["saju_elements"] = 0
+    - today / tomorrow / year_all
+    - mbti/<유형>                    (MBTI 특징 1문장)
+    meta["problems"]: 해석 중 발견한 문제 (fortune_schema.resolve_schema)
+    """
+    schema = resolve_schema(dbs)
+    pools = {}
+    for name, (raw, pipeline) in schema.pools.items():
+        pools[name] = list(raw) if pipeline is None else clean_pool(raw, pipeline)
+    meta = dict(schema.meta, problems=list(schema.problems))
+    return pools, meta
+
+def intern_pools(pools: dict) -> tuple[StringTable, dict]:
+    """{풀 이름: [문장]} → (문자열 표, {풀 이름: id 배열}). 같은 문장은 표에 1번만."""
+    table = StringTable()
+    return table, {name: id_array(map(table.add, lines)) for name, lines in pools.items()}
+
+def _string_stats(kind: str, pools: dict, table: StringTable, size) -> dict:
+    """풀 전체 중복 제거 통계. size: 문자열 1개 크기 (팩=UTF-8 바이트, 메모리=객체 크기)."""
+    before = sum(size(s) for lines in pools.values() for s in lines)
+    after = sum(map(size, table.strings))
+    return {
+        "kind": kind,
+        "lines": sum(map(len, pools.values())),
+        "unique": len(table),
+        "bytes_before": before,
+        "bytes_after": after,
+        "saved": before - after,
+    }
+
+# =========================================================
+# 2) 원본 지문 (팩 신선도 판단)
+# - mtime 은 git clone/배포 때마다 바뀌므로 size + sha256 사용
+# =========================================================
+_SOURCE_KEYS = ("zodiac", "saju", "today", "tomorrow", "year", "mbti")
+
+def _file_digest(path: str) -> list:
+    p = Path(path)
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return [str(p), p.stat().st_size, h.hexdigest()]
+
+def source_digests(dbs) -> dict:
+    paths = dbs["paths"]
+    return {k: _file_digest(paths[k]) for k in _SOURCE_KEYS}
+
+# =========================================================
+# 3) 팩 파일 형식
+#   [magic 8B][header_len u32][header JSON][pad → 8B 정렬]
+#   [문자열 오프셋 표 u32 × (고유 문장 수+1)] [풀별 id 표 u32 × count] ... [문자열 blob]
+#   header = {"version", "sources", "meta", "strings": [오프셋표 위치, 고유 문장 수], "string_stats",
+#             "blob": 위치, "pools": {이름: [id표 위치, count]}}
+#   풀의 i 번째 문장 = blob[off[id[i]]:off[id[i]+1]]
+# =========================================================
+def write_pack(pools: dict, meta: dict, sources: dict, out_path=PACK_PATH) -> Path:
+    out_path = Path(out_path)
+    table, ids = intern_pools(pools)
+    blob = bytearray()
+    offs = [0]
+    for s in table.strings:
+        blob += s.encode("utf-8")
+        offs.append(len(blob))
+    if len(blob) >= 1 << 32:
+        raise ValueError("풀 팩 문자열 크기가 4GB 를 넘습니다.")
+    stats = _string_stats("pack", pools, table, lambda s: len(s.encode("utf-8")))
+
+    def _header(table_base):
+        pos = table_base + 4 * len(offs)
+        dir_ = {}
+        for name, arr in ids.items():
+            dir_[name] = [pos, len(arr)]
+            pos += 4 * len(arr)
+        return {
+            "version": PACK_VERSION,
+            "sources": sources,
+            "meta": meta,
+            "strings": [table_base, len(table)],
+            "string_stats": stats,
+            "blob": pos,
+            "pools": dir_,
+        }
+
+    # header 길이가 오프셋 숫자 자릿수에 따라 변하므로 고정점까지 2회 계산
+    base = 0
+    for _ in range(4):
+        hdr = json.dumps(_header(base), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        new_base = _align8(len(PACK_MAGIC) + 4 + len(hdr))
+        if new_base == base:
+            break
+        base = new_base
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(f"{out_path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(PACK_MAGIC)
+        f.write(struct.pack("<I", len(hdr)))
+        f.write(hdr)
+        f.write(b"\x00" * (base - len(PACK_MAGIC) - 4 - len(hdr)))
+        f.write(struct.pack(f"<{len(offs)}I", *offs))
+        for arr in ids.values():
+            f.write(struct.pack(f"<{len(arr)}I", *arr))
+        f.write(blob)
+    os.replace(tmp, out_path)  # 읽는 쪽은 항상 완성된 파일만 봄
+    return out_path
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+def build_pack(dbs, out_path=PACK_PATH) -> Path:
+    pools, meta = build_pools(dbs)
+    return write_pack(pools, meta, source_digests(dbs), out_path)
+
+# =========================================================
+# 4) 읽기 (mmap)
+# =========================================================
+class PackPool(Sequence):
+    """팩 안의 풀 1개. len/인덱싱만 하고, 인덱싱한 줄만 디코딩."""
+    __slots__ = ("_mm", "_table", "_strings", "_blob", "_n")
+
+    def __init__(self, mm, table_pos: int, strings_pos: int, blob_pos: int, n: int):
+        self._mm = mm
+        self._table = table_pos
+        self._strings = strings_pos
+        self._blob = blob_pos
+        self._n = n
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("pool index out of range")
+        (sid,) = struct.unpack_from("<I", self._mm, self._table + 4 * i)
+        a, b = struct.unpack_from("<II", self._mm, self._strings + 4 * sid)
+        return self._mm[self._blob + a:self._blob + b].decode("utf-8")
+
+class PoolPack(PoolAccessors):
+    """mmap 으로 연 풀 팩."""
+
+    def __init__(self, path=PACK_PATH):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(PACK_MAGIC)] != PACK_MAGIC:
+            raise ValueError(f"풀 팩 형식이 아닙니다: {self.path}")
+        (hlen,) = struct.unpack_from("<I", self._mm, len(PACK_MAGIC))
+        start = len(PACK_MAGIC) + 4
+        hdr = json.loads(self._mm[start:start + hlen].decode("utf-8"))
+        self.version = hdr.get("version")
+        self.sources = hdr.get("sources", {})
+        self.meta = hdr.get("meta", {})
+        self.string_stats = hdr.get("string_stats")
+        blob = hdr["blob"]
+        strings = hdr["strings"][0]
+        self._pools = {name: PackPool(self._mm, pos, strings, blob, n) for name, (pos, n) in hdr["pools"].items()}
+        self._index_pools()
+
+    def pool(self, name: str):
+        return self._pools.get(name, ())
+
+    def names(self):
+        return list(self._pools)
+
+    def is_fresh(self, dbs) -> bool:
+        if self.version != PACK_VERSION:
+            return False
+        paths = dbs["paths"]
+        for k in _SOURCE_KEYS:
+            rec = self.sources.get(k)
+            if not rec or rec[0] != str(Path(paths[k])):
+                return False
+            try:
+                if os.stat(rec[0]).st_size != rec[1]:
+                    return False
+            except OSError:
+                return False
+        return self.sources == source_digests(dbs)
+
+class MemoryPools(PoolAccessors):
+    """팩을 쓸 수 없을 때: 같은 인터페이스의 메모리 정리본 (스냅샷당 1회 정리, 문장은 표에 1벌)."""
+
+    def __init__(self, dbs):
+        pools, meta = build_pools(dbs)
+        self.meta = meta
+        table, ids = intern_pools(pools)
+        self.string_stats = _string_stats("memory", pools, table, sys.getsizeof)
+        strings = tuple(table.strings)
+        self._pools = {k: IdPool(strings, v) for k, v in ids.items()}
+        self._index_pools()
+
+    def pool(self, name: str):
+        return self._pools.get(name, ())
+
+    def names(self):
+        return list(self._pools)
+
+# =========================================================
+# 5) 앱용 진입점 (프로세스 전역, DB 스냅샷 단위 캐시)
+# =========================================================
+_LOCK = threading.Lock()
+_CURRENT = None   # (dbs, pools)
+_PREVIOUS = None  # 직전 스냅샷 — 핫 리로드 직후 이전 스냅샷으로 진행 중인 rerun 이 팩을 되돌려 빌드하지 않게
+
+def load_pools(dbs, pack_path=PACK_PATH, auto_build: bool = True):
+    """dbs 스냅샷에 대응하는 정리된 풀 (PoolPack 또는 MemoryPools).
+
+    load_all_dbs() 가 같은 객체를 돌려주는 동안은 캐시된 결과를 그대로 반환합니다.
+    """
+    global _CURRENT, _PREVIOUS
+    cur = _CURRENT
+    if cur is not None and cur[0] is dbs:
+        return cur[1]
+    with _LOCK:
+        for ent in (_CURRENT, _PREVIOUS):
+            if ent is not None and ent[0] is dbs:
+                return ent[1]
+        pools = _open_fresh_pack(dbs, pack_path, auto_build)
+        if pools is None:
+            pools = MemoryPools(dbs)
+        _PREVIOUS, _CURRENT = _CURRENT, (dbs, pools)
+        return pools
+
+def _open_fresh_pack(dbs, pack_path, auto_build):
+    try:
+        pack = PoolPack(pack_path)
+        if pack.is_fresh(dbs):
+            return pack
+    except (OSError, ValueError, KeyError):
+        pass
+    if not auto_build:
+        return None
+    try:
+        build_pack(dbs, pack_path)
+        return PoolPack(pack_path)
+    except OSError:
+        # 읽기 전용 배포 환경 등 → 메모리 정리본으로
+        return None
+
+# =========================================================
+# 6) CLI
+# =========================================================
+def main(argv=None) -> int:
+    from fortune_db import load_all_dbs
+
+    ap = argparse.ArgumentParser(description="풀 팩 빌드/확인")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="data/*.json → 풀 팩")
+    b.add_argument("--out", default=str(PACK_PATH))
+    i = sub.add_parser("info", help="풀 팩 내용 요약")
+    i.add_argument("--pack", default=str(PACK_PATH))
+    args = ap.parse_args(argv)
+
+    dbs = load_all_dbs()
+    if args.cmd == "build":
+        out = build_pack(dbs, args.out)
+        print(f"built {out} ({out.stat().st_size:,} bytes)")
+        return 0
+
+    pack = PoolPack(args.pack)
+    print(f"{pack.path} version={pack.version} fresh={pack.is_fresh(dbs)} meta={pack.meta}")
+    st = pack.string_stats
+    print(f"strings: {st['lines']:,} lines → {st['unique']:,} unique, "
+          f"{st['bytes_before']:,} → {st['bytes_after']:,} bytes (saved {st['saved']:,})")
+    for name in pack.names():
+        print(f"  {name:<28} {len(pack.pool(name)):>8,} lines")
+    for p in pack.problems:
+        print(f"  problem: {p}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
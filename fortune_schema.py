@@ -0,0 +1,252 @@
+# fortune_schema.py
+# - DB 구조(스키마) 해석: 로드 시 1회만 모양을 판별/검증해서 "풀 이름 → 원본 문장 목록" 으로 정리
+#   · 띠:    {띠키: [..]} / {"zodiac": {띠키: ..}} / {띠키: {"items"|"lines"|"pools": [..], "today": [..], ...}}
+#   · 사주:  {"elements": [{"pools": {"overall", "love", "money", "health", "advice"}}]} / 구버전 {"pools": {"saju": [..]}}
+#   · 오늘/내일/2026: {"pools": {키: [..]}} / {키: [..]} / {"lines": [..]} / [..]
+#   · MBTI:  {"traits": {유형: {...}}} / {유형: "..."}
+# - 필수 풀이 없거나 비었으면 problems 로 한 번에 보고 (렌더 중에 모양을 다시 탐색하지 않음)
+# - fortune_pack 이 이 결과로 풀을 정리/팩에 기록하고, 풀 객체가 타입별 접근자를 제공
+#     pools.zodiac_pool("rat", "today") / pools.saju_pool(0, "love") / pools.daily_pool("today") / pools.mbti_trait("INTJ")
+#   · 화면에서 아직 안 쓰는 하위 풀(띠 today/tomorrow/year/advice, 사주 love/money/health/advice)도 같이 노출
+#
+# 사용:
+#   python fortune_schema.py check      # 해석된 풀/문제 출력 (문제가 있으면 종료코드 1)
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass, field
+
+from fortune_text import (
+    ZODIAC_ORDER,
+    CLEAN_LINE,
+    CLEAN_SAJU_LINE,
+    CLEAN_ZODIAC_LINE,
+    safe_str,
+    strip_html_like,
+)
+
+MBTI_TYPES = [
+    "INTJ","INTP","ENTJ","ENTP",
+    "INFJ","INFP","ENFJ","ENFP",
+    "ISTJ","ISFJ","ESTJ","ESFJ",
+    "ISTP","ISFP","ESTP","ESFP",
+]
+DAILY_KINDS = ("today", "tomorrow", "year_all")
+_ITEM_KEYS = ("items", "lines", "pools")  # 띠 dict 안에서 기본 풀로 쓰는 키 (우선순위 순)
+
+# =========================================================
+# 1) 풀 이름
+# =========================================================
+def zodiac_pool_name(zodiac_key: str, category: str = "items") -> str:
+    return f"zodiac/{zodiac_key}" if category == "items" else f"zodiac/{zodiac_key}/{category}"
+
+def saju_pool_name(element: int | None, topic: str = "overall") -> str:
+    """element=None: 구버전(elements 없는) 사주 DB."""
+    base = "saju/saju" if element is None else f"saju/element/{element}"
+    return base if topic == "overall" else f"{base}/{topic}"
+
+def mbti_pool_name(mbti: str) -> str:
+    return f"mbti/{mbti}"
+
+# =========================================================
+# 2) MBTI 특징 문장
+# =========================================================
+def get_mbti_trait_text(mbti_db: dict, mbti: str) -> str:
+    """
+    mbti_traits_ko.json 구조 대응:
+    - {"traits": {"ENFP": {...}} , ...}
+    - {"ENFP": "..."} 형태도 대응
+    """
+    if not isinstance(mbti_db, dict):
+        return ""
+    if "traits" in mbti_db and isinstance(mbti_db["traits"], dict):
+        t = mbti_db["traits"].get(mbti)
+        if isinstance(t, str):
+            return t
+        if isinstance(t, dict):
+            kw = t.get("keywords") or t.get("키워드") or []
+            tips = t.get("tips") or t.get("action_tips") or []
+            parts = []
+            if isinstance(kw, list) and kw:
+                parts.append("키워드: " + " · ".join([strip_html_like(str(x)) for x in kw][:6]))
+            if isinstance(tips, list) and tips:
+                parts.append(json.dumps([strip_html_like(str(x)) for x in tips][:6], ensure_ascii=False))
+            return " ".join(parts).strip()
+        return ""
+    v = mbti_db.get(mbti, "")
+    return strip_html_like(safe_str(v))
+
+# =========================================================
+# 3) 해석 + 검증
+# =========================================================
+@dataclass(frozen=True)
+class Schema:
+    """resolve_schema() 결과.
+
+    - pools: 풀 이름 -> (원본 목록, 정리 파이프라인 | None = 이미 정리됨)
+    - meta: saju_elements(0 = 구버전), zodiac_categories, saju_topics (하위 풀 목록)
+    - problems: 필수 풀이 없거나 빈 경우 등 (사람이 읽는 문장)
+    """
+    pools: dict
+    meta: dict
+    problems: tuple = field(default=())
+
+def _zodiac_entry(zdb, zodiac_key):
+    if not isinstance(zdb, dict):
+        return None
+    val = zdb.get(zodiac_key)
+    if val is None and isinstance(zdb.get("zodiac"), dict):
+        val = zdb["zodiac"].get(zodiac_key)
+    return val
+
+def _zodiac_pools(val) -> tuple[list, dict]:
+    """띠 1개 → (기본 풀, {하위 분류: 풀})."""
+    if isinstance(val, list):
+        return val, {}
+    if not isinstance(val, dict):
+        return [], {}
+    items = next((val[k] for k in _ITEM_KEYS if isinstance(val.get(k), list)), [])
+    subs = {k: v for k, v in val.items() if k not in _ITEM_KEYS and isinstance(v, list)}
+    return items, subs
+
+def _fortune_raw_pool(fdb, key_name):
+    if isinstance(fdb, dict):
+        if isinstance(fdb.get("pools"), dict) and isinstance(fdb["pools"].get(key_name), list):
+            return fdb["pools"][key_name]
+        if isinstance(fdb.get(key_name), list):
+            return fdb[key_name]
+        if isinstance(fdb.get("lines"), list):
+            return fdb["lines"]
+        return []
+    if isinstance(fdb, list):
+        return fdb
+    return []
+
+def resolve_schema(dbs) -> Schema:
+    """dbs(load_all_dbs 결과) 의 모양을 1회 판별/검증."""
+    pools = {}
+    meta = {}
+    problems = []
+
+    # 띠
+    zdb = dbs["zodiac_db"]
+    categories = set()
+    for zk in ZODIAC_ORDER:
+        items, subs = _zodiac_pools(_zodiac_entry(zdb, zk))
+        if not items:
+            problems.append(f"띠 운세: '{zk}' 문장 없음")
+        pools[zodiac_pool_name(zk)] = (items, CLEAN_ZODIAC_LINE)
+        for cat, raw in subs.items():
+            pools[zodiac_pool_name(zk, cat)] = (raw, CLEAN_ZODIAC_LINE)
+            categories.add(cat)
+    meta["zodiac_categories"] = sorted(categories)
+
+    # 사주
+    sdb = dbs["saju_db"]
+    topics = set()
+    if isinstance(sdb, dict) and isinstance(sdb.get("elements"), list) and sdb["elements"]:
+        elements = sdb["elements"]
+        meta["saju_elements"] = len(elements)
+        for i, el in enumerate(elements):
+            el_pools = el.get("pools") if isinstance(el, dict) else None
+            if not isinstance(el_pools, dict):
+                el_pools = {}
+            raw = el_pools.get("overall")
+            if not isinstance(raw, list) or not raw:
+                problems.append(f"사주: elements[{i}].pools.overall 없음")
+                raw = []
+            pools[saju_pool_name(i)] = (raw, CLEAN_SAJU_LINE)
+            for topic, v in el_pools.items():
+                if topic != "overall" and isinstance(v, list):
+                    pools[saju_pool_name(i, topic)] = (v, CLEAN_SAJU_LINE)
+                    topics.add(topic)
+    else:
+        meta["saju_elements"] = 0
+        raw = []
+        if isinstance(sdb, dict) and isinstance(sdb.get("pools"), dict) and isinstance(sdb["pools"].get("saju"), list):
+            raw = sdb["pools"]["saju"]
+        if not raw:
+            problems.append("사주: elements / pools.saju 둘 다 없음")
+        pools[saju_pool_name(None)] = (raw, CLEAN_SAJU_LINE)
+    meta["saju_topics"] = sorted(topics)
+
+    # 오늘/내일/2026 (연간 운세도 "lines"/list 폴백 우선순위 동일)
+    for kind, db_key in zip(DAILY_KINDS, ("fortunes_today", "fortunes_tomorrow", "fortunes_year")):
+        raw = _fortune_raw_pool(dbs[db_key], kind)
+        if not raw:
+            problems.append(f"{db_key}: '{kind}' 풀 없음")
+        pools[kind] = (raw, CLEAN_LINE)
+
+    # MBTI (유형당 1문장, 여기서 완성)
+    mdb = dbs["mbti_db"]
+    missing = []
+    for t in MBTI_TYPES:
+        text = strip_html_like(get_mbti_trait_text(mdb, t))
+        if not text:
+            missing.append(t)
+        pools[mbti_pool_name(t)] = ([text], None)
+    if missing:
+        problems.append(f"MBTI 특징: {', '.join(missing)} 없음")
+
+    return Schema(pools=pools, meta=meta, problems=tuple(problems))
+
+# =========================================================
+# 4) 접근자 (풀 팩 / 메모리 풀 공용)
+# =========================================================
+class PoolAccessors:
+    """풀 이름 문자열 대신 타입별 접근자. 스냅샷당 1회 표를 만들어 두고 조회만 함.
+
+    하위 클래스는 self._pools(이름 -> 시퀀스), self.meta 를 채운 뒤 _index_pools() 호출.
+    """
+
+    def _index_pools(self):
+        get = self._pools.get
+        self.problems = tuple(self.meta.get("problems", ()))
+        cats = ("items", *self.meta.get("zodiac_categories", ()))
+        self._zodiac = {(zk, c): get(zodiac_pool_name(zk, c), ()) for zk in ZODIAC_ORDER for c in cats}
+        n = self.meta.get("saju_elements", 0)
+        topics = ("overall", *self.meta.get("saju_topics", ()))
+        self._saju = {(i, t): get(saju_pool_name(i, t), ()) for i in (range(n) if n else (None,)) for t in topics}
+        self._daily = {k: get(k, ()) for k in DAILY_KINDS}
+        self._mbti = {t: next(iter(get(mbti_pool_name(t), ())), "") for t in MBTI_TYPES}
+
+    def zodiac_pool(self, zodiac_key: str, category: str = "items"):
+        """띠 운세 풀. category: items(화면) / today / tomorrow / year / advice ..."""
+        return self._zodiac.get((zodiac_key, category), ())
+
+    def saju_pool(self, element: int | None, topic: str = "overall"):
+        """사주 풀. element=None 은 구버전 DB. topic: overall(화면) / love / money / health / advice ..."""
+        return self._saju.get((element, topic), ())
+
+    def daily_pool(self, kind: str):
+        """today / tomorrow / year_all."""
+        return self._daily.get(kind, ())
+
+    def mbti_trait(self, mbti: str) -> str:
+        """정리된 MBTI 특징 문장 (없으면 "")."""
+        return self._mbti.get(mbti, "")
+
+# =========================================================
+# 5) CLI
+# =========================================================
+def main(argv=None) -> int:
+    from fortune_db import load_all_dbs
+
+    ap = argparse.ArgumentParser(description="DB 구조 해석/검증")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("check", help="해석된 풀 목록과 문제 출력")
+    ap.parse_args(argv)
+
+    schema = resolve_schema(load_all_dbs())
+    print(f"meta={schema.meta}")
+    for name, (raw, _) in schema.pools.items():
+        if not name.startswith("mbti/"):
+            print(f"  {name:<28} {len(raw):>6,} raw")
+    for p in schema.problems:
+        print(f"problem: {p}")
+    print(f"{len(schema.pools)} pools, {len(schema.problems)} problems")
+    return 1 if schema.problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
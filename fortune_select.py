@@ -0,0 +1,395 @@
+# fortune_select.py
+# - 사용자 1명의 pick seed 를 한 번에 유도하고, 풀 크기로 인덱스를 고름
+# - pick 마다 random.Random(seed) 를 새로 만들지 않음
+# - 여러 사용자 × 여러 날짜: derive_seeds_many → SeedBatch (numpy 배열, 인덱스도 배열로)
+#     · v2: 사용자당 blake2b 1회, 날짜 seed/인덱스는 배열 연산 (사용자 × 날짜 전체를 한 번에)
+#     · compat: 사용자 해시(base + prefix)는 사용자당 1번, 날짜 꼬리/타로 날짜 prefix 는 사용자끼리 공유
+#       인덱스는 Random(seed).choice 의 MT19937 seed 과정을 numpy 로 seed 축 벡터화 (스칼라의 ~3배)
+#       그래도 pick 마다 624 단계 × 2 상태 초기화가 남음 → v2 보다 수십 배 느림
+#
+# seed 방식 (배포 단위로 선택: 환경변수 FORTUNE_SEED_MODE)
+# - compat (기본): 기존 stable_seed + Random(seed).choice 와 완전히 같은 결과
+#     · 사용자 prefix("{base_seed}|")까지 해시한 상태를 copy() 해서 재사용
+#     · 스레드별 Random 1개를 seed() 로 재설정 (Random(seed) 생성과 같은 상태)
+# - v2: 사용자당 blake2b 1회 → 고정 pick(띠/사주/연간)은 digest 에서 바로,
+#       날짜 pick(오늘/내일/타로)은 digest 의 daily key + 날짜를 splitmix64 로 섞어서
+#       인덱스 = (값 × 풀 크기) >> 64  (해시 재계산·Random 생성 없음)
+#     ※ compat 과 결과가 다름 → 사용자에게 보이는 운세가 바뀌므로 배포 단위로만 전환
+
+import hashlib
+import os
+import random
+import struct
+import threading
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+SEED_MODES = ("compat", "v2")
+DEFAULT_SEED_MODE = os.environ.get("FORTUNE_SEED_MODE", "compat").strip().lower() or "compat"
+
+_M64 = (1 << 64) - 1
+
+@dataclass(frozen=True, slots=True)
+class PickSeeds:
+    """사용자 1명 × 날짜 1개의 pick seed 묶음 (값의 의미는 mode 에 따라 다름)."""
+    mode: str
+    base_seed: int
+    zodiac: int
+    saju_element: int
+    saju: int
+    today: int
+    tomorrow: int
+    year: int
+    tarot: int
+
+    def index(self, value: int, n: int) -> int | None:
+        """풀 크기 n 에서 value(이 객체의 필드 값)로 고른 인덱스. 빈 풀이면 None."""
+        if n <= 0:
+            return None
+        if self.mode == "compat":
+            return _compat_choice_index(value, n)
+        return (value * n) >> 64
+
+    def element_index(self, n: int) -> int:
+        """사주 오행 인덱스 (compat: 기존처럼 seed % n)."""
+        if self.mode == "compat":
+            return self.saju_element % n
+        return (self.saju_element * n) >> 64
+
+# =========================================================
+# 1) compat: 기존 stable_seed / Random(seed).choice 재현
+# =========================================================
+_TLS = threading.local()
+
+def _compat_choice_index(seed: int, n: int) -> int:
+    r = getattr(_TLS, "rng", None)
+    if r is None:
+        r = _TLS.rng = random.Random()
+    r.seed(seed)
+    # Random(seed).choice(pool) 는 pool[r._randbelow(len(pool))] → range 로 같은 인덱스
+    return r.choice(range(n))
+
+def _seed48(h) -> int:
+    # stable_seed 의 int(hexdigest[:12], 16) 와 동일
+    return int.from_bytes(h.digest()[:6], "big")
+
+def _compat_user(birth, name: str, mbti: str, legacy_saju: bool):
+    """사용자 단위 해시 1번 → (base, prefix 해시 상태, (zodiac, saju_element, saju, year))."""
+    base = _seed48(hashlib.sha256(f"{birth}|{name}|{mbti}".encode("utf-8")))
+    prefix = hashlib.sha256(f"{base}|".encode("utf-8"))
+    fixed = []
+    for tail in (b"zodiac", b"saju_element", b"saju" if legacy_saju else b"saju_overall", b"year_2026"):
+        h = prefix.copy()
+        h.update(tail)
+        fixed.append(_seed48(h))
+    return base, prefix, fixed
+
+def _derive_compat_dates(birth, name: str, mbti: str, dates, legacy_saju: bool) -> list[PickSeeds]:
+    # 사용자 단위 seed 는 날짜와 무관 → 1번만
+    base, prefix, (zodiac, saju_element, saju, year) = _compat_user(birth, name, mbti, legacy_saju)
+
+    def sub(tail: str) -> int:
+        h = prefix.copy()
+        h.update(tail.encode("utf-8"))
+        return _seed48(h)
+
+    return [
+        PickSeeds(
+            mode="compat",
+            base_seed=base,
+            zodiac=zodiac,
+            saju_element=saju_element,
+            saju=saju,
+            today=sub(f"{d}|today"),
+            tomorrow=sub(f"{d + timedelta(days=1)}|tomorrow"),
+            year=year,
+            tarot=_seed48(hashlib.sha256(f"{d}|{base}|tarot".encode("utf-8"))),
+        )
+        for d in dates
+    ]
+
+def _derive_compat(birth, name: str, mbti: str, on_date: date, legacy_saju: bool) -> PickSeeds:
+    return _derive_compat_dates(birth, name, mbti, (on_date,), legacy_saju)[0]
+
+# =========================================================
+# 2) v2: 사용자당 해시 1회 + splitmix64
+# =========================================================
+_V2_PERSON = b"fortune-v2"
+_GOLDEN = 0x9E3779B97F4A7C15
+
+def _mix64(x: int) -> int:
+    """splitmix64 finalizer."""
+    x = (x + _GOLDEN) & _M64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _M64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _M64
+    return x ^ (x >> 31)
+
+def _daily(key: int, day: date, tag: int) -> int:
+    return _mix64((key + day.toordinal() * _GOLDEN + tag) & _M64)
+
+def _derive_v2_dates(birth, name: str, mbti: str, dates, legacy_saju: bool) -> list[PickSeeds]:
+    d = hashlib.blake2b(f"{birth}|{name}|{mbti}".encode("utf-8"), digest_size=48, person=_V2_PERSON).digest()
+    zodiac, saju_element, saju, year, key = struct.unpack_from("<5Q", d, 8)
+    base = int.from_bytes(d[:6], "big")
+    return [
+        PickSeeds(
+            mode="v2",
+            base_seed=base,
+            zodiac=zodiac,
+            saju_element=saju_element,
+            saju=saju,
+            today=_daily(key, day, 1),
+            tomorrow=_daily(key, day + timedelta(days=1), 2),
+            year=year,
+            tarot=_daily(key, day, 3),
+        )
+        for day in dates
+    ]
+
+def _derive_v2(birth, name: str, mbti: str, on_date: date, legacy_saju: bool) -> PickSeeds:
+    return _derive_v2_dates(birth, name, mbti, (on_date,), legacy_saju)[0]
+
+# =========================================================
+# 3) 여러 사용자 × 여러 날짜 (numpy 배열)
+# =========================================================
+_FIXED = ("base_seed", "zodiac", "saju_element", "saju", "year")  # (사용자,)
+_DAILY = ("today", "tomorrow", "tarot")                             # (사용자, 날짜)
+
+@dataclass(frozen=True, slots=True)
+class SeedBatch:
+    """사용자 U명 × 날짜 D개의 pick seed. 고정 seed 는 (U,), 날짜 seed 는 (U, D) uint64 배열."""
+    mode: str
+    base_seed: object
+    zodiac: object
+    saju_element: object
+    saju: object
+    year: object
+    today: object
+    tomorrow: object
+    tarot: object
+
+    def __len__(self):
+        return len(self.base_seed)
+
+    def index(self, values, n: int):
+        """values(이 객체의 배열 또는 그 일부)별 풀 크기 n 인덱스 (int64 배열, 같은 모양). 빈 풀이면 None."""
+        import numpy as np
+
+        if n <= 0:
+            return None
+        values = np.asarray(values, dtype=np.uint64)
+        if self.mode == "compat":
+            return _compat_choice_many(values.ravel(), n).reshape(values.shape)
+        return _mulhi(values, n)
+
+    def element_index(self, n: int):
+        """사주 오행 인덱스 배열 (PickSeeds.element_index 와 같은 값)."""
+        import numpy as np
+
+        if self.mode == "compat":
+            return (self.saju_element % np.uint64(n)).astype(np.int64)
+        return _mulhi(self.saju_element, n)
+
+    def seeds(self, u: int, d: int = 0) -> PickSeeds:
+        """사용자 u × 날짜 d 의 PickSeeds (compute_fortune 등 1명 단위 코드용)."""
+        fixed = {f: int(getattr(self, f)[u]) for f in _FIXED}
+        daily = {f: int(getattr(self, f)[u, d]) for f in _DAILY}
+        return PickSeeds(mode=self.mode, **fixed, **daily)
+
+def _mulhi(values, n: int):
+    """(values × n) >> 64 를 uint64 배열로 (n < 2**32 → 32비트씩 나눠 곱해도 넘치지 않음)."""
+    import numpy as np
+
+    if n >= 1 << 32:
+        return np.fromiter(((v * n) >> 64 for v in values.ravel().tolist()), np.int64, values.size).reshape(values.shape)
+    k = np.uint64(n)
+    s32 = np.uint64(32)
+    hi = values >> s32
+    lo = values & np.uint64(0xFFFFFFFF)
+    return ((hi * k + ((lo * k) >> s32)) >> s32).astype(np.int64)
+
+# compat 인덱스 배열: Random(seed).choice(range(n)) 를 seed 축으로 벡터화한 MT19937
+# - seed(int) = init_by_array(seed 를 32비트 단어로 나눈 key) → 624 단계 점화식 2번 (seed 끼리는 독립)
+# - choice = getrandbits(n.bit_length()) 를 n 미만이 나올 때까지 → 출력 t 는 twist 전 상태의
+#   mt[t], mt[t+1], mt[t+397] 만으로 계산 (t < 227)
+# - 스칼라(Random.seed 1회 ≈ 8µs)보다 ~3배 빠름. 배치당 상태 624 × _MT_BATCH uint32 (≈20MB)
+_MT_N = 624
+_MT_BATCH = 8192
+_MT_BASE = None
+
+def _mt_base():
+    """init_genrand(19650218): init_by_array 의 시작 상태 (seed 와 무관 → 1번만)."""
+    global _MT_BASE
+    if _MT_BASE is None:
+        import numpy as np
+
+        mt = [19650218]
+        for i in range(1, _MT_N):
+            mt.append((1812433253 * (mt[-1] ^ (mt[-1] >> 30)) + i) & 0xFFFFFFFF)
+        _MT_BASE = np.array(mt, dtype=np.uint32)
+    return _MT_BASE
+
+def _mt_seed(keys):
+    """init_by_array 를 seed 축으로: keys = 단어 배열 목록 (길이 1 또는 2, 각 (U,)) → 상태 (624, U)."""
+    import numpy as np
+
+    n = _MT_N
+    mt = np.repeat(_mt_base()[:, None], len(keys[0]), axis=1)
+    m1, m2, s30 = np.uint32(1664525), np.uint32(1566083941), np.uint32(30)
+    i, j = 1, 0
+    prev = mt[0].copy()
+    for _ in range(n):
+        prev = (mt[i] ^ ((prev ^ (prev >> s30)) * m1)) + keys[j] + np.uint32(j)
+        mt[i] = prev
+        i += 1
+        j = (j + 1) % len(keys)
+        if i >= n:
+            mt[0] = mt[n - 1]
+            prev = mt[0].copy()
+            i = 1
+    for _ in range(n - 1):
+        prev = (mt[i] ^ ((prev ^ (prev >> s30)) * m2)) - np.uint32(i)
+        mt[i] = prev
+        i += 1
+        if i >= n:
+            mt[0] = mt[n - 1]
+            prev = mt[0].copy()
+            i = 1
+    mt[0] = np.uint32(0x80000000)
+    return mt
+
+def _mt_output(mt, t: int, cols):
+    """twist 후 t 번째 32비트 출력 (t < 227), cols 열(seed)만."""
+    import numpy as np
+
+    y = (mt[t, cols] & np.uint32(0x80000000)) | (mt[t + 1, cols] & np.uint32(0x7FFFFFFF))
+    y = mt[t + 397, cols] ^ (y >> np.uint32(1)) ^ ((y & np.uint32(1)) * np.uint32(0x9908B0DF))
+    y ^= y >> np.uint32(11)
+    y ^= (y << np.uint32(7)) & np.uint32(0x9D2C5680)
+    y ^= (y << np.uint32(15)) & np.uint32(0xEFC60000)
+    return y ^ (y >> np.uint32(18))
+
+def _compat_choice_many(seeds, n: int):
+    """seeds(48비트 uint64 배열)별 _compat_choice_index(seed, n) (int64 배열)."""
+    import numpy as np
+
+    out = np.empty(len(seeds), dtype=np.int64)
+    if n >= 1 << 32:  # getrandbits 가 단어 여러 개 → 스칼라로
+        out[:] = [_compat_choice_index(v, n) for v in seeds.tolist()]
+        return out
+    shift = np.uint32(32 - n.bit_length())
+    hi = (seeds >> np.uint64(32)).astype(np.uint32)
+    lo = (seeds & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+    # key 길이: 상위 단어가 0 이면 1단어 (Random.seed 가 앞의 0 단어를 버림)
+    for group in (np.flatnonzero(hi == 0), np.flatnonzero(hi != 0)):
+        for b in range(0, len(group), _MT_BATCH):
+            idx = group[b:b + _MT_BATCH]
+            keys = [lo[idx]] if not hi[idx].any() else [lo[idx], hi[idx]]
+            mt = _mt_seed(keys)
+            res = np.full(len(idx), -1, dtype=np.int64)
+            todo = np.arange(len(idx))
+            t = 0
+            while len(todo) and t < 200:  # 거절 확률 < 1/2 → 200번이면 사실상 0
+                r = (_mt_output(mt, t, todo) >> shift).astype(np.int64)
+                ok = r < n
+                res[todo[ok]] = r[ok]
+                todo = todo[~ok]
+                t += 1
+            for k in todo.tolist():
+                res[k] = _compat_choice_index(int(seeds[idx[k]]), n)
+            out[idx] = res
+    return out
+
+def _many_compat(users, dates, legacy_saju: bool) -> dict:
+    import numpy as np
+
+    # 날짜 쪽 입력은 사용자와 무관 → 날짜마다 1번만 (꼬리 bytes, 타로 "{날짜}|" 해시 상태)
+    today_tails = [f"{d}|today".encode("utf-8") for d in dates]
+    tomorrow_tails = [f"{d + timedelta(days=1)}|tomorrow".encode("utf-8") for d in dates]
+    tarot_prefix = [hashlib.sha256(f"{d}|".encode("utf-8")) for d in dates]
+    fixed = []
+    daily = {k: [] for k in _DAILY}
+    for birth, name, mbti in users:
+        base, prefix, seeds = _compat_user(birth, name, mbti, legacy_saju)
+        fixed.append((base, *seeds))
+        tarot_tail = f"{base}|tarot".encode("utf-8")
+        for key, tails in (("today", today_tails), ("tomorrow", tomorrow_tails)):
+            for tail in tails:
+                h = prefix.copy()
+                h.update(tail)
+                daily[key].append(_seed48(h))
+        for dp in tarot_prefix:
+            h = dp.copy()
+            h.update(tarot_tail)
+            daily["tarot"].append(_seed48(h))
+    f = np.array(fixed, dtype=np.uint64).reshape(len(users), len(_FIXED))
+    out = {k: f[:, i] for i, k in enumerate(_FIXED)}
+    for k, v in daily.items():
+        out[k] = np.array(v, dtype=np.uint64).reshape(len(users), len(dates))
+    return out
+
+def _many_v2(users, dates, legacy_saju: bool) -> dict:
+    import numpy as np
+
+    raw = b"".join(
+        hashlib.blake2b(f"{b}|{n}|{m}".encode("utf-8"), digest_size=48, person=_V2_PERSON).digest()
+        for b, n, m in users
+    )
+    words = np.frombuffer(raw, dtype="<u8").reshape(len(users), 6)
+    head = np.frombuffer(raw, dtype=np.uint8).reshape(len(users), 48)[:, :6].astype(np.uint64)
+    base = np.zeros(len(users), dtype=np.uint64)
+    for i in range(6):  # int.from_bytes(d[:6], "big")
+        base = (base << np.uint64(8)) | head[:, i]
+    out = {"base_seed": base, "zodiac": words[:, 1], "saju_element": words[:, 2],
+           "saju": words[:, 3], "year": words[:, 4]}
+    key = words[:, 5:6]
+    ords = np.array([d.toordinal() for d in dates], dtype=np.uint64)
+    for name, tag, shift in (("today", 1, 0), ("tomorrow", 2, 1), ("tarot", 3, 0)):
+        out[name] = _mix64_arr(key + (ords + np.uint64(shift)) * np.uint64(_GOLDEN) + np.uint64(tag))
+    return out
+
+def _mix64_arr(x):
+    """_mix64 의 uint64 배열판 (곱셈/덧셈은 2**64 로 감김 = & _M64)."""
+    import numpy as np
+
+    x = x + np.uint64(_GOLDEN)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+# =========================================================
+# 4) 공개 API
+# =========================================================
+_DERIVE = {"compat": _derive_compat, "v2": _derive_v2}
+_DERIVE_DATES = {"compat": _derive_compat_dates, "v2": _derive_v2_dates}
+_DERIVE_MANY = {"compat": _many_compat, "v2": _many_v2}
+
+def _resolve_mode(mode: str | None) -> str:
+    mode = (mode or DEFAULT_SEED_MODE).lower()
+    if mode not in _DERIVE:
+        raise ValueError(f"알 수 없는 seed 방식: {mode} (가능: {', '.join(SEED_MODES)})")
+    return mode
+
+def derive_seeds(birth, name: str, mbti: str, on_date: date, mode: str | None = None,
+                 legacy_saju: bool = False) -> PickSeeds:
+    """사용자 1명의 모든 pick seed.
+
+    - name/mbti 는 compute_fortune 과 같이 이미 정리(strip/기본값)된 값
+    - legacy_saju: saju_ko.json 이 구버전(pools.saju) 구조일 때 True
+    """
+    return _DERIVE[_resolve_mode(mode)](birth, name, mbti, on_date, legacy_saju)
+
+def derive_seeds_dates(birth, name: str, mbti: str, dates, mode: str | None = None,
+                       legacy_saju: bool = False) -> list[PickSeeds]:
+    """사용자 1명 × 여러 날짜의 seed (사용자 단위 해시는 1번만 → 분포 시뮬레이션 등 대량 계산용)."""
+    return _DERIVE_DATES[_resolve_mode(mode)](birth, name, mbti, dates, legacy_saju)
+
+def derive_seeds_many(users, dates, mode: str | None = None, legacy_saju: bool = False) -> SeedBatch:
+    """여러 사용자 [(birth, name, mbti), ...] × 여러 날짜의 seed 를 배열로 (배치/분포 시뮬레이션용).
+
+    batch.seeds(u, d) 는 derive_seeds(*users[u], dates[d], ...) 와 같음.
+    """
+    mode = _resolve_mode(mode)
+    users = list(users)
+    dates = tuple(dates)
+    return SeedBatch(mode=mode, **_DERIVE_MANY[mode](users, dates, legacy_saju))
@@ -0,0 +1,148 @@
+# fortune_strings.py
+# - 내용 기준(content-addressed) 문자열 표: 같은 문장은 1번만 저장하고 id(정수)로 참조
+#   · DB 로드(fortune_db): 파싱한 JSON 의 문자열을 스냅샷 전체 표 1개로 intern
+#     (띠 items ↔ today/tomorrow/year/advice, DB 사이 중복 문장이 같은 객체 1개를 공유)
+#   · 풀(fortune_pack): 정리된 문장을 표에 넣고 풀은 id 배열(array 'I')로만 보관
+#     (같은 원본 문장은 파이프라인별로 1번만 정리)
+# - 중복 제거 통계: DB 키/풀 전체별 문자열 수, 고유 수, 바이트(중복 포함 → 제거 후)
+#
+# 사용:
+#   python fortune_strings.py stats      # DB 별 / 풀 전체 중복 제거 통계
+
+import argparse
+import sys
+from array import array
+from collections.abc import Sequence
+
+# =========================================================
+# 1) 문자열 표
+# =========================================================
+class StringTable:
+    """문자열 → id. 같은 내용은 처음 들어온 객체 1개만 보관."""
+    __slots__ = ("_ids", "strings")
+
+    def __init__(self):
+        self._ids = {}
+        self.strings = []
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __contains__(self, s):
+        return s in self._ids
+
+    def add(self, s: str) -> int:
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def intern(self, s: str) -> str:
+        return self.strings[self.add(s)]
+
+    def nbytes(self) -> int:
+        return sum(map(sys.getsizeof, self.strings))
+
+class IdPool(Sequence):
+    """문자열 표를 참조하는 풀 1개 (id 배열)."""
+    __slots__ = ("_strings", "_ids")
+
+    def __init__(self, strings, ids: array):
+        self._strings = strings
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._strings[j] for j in self._ids[i]]
+        return self._strings[self._ids[i]]
+
+def id_array(ids) -> array:
+    return array("I", ids)
+
+# =========================================================
+# 2) 중복 제거 통계
+# =========================================================
+class DedupCounter:
+    """intern 하면서 1개 단위(DB 키 / 풀 전체)의 통계를 셈.
+
+    - strings: 문자열 값 개수 (dict 키 포함)
+    - objects/bytes_before: 파싱 직후 서로 다른 문자열 객체 수/크기
+    - new/bytes_after: 이 단위가 표에 처음 넣은 문자열 수/크기 (앞 단위와 겹치면 0)
+    """
+    __slots__ = ("table", "strings", "objects", "bytes_before", "new", "bytes_after", "_seen")
+
+    def __init__(self, table: StringTable):
+        self.table = table
+        self.strings = self.objects = self.bytes_before = self.new = self.bytes_after = 0
+        self._seen = set()
+
+    def intern(self, s: str) -> str:
+        self.strings += 1
+        if id(s) not in self._seen:
+            self._seen.add(id(s))
+            self.objects += 1
+            self.bytes_before += sys.getsizeof(s)
+        if s not in self.table:
+            self.new += 1
+            self.bytes_after += sys.getsizeof(s)
+        return self.table.intern(s)
+
+    def stats(self) -> dict:
+        return {
+            "strings": self.strings,
+            "objects": self.objects,
+            "new": self.new,
+            "bytes_before": self.bytes_before,
+            "bytes_after": self.bytes_after,
+            "saved": self.bytes_before - self.bytes_after,
+        }
+
+def walk_strings(obj):
+    """dict/list 중첩 안의 문자열(키 포함) 전부."""
+    if isinstance(obj, str):
+        yield obj
+    elif isinstance(obj, dict):
+        for k, v in obj.items():
+            yield k
+            yield from walk_strings(v)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from walk_strings(v)
+
+# =========================================================
+# 3) CLI
+# =========================================================
+def print_stats(db_stats: dict, pool_stats: dict | None, out=sys.stdout):
+    print(f"{'db':<20} {'strings':>8} {'objects':>8} {'new':>8} {'before':>10} {'after':>10} {'saved':>10}", file=out)
+    total = dict.fromkeys(("strings", "objects", "new", "bytes_before", "bytes_after", "saved"), 0)
+    for key, s in db_stats.items():
+        print(f"{key:<20} {s['strings']:>8,} {s['objects']:>8,} {s['new']:>8,} {s['bytes_before']:>10,} "
+              f"{s['bytes_after']:>10,} {s['saved']:>10,}", file=out)
+        for k in total:
+            total[k] += s[k]
+    print(f"{'(합계)':<18} {total['strings']:>8,} {total['objects']:>8,} {total['new']:>8,} "
+          f"{total['bytes_before']:>10,} {total['bytes_after']:>10,} {total['saved']:>10,}", file=out)
+    if pool_stats:
+        p = pool_stats
+        print(f"\npools ({p['kind']}): {p['lines']:,} lines → {p['unique']:,} unique, "
+              f"{p['bytes_before']:,} → {p['bytes_after']:,} bytes (saved {p['saved']:,})", file=out)
+
+def main(argv=None) -> int:
+    from fortune_db import dedup_stats, load_all_dbs
+    from fortune_pack import load_pools
+
+    ap = argparse.ArgumentParser(description="문자열 중복 제거 통계")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats", help="DB 별 / 풀 전체 통계")
+    ap.parse_args(argv)
+
+    dbs = load_all_dbs()
+    print_stats(dedup_stats(), load_pools(dbs).string_stats)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# fortune_text.py
+# - DB 문장 정리 유틸 (HTML 제거 / 띠 영어키 치환 / 끝 (숫자) 제거)
+# - Streamlit 비의존: app.py, 풀 팩 빌더(fortune_pack.py) 공용
+
+import json
+import re
+
+# =========================================================
+# 1) 띠 라벨
+# =========================================================
+ZODIAC_ORDER = ["rat","ox","tiger","rabbit","dragon","snake","horse","goat","monkey","rooster","dog","pig"]
+ZODIAC_LABEL_KO = {
+    "rat":"쥐띠","ox":"소띠","tiger":"호랑이띠","rabbit":"토끼띠","dragon":"용띠","snake":"뱀띠",
+    "horse":"말띠","goat":"양띠","monkey":"원숭이띠","rooster":"닭띠","dog":"개띠","pig":"돼지띠",
+}
+ZODIAC_EN_TO_KO_INLINE = dict(ZODIAC_LABEL_KO)
+
+# =========================================================
+# 2) 문장 정리
+# =========================================================
+_HTML_TAG_RE = re.compile(r"<[^>]*>")
+_TRAILING_INDEX_RE = re.compile(r"\s*\(\d+\)\s*$")
+
+def safe_str(x):
+    if x is None:
+        return ""
+    if isinstance(x, (dict, list)):
+        return json.dumps(x, ensure_ascii=False)
+    return str(x)
+
+def strip_html_like(text: str) -> str:
+    if not text:
+        return ""
+    text = _HTML_TAG_RE.sub("", text)
+    return text.strip()
+
+# 띠 영어키 치환: 키마다 re.sub 2회(24회 스캔) 대신 교대(alternation) 정규식 1회 스캔
+# - 키마다 ("rat띠"/"rat 띠" → "쥐띠") 다음 (단독 "rat" → "쥐") 순서로 그룹 2개
+#   → 매칭된 그룹 번호(lastindex)로 치환 표를 바로 조회
+# - 키끼리 접두 관계가 없고 치환 결과도 단어 문자(한글)라 \b 판정이 바뀌지 않음
+#   → 키 순서대로 두 번씩 치환하던 결과와 동일
+# - IGNORECASE 매칭(예: KELVIN SIGN "K")도 같게 하려고 lower() 대신 그룹 번호로 조회
+_ZODIAC_INLINE_RE = re.compile(
+    r"\b(?:" + "|".join(
+        rf"({re.escape(en)}\s*띠)\b|({re.escape(en)})\b" for en in ZODIAC_EN_TO_KO_INLINE
+    ) + ")",
+    flags=re.IGNORECASE,
+)
+_ZODIAC_INLINE_REPL = [None]
+for _ko in ZODIAC_EN_TO_KO_INLINE.values():
+    _ZODIAC_INLINE_REPL += [_ko, _ko.replace("띠","")]
+del _ko
+
+def _zodiac_repl(m) -> str:
+    return _ZODIAC_INLINE_REPL[m.lastindex]
+
+def normalize_zodiac_text(text: str) -> str:
+    """띠 운세 문장에 영어키(예: rooster띠)가 섞여 있으면 한국어로 치환."""
+    if not text:
+        return text
+    return _ZODIAC_INLINE_RE.sub(_zodiac_repl, str(text))
+
+def strip_trailing_index(text: str) -> str:
+    """문장 끝에 붙은 (숫자) 같은 인덱스 표기 제거."""
+    if not text:
+        return text
+    return _TRAILING_INDEX_RE.sub("", str(text)).strip()
+
+# =========================================================
+# 3) 정리 파이프라인 (단계 합성 + 풀 단위 일괄 정리)
+# =========================================================
+class TextPipeline:
+    """문장 정리 단계를 순서대로 합성한 1개 단계.
+
+    - 첫 단계는 원본 값을 문자열로 바꾸는 변환(safe_str/str)
+    - clean_pool: 변환 결과가 공백뿐인 항목은 제외하고 나머지 단계를 적용
+      (render_result 의 `[...(safe_str(x)) for x in pool if safe_str(x).strip()]` 와 동일)
+    """
+    __slots__ = ("to_str", "stages")
+
+    def __init__(self, to_str, *stages):
+        self.to_str = to_str
+        self.stages = stages
+
+    def then(self, *stages) -> "TextPipeline":
+        return TextPipeline(self.to_str, *self.stages, *stages)
+
+    def __call__(self, x) -> str:
+        t = self.to_str(x)
+        for f in self.stages:
+            t = f(t)
+        return t
+
+    def clean_pool(self, pool) -> list[str]:
+        out = []
+        stages = self.stages
+        for s in map(self.to_str, pool):
+            if not s.strip():
+                continue
+            for f in stages:
+                s = f(s)
+            out.append(s)
+        return out
+
+CLEAN_LINE = TextPipeline(safe_str, strip_html_like, strip_trailing_index)
+CLEAN_SAJU_LINE = TextPipeline(str, strip_html_like, strip_trailing_index)
+CLEAN_ZODIAC_LINE = TextPipeline(safe_str, strip_html_like, normalize_zodiac_text, strip_trailing_index)
+
+def clean_pool(pool, pipeline: TextPipeline = CLEAN_LINE) -> list[str]:
+    """풀 전체를 한 번에 정리 (비어있지 않은 항목만)."""
+    if not isinstance(pool, list):
+        return []
+    return pipeline.clean_pool(pool)
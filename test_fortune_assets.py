@@ -0,0 +1,67 @@
+# test_fortune_assets.py
+# - url 모드 + Streamlit 정적 제공: asset_url 이 만든 URL 을 Streamlit 의 정적 핸들러로 받아
+#   장기 캐시 헤더(Cache-Control max-age)가 실제로 붙는지 확인
+#
+# 사용:
+#   python -m pytest -q test_fortune_assets.py
+
+import asyncio
+
+import pytest
+
+import fortune_assets
+
+tornado_web = pytest.importorskip("tornado.web")
+pytest.importorskip("streamlit")
+
+from streamlit.web.server.app_static_file_handler import AppStaticFileHandler  # noqa: E402
+from tornado.httpclient import AsyncHTTPClient  # noqa: E402
+from tornado.httpserver import HTTPServer  # noqa: E402
+from tornado.testing import bind_unused_port  # noqa: E402
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+MP3 = b"ID3\x03\x00\x00\x00" + b"\0" * 64
+
+@pytest.fixture
+def static_site(tmp_path, monkeypatch):
+    """tmp_path 를 앱 폴더로: assets/ 파일 + 정적 제공 켬 (static/ 은 asset_url 이 채움)."""
+    (tmp_path / "assets" / "tarot").mkdir(parents=True)
+    (tmp_path / "assets" / "tarot" / "back.png").write_bytes(PNG)
+    (tmp_path / "assets" / "tarot" / "reveal.mp3").write_bytes(MP3)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(fortune_assets, "ASSET_BASE_URL", "")
+    monkeypatch.setattr(fortune_assets, "_STATIC_ON", True)
+    monkeypatch.setattr(fortune_assets, "_PUBLISHED", set())
+    return tmp_path
+
+def _fetch(root, url: str):
+    """Streamlit 서버와 같은 라우트(app/static/(.*) → AppStaticFileHandler)로 GET."""
+    async def run():
+        app = tornado_web.Application([(r"/app/static/(.*)", AppStaticFileHandler, {"path": str(root / "static")})])
+        sock, port = bind_unused_port()
+        server = HTTPServer(app)
+        server.add_sockets([sock])
+        try:
+            return await AsyncHTTPClient().fetch(f"http://127.0.0.1:{port}/{url}", raise_error=False)
+        finally:
+            server.stop()
+
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("rel", ["assets/tarot/back.png", "assets/tarot/reveal.mp3"])
+def test_static_url_gets_long_cache(static_site, rel):
+    url = fortune_assets.asset_url(static_site / rel, image=rel.endswith(".png"))
+    digest = fortune_assets.content_hash(static_site / rel)
+    assert url == f"app/static/{digest}/{rel}?v={digest}"
+
+    resp = _fetch(static_site, url)
+    assert resp.code == 200
+    assert resp.body == (static_site / rel).read_bytes()
+    assert "max-age=315360000" in resp.headers["Cache-Control"]
+
+def test_static_url_without_version_is_not_long_cached(static_site):
+    """?v= 가 빠지면 tornado 는 재검증 헤더만 → asset_url 이 항상 붙여야 하는 이유."""
+    url = fortune_assets.asset_url(static_site / "assets/tarot/back.png", image=True)
+    resp = _fetch(static_site, url.split("?", 1)[0])
+    assert resp.code == 200
+    assert "max-age" not in resp.headers.get("Cache-Control", "")